@@ -9,6 +9,22 @@ from datetime import datetime, timedelta
 import os
 import logging
 import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+import zlib
+
+from c7n.config import Config
+from c7n.utils import chunks
+
+try:
+    import redis
+    from redis import RedisError
+except ImportError:
+    redis = None
+
+    class RedisError(Exception):
+        pass
 
 log = logging.getLogger('custodian.cache')
 
@@ -32,9 +48,34 @@ def factory(config):
             log.debug("Using in-memory cache")
             CACHE_NOTIFY = True
         return InMemoryCache(config)
+    elif is_cache_url(config.cache):
+        if redis is None:
+            raise RuntimeError(
+                "redis package required for cache %s, install c7n[redis]" % config.cache)
+        return RedisCache(config)
     return SqlKvCache(config)
 
 
+def incremental_factory(config):
+    """Cache of policy filter verdicts for incremental runs.
+
+    Kept apart from the resource cache as verdicts are kept for the
+    incremental period, which is usually longer than the cache period.
+    """
+    period = config and config.get('incremental_period')
+    if not period or not config.cache:
+        return NullCache(config)
+    path = config.cache
+    if path != 'memory' and not is_cache_url(path):
+        path = '%s.incremental' % path
+    return factory(Config(config, cache=path, cache_period=period))
+
+
+def is_cache_url(path):
+    """Whether the cache option refers to a network cache rather than a file."""
+    return isinstance(path, str) and urlparse(path).scheme in RedisCache.schemes
+
+
 class Cache:
 
     def __init__(self, config):
@@ -49,6 +90,13 @@ class Cache:
     def save(self, key, data):
         pass
 
+    def get_many(self, keys):
+        return [self.get(k) for k in keys]
+
+    def save_many(self, items):
+        for k, v in items:
+            self.save(k, v)
+
     def size(self):
         return 0
 
@@ -93,6 +141,18 @@ def encode(key):
     return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)  # nosemgrep
 
 
+def compress(data):
+    return zlib.compress(encode(data), 1)
+
+
+def decompress(value):
+    # values saved prior to compression are plain pickles, which
+    # always begin with the protocol opcode rather than a zlib header.
+    if value[:1] != b'\x80':
+        value = zlib.decompress(value)
+    return pickle.loads(value)  # nosec nosemgrep
+
+
 def resolve_path(path):
     return os.path.abspath(
         os.path.expanduser(
@@ -100,6 +160,16 @@ def resolve_path(path):
 
 
 class SqlKvCache(Cache):
+    """Sqlite backed cache, shareable across threads and processes.
+
+    Connections are per thread and the database uses write ahead
+    logging, so readers don't block on concurrent writers. Leaving a
+    with block closes the calling thread's connection, close releases
+    every thread's. Stale
+    entries are ignored on read and expired in bulk at most once per
+    cache period for a given cache file within a process. Values are
+    stored as zlib compressed pickles.
+    """
 
     create_table = """
     create table if not exists c7n_cache (
@@ -109,30 +179,82 @@ class SqlKvCache(Cache):
     )
     """
 
+    create_index = """
+    create index if not exists c7n_cache_create_date on c7n_cache (create_date)
+    """
+
+    # seconds to wait on a concurrent writer's lock
+    lock_timeout = 30
+
+    # sqlite's default limit on the number of host parameters is 999
+    batch_size = 500
+
+    # cache path -> time of last expiry within this process
+    expiry_times = {}
+    expiry_lock = threading.Lock()
+
     def __init__(self, config):
         super().__init__(config)
         self.cache_period = config.cache_period
         self.cache_path = resolve_path(config.cache)
-        self.conn = None
+        self.local = threading.local()
+        # every thread's open connection
+        self.conns = []
+        self.conns_lock = threading.Lock()
+
+    @property
+    def conn(self):
+        return getattr(self.local, 'conn', None)
+
+    @conn.setter
+    def conn(self, value):
+        with self.conns_lock:
+            if value is not None:
+                self.conns.append(value)
+            self.local.conn = value
 
     def init(self):
         # migration from pickle cache file
         if os.path.exists(self.cache_path):
             with open(self.cache_path, 'rb') as fh:
                 header = fh.read(15)
-                if header != b'SQLite format 3':
+                # an empty file is a database another connection has
+                # just created, and has yet to write to.
+                if header and header != b'SQLite format 3':
                     log.debug('removing old cache file')
                     os.remove(self.cache_path)
         elif not os.path.exists(os.path.dirname(self.cache_path)):
             # parent directory creation
-            os.makedirs(os.path.dirname(self.cache_path))
-        self.conn = sqlite3.connect(self.cache_path)
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        # concurrent policy execution means multiple connections to
+        # the same cache file, wait on writers rather than erroring.
+        # closed by whichever thread calls close
+        self.conn = sqlite3.connect(
+            self.cache_path, timeout=self.lock_timeout, check_same_thread=False)
+        try:
+            self.conn.execute('pragma journal_mode=wal')
+            self.conn.execute('pragma synchronous=normal')
+        except sqlite3.OperationalError as e:
+            log.debug('unable to enable cache write ahead log: %s', e)
         self.conn.execute(self.create_table)
-        with self.conn as cursor:
-            log.debug('expiring stale cache entries')
-            cursor.execute(
-                'delete from c7n_cache where create_date < ?',
-                [datetime.utcnow() - timedelta(minutes=self.cache_period)])
+        self.conn.execute(self.create_index)
+        self.expire()
+
+    def expire(self, force=False):
+        """Bulk delete entries older than the cache period."""
+        with self.expiry_lock:
+            last_expiry = self.expiry_times.get(self.cache_path, 0)
+            if not force and time.time() - last_expiry < self.cache_period * 60:
+                return
+            self.expiry_times[self.cache_path] = time.time()
+        try:
+            with self.conn as cursor:
+                log.debug('expiring stale cache entries')
+                cursor.execute(
+                    'delete from c7n_cache where create_date < ?',
+                    [datetime.utcnow() - timedelta(minutes=self.cache_period)])
+        except sqlite3.OperationalError as e:
+            log.debug('unable to expire stale cache entries: %s', e)
 
     def load(self):
         if not self.conn:
@@ -140,31 +262,168 @@ class SqlKvCache(Cache):
         return True
 
     def get(self, key):
-        with self.conn as cursor:
-            r = cursor.execute(
-                'select value, create_date from c7n_cache where key = ?',
-                [sqlite3.Binary(encode(key))]
-            )
-            row = r.fetchone()
-            if row is None:
-                return None
-            value, create_date = row
-            create_date = sqlite3.converters['TIMESTAMP'](create_date.encode('utf8'))
-            if (datetime.utcnow() - create_date).total_seconds() / 60.0 > self.cache_period:
-                return None
-            return pickle.loads(value)  # nosec nosemgrep
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        ekeys = [encode(k) for k in keys]
+        values = {}
+        min_date = datetime.utcnow() - timedelta(minutes=self.cache_period)
+        for key_set in chunks(ekeys, self.batch_size):
+            rows = self.conn.execute(
+                'select key, value, create_date from c7n_cache where key in (%s)' % (
+                    ", ".join("?" * len(key_set))),
+                [sqlite3.Binary(k) for k in key_set])
+            for ekey, value, create_date in rows:
+                create_date = sqlite3.converters['TIMESTAMP'](create_date.encode('utf8'))
+                if create_date < min_date:
+                    continue
+                values[bytes(ekey)] = value
+        return [decompress(values[k]) if k in values else None for k in ekeys]
 
     def save(self, key, data, timestamp=None):
-        with self.conn as cursor:
-            timestamp = timestamp or datetime.utcnow()
-            cursor.execute(
-                'replace into c7n_cache (key, value, create_date) values (?, ?, ?)',
-                (sqlite3.Binary(encode(key)), sqlite3.Binary(encode(data)), timestamp))
+        self.save_many([(key, data)], timestamp)
+
+    def save_many(self, items, timestamp=None):
+        timestamp = timestamp or datetime.utcnow()
+        try:
+            with self.conn as cursor:
+                cursor.executemany(
+                    'replace into c7n_cache (key, value, create_date) values (?, ?, ?)',
+                    [(sqlite3.Binary(encode(k)), sqlite3.Binary(compress(v)), timestamp)
+                     for k, v in items])
+        except sqlite3.OperationalError as e:
+            # caching is an optimization, don't fail the policy on contention
+            log.warning('unable to save cache entry: %s', e)
 
     def size(self):
         return os.path.exists(self.cache_path) and os.path.getsize(self.cache_path) or 0
 
     def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        with self.conns_lock:
+            conns, self.conns = self.conns, []
+            self.local = threading.local()
+        for conn in conns:
+            conn.close()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # other threads may still be using their connections
+        conn = self.conn
+        if conn:
+            with self.conns_lock:
+                self.conns.remove(conn)
+                self.local.conn = None
+            conn.close()
+
+
+class RedisCache(Cache):
+    """Redis backed cache, shareable across processes and hosts.
+
+    The cache option is a redis url (ie. redis://host:6379/0), entries
+    expire server side after the cache period, and values are stored as
+    zlib compressed pickles. Any server speaking the redis protocol can
+    be used.
+    """
+
+    schemes = ('redis', 'rediss', 'unix')
+    key_prefix = b'c7n:'
+    batch_size = 500
+
+    def __init__(self, config, client=None):
+        super().__init__(config)
+        self.cache_period = config.cache_period
+        self.url = config.cache
+        self.client = client
+
+    def load(self):
+        if self.client is None:
+            self.client = redis.Redis.from_url(self.url)
+        return True
+
+    def encode_key(self, key):
+        return self.key_prefix + encode(key)
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        results = []
+        try:
+            for key_set in chunks(keys, self.batch_size):
+                results.extend(self.client.mget([self.encode_key(k) for k in key_set]))
+        except RedisError as e:
+            log.warning('unable to read cache entries: %s', e)
+            return [None] * len(keys)
+        return [decompress(v) if v is not None else None for v in results]
+
+    def save(self, key, data):
+        self.save_many([(key, data)])
+
+    def save_many(self, items):
+        ttl = int(self.cache_period * 60)
+        try:
+            for item_set in chunks(items, self.batch_size):
+                pipe = self.client.pipeline(transaction=False)
+                for k, v in item_set:
+                    pipe.set(self.encode_key(k), compress(v), ex=ttl)
+                pipe.execute()
+        except RedisError as e:
+            # caching is an optimization, don't fail the policy on an unavailable server
+            log.warning('unable to save cache entry: %s', e)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+class SharedResourceCache(Cache):
+    """Run scoped cache layer for policies querying the same resource set.
+
+    Wraps a resource manager's configured cache, the first policy in a
+    group to fetch resources populates the group's shared store and
+    every later member is served a private copy of that result set.
+    """
+
+    def __init__(self, config, cache, store):
+        super().__init__(config)
+        self.cache = cache
+        self.store = store
+
+    def load(self):
+        return self.cache.load()
+
+    def get(self, key):
+        value = self.store.get(encode(key))
+        if value is not None:
+            return pickle.loads(value)  # nosec nosemgrep
+        return self.cache.get(key)
+
+    def get_many(self, keys):
+        values = [self.store.get(encode(k)) for k in keys]
+        misses = [i for i, v in enumerate(values) if v is None]
+        results = [
+            pickle.loads(v) if v is not None else None  # nosec nosemgrep
+            for v in values]
+        if misses:
+            for i, v in zip(misses, self.cache.get_many([keys[i] for i in misses])):
+                results[i] = v
+        return results
+
+    def save(self, key, data):
+        self.store[encode(key)] = encode(data)
+        self.cache.save(key, data)
+
+    def save_many(self, items):
+        items = list(items)
+        for k, v in items:
+            self.store[encode(k)] = encode(v)
+        self.cache.save_many(items)
+
+    def size(self):
+        return self.cache.size()
+
+    def close(self):
+        self.cache.close()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cache.__exit__(exc_type, exc_val, exc_tb)
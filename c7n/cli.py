@@ -21,7 +21,7 @@ except ImportError:
     def setproctitle(t):
         return None
 
-from c7n import deprecated
+from c7n import deprecated, ratelimit
 from c7n.config import Config
 
 DEFAULT_REGION = 'us-east-1'
@@ -62,6 +62,9 @@ def _default_options(p, exclude=[]):
     config.add_argument("-t", "--resource", default=[], dest='resource_types',
                         action='append',
                         help="Only use policies with the given resource type")
+    config.add_argument("--load-workers", type=int, default=None, metavar="N",
+                        help="Processes to parse and validate policy files with,"
+                        " defaults to one per cpu when loading several files")
 
     output = p.add_argument_group("output", "Output control")
     output.add_argument("-v", "--verbose", action="count", help="Verbose logging")
@@ -92,7 +95,7 @@ def _default_options(p, exclude=[]):
     if 'cache' not in exclude:
         p.add_argument(
             "-f", "--cache", default="~/.cache/cloud-custodian.cache",
-            help="Cache file (default %(default)s)")
+            help="Cache file or redis url (default %(default)s)")
         p.add_argument(
             "--cache-period", default=15, type=int,
             help="Cache validity in minutes (default %(default)i)")
@@ -192,6 +195,27 @@ def _key_val_pair(value):
     return value
 
 
+def _resource_concurrency(value):
+    """
+    Type checker for --augment-concurrency values of the format resource=N
+    """
+    resource_type, _, count = value.partition('=')
+    if not resource_type or not count.isdigit() or int(count) < 1:
+        msg = 'values must be of the form `resource=N` ie. `aws.sqs=8`'
+        raise argparse.ArgumentTypeError(msg)
+    return resource_type, int(count)
+
+
+def _api_rate_limit(value):
+    """
+    Type checker for --api-rate-limit values of the format service[.operation]=N
+    """
+    try:
+        return ratelimit.parse_budget(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def setup_parser():
     c7n_desc = "Cloud Custodian - Cloud fleet management"
     parser = argparse.ArgumentParser(description=c7n_desc)
@@ -226,6 +250,41 @@ def setup_parser():
         "--skip-validation",
         action="store_true",
         help="Skips validation of policies (assumes you've run the validate command seperately).")
+    run.add_argument(
+        "--policy-concurrency", type=int, default=1, metavar="N",
+        help="Number of pull mode policies to execute concurrently (default %(default)i)")
+    run.add_argument(
+        "--region-concurrency", type=int, default=1, metavar="N",
+        help="Number of regions to execute pull mode policies in concurrently, "
+        "each per the policy concurrency (default %(default)i)")
+    run.add_argument(
+        "--augment-concurrency", action="append", default=[], type=_resource_concurrency,
+        metavar="RESOURCE=N",
+        help="Repeatable. Maximum concurrent api calls when augmenting a resource type")
+    run.add_argument(
+        "--selective-augment", action="store_true",
+        help="Only fetch the resource attributes referenced by a policy's filters "
+        "and actions, other attributes are omitted from the policy's output")
+    run.add_argument(
+        "--api-rate-limit", action="append", default=[], type=_api_rate_limit,
+        metavar="SERVICE[.OPERATION]=N",
+        help="Repeatable. Maximum api calls per second to a service or operation, "
+        "per account and region")
+
+    run.add_argument(
+        "--incremental-period", type=int, default=None, metavar="MINUTES",
+        help="Only filter resources which changed since a policy's previous run, "
+        "reusing its verdicts for the rest, and filter every resource at least "
+        "this often. Verdicts are stored alongside the cache")
+
+    run.add_argument(
+        "--output-format", choices=("json", "jsonl"), default="json",
+        help="Format of the policy's resources.json output, jsonl writes "
+        "resources.jsonl with one resource per line")
+    run.add_argument(
+        "--output-compress", action="store_true",
+        help="Gzip the resources output when writing to a directory, "
+        "blob storage outputs are always compressed")
 
     metrics_help = ("Emit metrics to provider metrics. Specify 'aws', 'gcp', or 'azure'. "
             "For more details on aws metrics options, see: "
@@ -240,6 +299,12 @@ def setup_parser():
         dest="tracer",
         help="Tracing integration",
         default=None, nargs="?", const="default")
+    run.add_argument(
+        "--profiler", choices=("timing", "cprofile", "sample"), default=None,
+        help="Profile each policy execution, writing the time spent and resource "
+        "counts of its fetch, augment, filters and actions to profile.json in the "
+        "policy output. cprofile adds a cProfile report, and sample adds "
+        "flamegraph ready collapsed stacks")
 
     schema_desc = ("Browse the available vocabularies (resources, filters, modes, and "
                    "actions) for policy construction. The selector "
@@ -287,6 +352,9 @@ def setup_parser():
         "-c", "--config", help=argparse.SUPPRESS)
     validate.add_argument("configs", nargs='*',
                           help="Policy Configuration File(s)")
+    validate.add_argument("--load-workers", type=int, default=None, metavar="N",
+                          help="Processes to parse and validate policy files with,"
+                          " defaults to one per cpu when validating several files")
     validate.add_argument("-v", "--verbose", action="count", help="Verbose Logging")
     validate.add_argument("-q", "--quiet", action="count", help="Less logging (repeatable)")
     validate.add_argument("--debug", default=False, help=argparse.SUPPRESS)
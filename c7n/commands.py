@@ -17,7 +17,9 @@ from c7n import deprecated
 from c7n.exceptions import ClientError, PolicyValidationError
 from c7n.loader import SourceLocator
 from c7n.provider import clouds
-from c7n.policy import Policy, PolicyCollection, load as policy_load
+from c7n.policy import (
+    Policy, PolicyCollection, ResourceFetchPlan,
+    get_load_workers, load_files, map_files, run_policies)
 from c7n.schema import ElementSchema, StructureParser, generate
 from c7n.utils import load_file, local_session, SafeLoader, yaml_dump
 from c7n.config import Bag, Config
@@ -47,9 +49,10 @@ def policy_command(f):
 
         # for a default region for policy loading, we'll expand regions later.
         options.region = ""
-        for fp in options.configs:
+        loaders = load_files(options, options.configs, validate=validate, vars=vars)
+        for fp, load in zip(options.configs, loaders):
             try:
-                collection = policy_load(options, fp, validate=validate, vars=vars)
+                collection = load()
             except IOError:
                 log.error('policy file does not exist ({})'.format(fp))
                 errors += 1
@@ -186,47 +189,63 @@ class DuplicateKeyCheckLoader(SafeLoader):
         return super(DuplicateKeyCheckLoader, self).construct_mapping(node, deep)
 
 
-def validate(options):
+def _validate_file(config_file):
+    """Parse and schema validate a policy file.
+
+    Returns the policy data, any structural error, and schema errors as
+    strings so they can be returned from a process pool. Files which
+    validated on a previous run skip schema validation.
+    """
     from c7n import schema
 
+    with open(config_file) as fh:
+        # our loader is safe loader derived.
+        data = yaml.load(fh.read(), Loader=DuplicateKeyCheckLoader)  # nosec nosemgrep
+
+    structure = StructureParser()
+    try:
+        structure.validate(data)
+    except PolicyValidationError as e:
+        return data, e, []
+    rtypes = structure.get_resource_types(data)
+    load_resources(rtypes)
+    return data, None, [
+        '%s' % e for e in schema.validate_cached(data, resource_types=rtypes)]
+
+
+def validate(options):
+
     if len(options.configs) < 1:
         log.error('no config files specified')
         sys.exit(1)
 
     used_policy_names = set()
-    structure = StructureParser()
     errors = []
     found_deprecations = False
     footnotes = deprecated.Footnotes()
 
-    for config_file in options.configs:
-
-        config_file = os.path.expanduser(config_file)
+    config_files = [os.path.expanduser(f) for f in options.configs]
+    for config_file in config_files:
         if not os.path.exists(config_file):
             raise ValueError("Invalid path for config %r" % config_file)
+        if config_file.rsplit('.', 1)[-1] not in ('yml', 'yaml', 'json'):
+            log.error("The config file must end in .json, .yml or .yaml.")
+            raise ValueError("The config file must end in .json, .yml or .yaml.")
 
-        options.dryrun = True
-        fmt = config_file.rsplit('.', 1)[-1]
-
-        with open(config_file) as fh:
-            if fmt in ('yml', 'yaml', 'json'):
-                # our loader is safe loader derived.
-                data = yaml.load(fh.read(), Loader=DuplicateKeyCheckLoader)  # nosec nosemgrep
-            else:
-                log.error("The config file must end in .json, .yml or .yaml.")
-                raise ValueError("The config file must end in .json, .yml or .yaml.")
+    options.dryrun = True
+    loaded = map_files(
+        _validate_file, config_files, get_load_workers(options, config_files))
 
-        try:
-            structure.validate(data)
-        except PolicyValidationError as e:
+    for config_file, load in zip(config_files, loaded):
+        fmt = config_file.rsplit('.', 1)[-1]
+        data, structure_error, file_errors = load()
+        if structure_error:
             log.error("Configuration invalid: {}".format(config_file))
-            log.error("%s" % e)
-            errors.append(e)
+            log.error("%s" % structure_error)
+            errors.append(structure_error)
             continue
 
-        load_resources(structure.get_resource_types(data))
-        schm = schema.generate()
-        errors += schema.validate(data, schm)
+        errors += file_errors
         conf_policy_names = {
             p.get('name', 'unknown') for p in data.get('policies', ())}
         dupes = conf_policy_names.intersection(used_policy_names)
@@ -285,8 +304,6 @@ def validate(options):
 
 @policy_command
 def run(options, policies: List[Policy]) -> None:
-    exit_code = 0
-
     # AWS - Sanity check that we have an assumable role before executing policies
     # Todo - move this behind provider interface
     if options.assume_role and [p for p in policies if p.provider_name == 'aws']:
@@ -299,22 +316,34 @@ def run(options, policies: List[Policy]) -> None:
             log.exception("Unable to assume role %s", options.assume_role)
             sys.exit(1)
 
+    # Policies querying the same resources share a single fetch
+    fetch_plan = ResourceFetchPlan(policies)
+    if len(fetch_plan):
+        log.debug("Sharing resource fetches across %d policy groups", len(fetch_plan))
+
     errored_policies: List[str] = []
-    for policy in policies:
+
+    def execute(policy):
         try:
             policy()
         except Exception:
-            exit_code = 2
             errored_policies.append(policy.name)
             if options.debug:
                 raise
             log.exception(
                 "Error while executing policy %s, continuing" % (
                     policy.name))
-    if exit_code != 0:
+
+    run_policies(
+        policies, execute,
+        concurrency=getattr(options, 'policy_concurrency', 1),
+        region_concurrency=getattr(options, 'region_concurrency', 1),
+        fetch_plan=fetch_plan)
+
+    if errored_policies:
         log.error("The following policies had errors while executing\n - %s" % (
             "\n - ".join(errored_policies)))
-        sys.exit(exit_code)
+        sys.exit(2)
 
 
 @policy_command
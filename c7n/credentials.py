@@ -10,7 +10,7 @@ from botocore.session import get_session
 from boto3 import Session
 
 from c7n.version import version
-from c7n.utils import get_retry
+from c7n.utils import get_retry, observe_botocore_retry
 
 
 # we still have some issues (see #5023) to work through to switch to
@@ -32,6 +32,7 @@ class SessionFactory:
             self.session_name = "%s@%s" % (
                 self.session_name, os.environ['C7N_SESSION_SUFFIX'])
         self._subscribers = []
+        self.rate_limiter = None
 
     def _set_policy_name(self, name):
         self.user_agent_name = ("CloudCustodian(%s)" % name).strip()
@@ -53,10 +54,15 @@ class SessionFactory:
     def update(self, session):
         session._session.user_agent_name = self.user_agent_name
         session._session.user_agent_version = version
+        session.events.register(
+            'needs-retry', observe_botocore_retry, unique_id='c7n-retry-observer')
 
         for s in self._subscribers:
             s(session)
 
+        if self.rate_limiter is not None:
+            self.rate_limiter.register(session)
+
         return session
 
     def set_subscribers(self, subscribers):
@@ -10,6 +10,7 @@ from c7n.output import (
     blob_outputs,
     log_outputs,
     metrics_outputs,
+    profiler_outputs,
     sys_stats_outputs,
     tracer_outputs,
 )
@@ -43,6 +44,7 @@ class ExecutionContext:
         # Tracer is wired into core filtering code / which is getting
         # invoked sans execution context entry in tests
         self.tracer = tracer_outputs.select(self.options.tracer, self)
+        self.profiler = profiler_outputs.select(self.options.get('profiler'), self)
 
     def initialize(self):
         self.output = blob_outputs.select(self.options.output_dir, self)
@@ -81,6 +83,7 @@ class ExecutionContext:
 
         self.api_stats.__enter__()
         self.tracer.__enter__()
+        self.profiler.__enter__()
 
         # Api stats and user agent modification by policy require updating
         # in place the cached session thread local.
@@ -92,6 +95,7 @@ class ExecutionContext:
     def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
         if exc_type is not None and self.metrics:
             self.metrics.put_metric('PolicyException', 1, "Count")
+        self.profiler.__exit__(exc_type, exc_value, exc_traceback)
         self.output.write_file('metadata.json', dumps(self.get_metadata(), indent=2))
         self.api_stats.__exit__(exc_type, exc_value, exc_traceback)
 
@@ -112,7 +116,7 @@ class ExecutionContext:
         if os.environ.get('C7N_TEST_RUN'):
             reset_session_cache()
 
-    def get_metadata(self, include=('sys-stats', 'api-stats', 'metrics')):
+    def get_metadata(self, include=('sys-stats', 'api-stats', 'api-profile', 'metrics')):
         t = time.time()
         md = {
             'policy': self.policy.data,
@@ -130,6 +134,8 @@ class ExecutionContext:
             md['sys-stats'] = self.sys_stats.get_metadata()
         if 'api-stats' in include and self.api_stats:
             md['api-stats'] = self.api_stats.get_metadata()
+        if 'api-profile' in include and self.api_stats:
+            md['api-profile'] = self.api_stats.get_profile()
         if 'metrics' in include and self.metrics:
             md['metrics'] = self.metrics.get_metadata()
         return md
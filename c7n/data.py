@@ -125,9 +125,11 @@ class Data(ResourceManager):
         return []
 
     def resources(self):
-        with self.ctx.tracer.subsegment("resource-fetch"):
+        with self.ctx.tracer.subsegment("resource-fetch"), \
+                self.ctx.profiler.section("resource-fetch") as section:
             source = self.get_source()
             resources = list(source)
+            section['out'] = len(resources)
         with self.ctx.tracer.subsegment("filter"):
             resources = self.filter_resources(resources)
         return resources
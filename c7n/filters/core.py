@@ -7,6 +7,7 @@ import copy
 import datetime
 from datetime import timedelta
 import fnmatch
+import functools
 import ipaddress
 import logging
 import operator
@@ -14,7 +15,6 @@ import re
 
 from dateutil.tz import tzutc
 from dateutil.parser import parse
-from distutils import version
 from random import sample
 import jmespath
 
@@ -23,7 +23,7 @@ from c7n.exceptions import PolicyValidationError, PolicyExecutionError
 from c7n.manager import ResourceManager
 from c7n.registry import PluginRegistry
 from c7n.resolver import ValuesFrom
-from c7n.utils import set_annotation, type_schema, parse_cidr, parse_date
+from c7n.utils import LooseVersion, set_annotation, type_schema, parse_cidr, parse_date
 from c7n.manager import iter_filters
 
 
@@ -466,7 +466,7 @@ class AnnotationSweeper:
 
 # The default LooseVersion will fail on comparing present strings, used
 # in the value as shorthand for certain options.
-class ComparableVersion(version.LooseVersion):
+class ComparableVersion(LooseVersion):
     def __eq__(self, other):
         try:
             return super(ComparableVersion, self).__eq__(other)
@@ -474,10 +474,62 @@ class ComparableVersion(version.LooseVersion):
             return False
 
 
+_FIELD_PATH = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*')
+
+
+def _uses_base_resource_value(klass):
+    # whether value extraction is unmodified from the base value filter
+    owners = [c for c in klass.__mro__ if 'get_resource_value' in c.__dict__]
+    return owners[:2] == [ValueFilter, BaseValueFilter]
+
+
+def _normalize_value(value):
+    if isinstance(value, str):
+        return value.strip().lower()
+    return value
+
+
+def _integer_value(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return 0
+
+
+def _size_value(value):
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+def _unique_size_value(value):
+    try:
+        return len(set(value))
+    except TypeError:
+        return 0
+
+
+def _cidr_value(parsed_sentinel, sentinel, value, resource):
+    v = parse_cidr(value)
+    if (isinstance(parsed_sentinel, ipaddress._BaseAddress) and
+            isinstance(v, ipaddress._BaseNetwork)):
+        return v, parsed_sentinel
+    return parsed_sentinel, v
+
+
+def _cidr_size_value(value):
+    cidr = parse_cidr(value)
+    if cidr:
+        return cidr.prefixlen
+    return 0
+
+
 class ValueFilter(BaseValueFilter):
     """Generic value filter using jmespath
     """
     op = v = vtype = None
+    _matcher = _matcher_state = None
 
     schema = {
         'type': 'object',
@@ -634,6 +686,181 @@ class ValueFilter(BaseValueFilter):
         if i is None:
             return False
 
+        # subclasses may vary the key or value between resources
+        state = self._matcher_state
+        if (state is None or state[0] is not self.k or state[1] is not self.v or
+                state[2] is not self.vtype or state[3] is not self.op):
+            self._matcher = self.compile()
+            self._matcher_state = (self.k, self.v, self.vtype, self.op)
+        return self._matcher(i)
+
+    def compile(self):
+        """Return a match function specialized to the current key, value and operator.
+
+        The operator, jmespath expression, regexes and any conversion of
+        the filter value by value type are resolved once, rather than
+        for every resource. Subclasses overriding value extraction or
+        conversion get a matcher calling their methods.
+        """
+        k, sentinel, vtype, op_name = self.k, self.v, self.vtype, self.op
+        get_value = self._compile_value(k)
+        none_as_empty = op_name in ('in', 'not-in')
+        op = self._compile_op(op_name)
+        if op is None:
+            return self._match
+
+        convert = None
+        if type(self).process_value_type is not ValueFilter.process_value_type:
+            pass
+        elif vtype is None:
+            return self._compile_constant(get_value, none_as_empty, sentinel, None, op)
+        elif vtype == 'normalize':
+            convert = _normalize_value
+        elif vtype == 'integer':
+            convert = _integer_value
+        elif vtype == 'size':
+            convert = _size_value
+        elif vtype == 'unique_size':
+            convert = _unique_size_value
+        elif vtype == 'date':
+            sentinel, convert = parse_date(sentinel), parse_date
+        elif vtype == 'cidr_size':
+            convert = _cidr_size_value
+        elif vtype == 'version':
+            sentinel, convert = ComparableVersion(sentinel), ComparableVersion
+        if convert is not None:
+            return self._compile_constant(get_value, none_as_empty, sentinel, convert, op)
+
+        process_value_type = self.process_value_type
+        if vtype == 'cidr' and (
+                type(self).process_value_type is ValueFilter.process_value_type):
+            process_value_type = functools.partial(_cidr_value, parse_cidr(sentinel))
+
+        def match(i):
+            r = get_value(i)
+            if none_as_empty and r is None:
+                r = ()
+            if vtype is not None:
+                v, r = process_value_type(sentinel, r, i)
+            else:
+                v = sentinel
+            if r is None and v == 'absent':
+                return True
+            elif r is not None and v == 'present':
+                return True
+            elif v == 'not-null' and r:
+                return True
+            elif v == 'empty' and not r:
+                return True
+            elif op:
+                try:
+                    return op(r, v)
+                except TypeError:
+                    return False
+            return r == v
+        return match
+
+    def _compile_constant(self, get_value, none_as_empty, v, convert, op):
+        # the filter value doesn't vary per resource, so which of the
+        # special values it is can be determined up front.
+        absent, present, not_null, empty = (
+            v == 'absent', v == 'present', v == 'not-null', v == 'empty')
+
+        def match(i):
+            r = get_value(i)
+            if none_as_empty and r is None:
+                r = ()
+            if convert is not None:
+                r = convert(r)
+            if r is None and absent:
+                return True
+            elif r is not None and present:
+                return True
+            elif not_null and r:
+                return True
+            elif empty and not r:
+                return True
+            elif op:
+                try:
+                    return op(r, v)
+                except TypeError:
+                    return False
+            return r == v
+        return match
+
+    def _compile_op(self, op_name):
+        if not op_name:
+            return False
+        if op_name not in OPERATORS:
+            return None
+        if op_name in ('regex', 'regex-case') and isinstance(self.v, str) and self.vtype is None:
+            try:
+                pattern = re.compile(
+                    self.v, op_name == 'regex' and re.IGNORECASE or 0)
+            except re.error:
+                return OPERATORS[op_name]
+
+            def regex_op(value, regex):
+                if not isinstance(value, str):
+                    return False
+                return bool(pattern.match(value))
+            return regex_op
+        return OPERATORS[op_name]
+
+    def _compile_value(self, k):
+        if not isinstance(k, str) or not _uses_base_resource_value(type(self)):
+            return functools.partial(self.get_resource_value, k)
+
+        if k.startswith('tag:'):
+            tk = k.split(':', 1)[1]
+
+            def get_value(i):
+                if 'Tags' in i:
+                    for t in i.get("Tags", []):
+                        if t.get('Key') == tk:
+                            return t.get('Value')
+                    return None
+                # GCP schema: 'labels': {'key': 'value'}
+                elif 'labels' in i:
+                    return i.get('labels', {}).get(tk, None)
+                # Azure schema: 'tags': {'key': 'value'}
+                elif 'tags' in i:
+                    return i.get('tags', {}).get(tk, None)
+        elif _FIELD_PATH.fullmatch(k):
+            # plain field references don't need a jmespath interpreter
+            path = k.split('.')
+
+            def get_value(i):
+                if k in i:
+                    return i.get(k)
+                for p in path:
+                    if not isinstance(i, dict):
+                        return None
+                    i = i.get(p)
+                return i
+        else:
+            try:
+                expr = self.expr.get(k) or jmespath.compile(k)
+            except jmespath.exceptions.JMESPathError:
+                return functools.partial(self.get_resource_value, k)
+            self.expr[k] = expr
+
+            def get_value(i):
+                if k in i:
+                    return i.get(k)
+                return expr.search(i)
+
+        regex = self.data.get('value_regex')
+        if not regex:
+            return get_value
+        regex = ValueRegex(regex)
+
+        def get_regex_value(i):
+            return regex.get_resource_value(get_value(i))
+        return get_regex_value
+
+    def _match(self, i):
+        """Unspecialized matching, for operators unknown at compile time."""
         # value extract
         r = self.get_resource_value(self.k, i)
         if self.op in ('in', 'not-in') and r is None:
@@ -875,6 +1102,10 @@ class ReduceFilter(BaseValueFilter):
             limit-percent: 10
 
     """
+
+    # selects among the whole set of resources
+    incremental = False
+
     annotate = False
 
     schema = {
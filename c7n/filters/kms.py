@@ -49,10 +49,8 @@ class KmsRelatedFilter(RelatedResourceFilter):
     def get_related(self, resources):
         resource_manager = self.get_resource_manager()
         related_ids = self.get_related_ids(resources)
-        if len(related_ids) < self.FetchThreshold:
-            related = resource_manager.get_resources(list(related_ids))
-        else:
-            related = resource_manager.resources()
+        related = self.get_broker().get_resources(
+            resource_manager, related_ids, self.FetchThreshold)
         related_map = {}
 
         # A resource's key property may point to an explicit ID or a key alias.
@@ -9,6 +9,7 @@ from collections import namedtuple
 from concurrent.futures import as_completed
 from datetime import datetime, timedelta
 
+from c7n.actions.metric import METRIC_UNITS
 from c7n.exceptions import PolicyValidationError
 from c7n.filters.core import Filter, OPERATORS
 from c7n.utils import local_session, type_schema, chunks
@@ -21,8 +22,8 @@ class MetricsFilter(Filter):
 
     Docs on cloud watch metrics
 
-    - GetMetricStatistics
-      https://docs.aws.amazon.com/AmazonCloudWatch/latest/APIReference/API_GetMetricStatistics.html
+    - GetMetricData
+      https://docs.aws.amazon.com/AmazonCloudWatch/latest/APIReference/API_GetMetricData.html
 
     - Supported Metrics
       https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/aws-services-cloudwatch-metrics.html
@@ -67,6 +68,15 @@ class MetricsFilter(Filter):
     policy to treat their request counts as 0.
 
     Note the default statistic for metrics is Average.
+
+    Metrics are retrieved with GetMetricData, batching the queries for
+    up to 500 resources per request. Results are stored in the policy
+    cache, so filters and policies querying the same metric, statistic,
+    dimensions, period and days within the cache period share them.
+
+    GetMetricData doesn't return units, the "unit" key selects the
+    metric's unit. Otherwise the unit of the datapoints is read with a
+    single GetMetricStatistics call for one of the resources.
     """
 
     schema = type_schema(
@@ -86,12 +96,15 @@ class MetricsFilter(Filter):
            'attr-multiplier': {'type': 'number'},
            'percent-attr': {'type': 'string'},
            'missing-value': {'type': 'number'},
+           'unit': {'enum': METRIC_UNITS},
            'required': ('value', 'name')})
     schema_alias = True
-    permissions = ("cloudwatch:GetMetricStatistics",)
+    permissions = ("cloudwatch:GetMetricData", "cloudwatch:GetMetricStatistics")
 
     MAX_QUERY_POINTS = 50850
     MAX_RESULT_POINTS = 1440
+    # metric data queries per GetMetricData request
+    MAX_METRIC_QUERIES = 500
 
     # Default per service, for overloaded services like ec2
     # we do type specific default namespace annotation
@@ -184,6 +197,7 @@ class MetricsFilter(Filter):
         self.model = self.manager.get_model()
         self.op = OPERATORS[self.data.get('op', 'less-than')]
         self.value = self.data['value']
+        self.unit = self.data.get('unit')
 
         ns = self.data.get('namespace')
         if not ns:
@@ -196,7 +210,7 @@ class MetricsFilter(Filter):
         matched = []
         with self.executor_factory(max_workers=3) as w:
             futures = []
-            for resource_set in chunks(resources, 50):
+            for resource_set in chunks(resources, self.MAX_METRIC_QUERIES):
                 futures.append(
                     w.submit(self.process_resource_set, resource_set))
 
@@ -220,42 +234,126 @@ class MetricsFilter(Filter):
             dims.append({'Name': k, 'Value': v})
         return dims
 
+    def get_metric_cache_key(self, dimensions):
+        return {
+            'account': self.manager.account_id,
+            'region': self.manager.config.region,
+            'resource': 'metrics',
+            'q': (self.namespace, self.metric, self.statistics, self.period,
+                  self.days, self.data.get('unit'),
+                  tuple(sorted((d['Name'], d['Value']) for d in dimensions)))}
+
+    def get_metric_statistics_params(self, dimensions):
+        params = dict(
+            Namespace=self.namespace,
+            MetricName=self.metric,
+            StartTime=self.start,
+            EndTime=self.end,
+            Period=self.period,
+            Dimensions=dimensions
+        )
+        stats_key = (self.statistics in self.standard_stats
+                     and 'Statistics' or 'ExtendedStatistics')
+        params[stats_key] = [self.statistics]
+        return params
+
+    def get_metric_unit(self, client, dimensions):
+        """Return the unit of the filter's metric, None if it has no datapoints.
+        """
+        if self.unit is None:
+            datapoints = client.get_metric_statistics(
+                **self.get_metric_statistics_params(dimensions))['Datapoints']
+            if datapoints:
+                self.unit = datapoints[0]['Unit']
+        return self.unit
+
+    def get_metric_data(self, client, dimension_sets):
+        """Return the datapoints of the filter's metric for each set of dimensions.
+
+        Datapoints have the same shape as GetMetricStatistics datapoints,
+        most recent first.
+        """
+        keys = [self.get_metric_cache_key(d) for d in dimension_sets]
+        cache = self.manager._cache
+        with cache:
+            results = cache.get_many(keys)
+
+        queries = {}
+        for idx, (key, dimensions, datapoints) in enumerate(
+                zip(keys, dimension_sets, results)):
+            if datapoints is not None:
+                continue
+            qkey = key['q'][-1]
+            if qkey not in queries:
+                queries[qkey] = ('m%d' % len(queries), dimensions, [])
+            queries[qkey][2].append(idx)
+        if not queries:
+            return results
+
+        values = {qid: [] for qid, _, _ in queries.values()}
+        paginator = client.get_paginator('get_metric_data')
+        for page in paginator.paginate(
+                StartTime=self.start, EndTime=self.end,
+                MetricDataQueries=[{
+                    'Id': qid,
+                    'MetricStat': {
+                        'Metric': {
+                            'Namespace': self.namespace,
+                            'MetricName': self.metric,
+                            'Dimensions': dimensions},
+                        'Period': self.period,
+                        'Stat': self.statistics,
+                        **({'Unit': self.unit} if self.unit else {})},
+                    'ReturnData': True}
+                    for qid, dimensions, _ in queries.values()]):
+            for result in page['MetricDataResults']:
+                values[result['Id']].extend(zip(result['Timestamps'], result['Values']))
+
+        cache_items = []
+        for qid, dimensions, indexes in queries.values():
+            unit = values[qid] and self.get_metric_unit(client, dimensions)
+            datapoints = [
+                {'Timestamp': t, self.statistics: v, 'Unit': unit}
+                for t, v in sorted(values[qid], key=lambda p: p[0], reverse=True)]
+            for idx in indexes:
+                results[idx] = datapoints
+            cache_items.append((keys[indexes[0]], datapoints))
+        with cache:
+            cache.save_many(cache_items)
+        return results
+
     def process_resource_set(self, resource_set):
         client = local_session(
             self.manager.session_factory).client('cloudwatch')
 
-        matched = []
+        # Note this annotation cache is policy scoped, not across
+        # policies, still the lack of full qualification on the key
+        # means multiple filters within a policy using the same metric
+        # across different periods or dimensions would be problematic.
+        key = "%s.%s.%s.%s" % (self.namespace, self.metric, self.statistics, str(self.days))
+
+        pending, dimension_sets = [], []
         for r in resource_set:
+            collected_metrics = r.setdefault('c7n.metrics', {})
+            if key in collected_metrics:
+                continue
             # if we overload dimensions with multiple resources we get
             # the statistics/average over those resources.
             dimensions = self.get_dimensions(r)
             # Merge in any filter specified metrics, get_dimensions is
             # commonly overridden so we can't do it there.
             dimensions.extend(self.get_user_dimensions())
+            pending.append(r)
+            dimension_sets.append(dimensions)
 
-            collected_metrics = r.setdefault('c7n.metrics', {})
-            # Note this annotation cache is policy scoped, not across
-            # policies, still the lack of full qualification on the key
-            # means multiple filters within a policy using the same metric
-            # across different periods or dimensions would be problematic.
-            key = "%s.%s.%s.%s" % (self.namespace, self.metric, self.statistics, str(self.days))
-
-            params = dict(
-                Namespace=self.namespace,
-                MetricName=self.metric,
-                StartTime=self.start,
-                EndTime=self.end,
-                Period=self.period,
-                Dimensions=dimensions
-            )
-
-            stats_key = (self.statistics in self.standard_stats
-                         and 'Statistics' or 'ExtendedStatistics')
-            params[stats_key] = [self.statistics]
-
-            if key not in collected_metrics:
-                collected_metrics[key] = client.get_metric_statistics(
-                    **params)['Datapoints']
+        if pending:
+            for r, datapoints in zip(
+                    pending, self.get_metric_data(client, dimension_sets)):
+                r['c7n.metrics'][key] = list(datapoints)
+
+        matched = []
+        for r in resource_set:
+            collected_metrics = r['c7n.metrics']
 
             # In certain cases CloudWatch reports no data for a metric.
             # If the policy specifies a fill value for missing data, add
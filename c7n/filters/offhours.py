@@ -251,6 +251,7 @@ might look like:
 import datetime
 import logging
 from os.path import join
+import threading
 
 from dateutil import zoneinfo, tz as tzutil
 
@@ -270,6 +271,62 @@ def parens_removed(u):
     return u.translate({ord('('): None, ord(')'): None})
 
 
+class TimezoneAliases(dict):
+    """Timezone aliases, extended with the lower cased names of tz database
+    zones which aren't title case.
+
+    Reading the tz database is deferred to the first lookup, as its
+    relatively expensive and most policies don't use time filters.
+    """
+
+    loaded = False
+    lock = threading.Lock()
+
+    def load(self):
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            aliases = set(dict.keys(self))
+            for z in zoneinfo.get_zonefile_instance().zones:
+                if z.title() != z and z.lower() not in aliases:
+                    dict.__setitem__(self, z.lower(), z)
+            self.loaded = True
+
+    def get(self, key, default=None):
+        self.load()
+        return dict.get(self, key, default)
+
+    def __getitem__(self, key):
+        self.load()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self.load()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self.load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.load()
+        return dict.__len__(self)
+
+    def keys(self):
+        self.load()
+        return dict.keys(self)
+
+    def items(self):
+        self.load()
+        return dict.items(self)
+
+    def values(self):
+        self.load()
+        return dict.values(self)
+
+
 class Time(Filter):
     """
     Schedule offhours for resources see :ref:`offhours <offhours>`
@@ -292,12 +349,14 @@ class Time(Filter):
     }
     schema_alias = True
     time_type = None
+    # verdicts change with the hour rather than the resource
+    incremental = False
 
     # Defaults and constants
     DEFAULT_TAG = "maid_offhours"
     DEFAULT_TZ = 'et'
 
-    TZ_ALIASES = {
+    TZ_ALIASES = TimezoneAliases({
         'pdt': 'America/Los_Angeles',
         'pt': 'America/Los_Angeles',
         'pst': 'America/Los_Angeles',
@@ -326,18 +385,11 @@ class Time(Filter):
         'brt': 'America/Sao_Paulo',
         'nzst': 'Pacific/Auckland',
         'utc': 'Etc/UTC',
-    }
+    })
     TAG_RESTRICTIONS = ["(", ")", "[", "]", ",", ";", "=", "/"]
     # mapping to ['u28', 'u29', 'u5b', 'u5d', 'u2c', 'u3b', 'u3d', 'u2f']
     TAG_RESTRICTIONS_ESCAPE = ["u" + hex(ord(c))[2:] for c in TAG_RESTRICTIONS]
 
-    z_names = list(zoneinfo.get_zonefile_instance().zones)
-    non_title_case_zones = (
-        lambda aliases=TZ_ALIASES.keys(), z_names=z_names:
-        {z.lower(): z for z in z_names
-            if z.title() != z and z.lower() not in aliases})()
-    TZ_ALIASES.update(non_title_case_zones)
-
     def __init__(self, data, manager=None):
         super(Time, self).__init__(data, manager)
         self.default_tz = self.data.get('default_tz', self.DEFAULT_TZ)
@@ -1,11 +1,187 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import importlib
+import math
+import threading
+import time
 
 import jmespath
 
 from .core import ValueFilter, OPERATORS
 from c7n.query import ChildResourceQuery
+from c7n.utils import chunks
+
+
+class RelatedResourceBroker:
+    """Run scoped fetching of related resources.
+
+    Filters on related resources (security groups, subnets, vpcs, kms
+    keys, etc) commonly reference the same resources across filters
+    and policies. The broker remembers the related resources fetched
+    per type, so each is only fetched once per run. A full sweep of a
+    type satisfies any later lookup of that type.
+
+    For ids not already known, a point lookup by id is compared against
+    a full sweep by estimated api calls, using the type's population
+    size from a previous sweep or from the cache. Without a known
+    population, the filter's fetch threshold decides.
+
+    With caching enabled, a broker is shared by every policy in the
+    account and region for the cache period, expired brokers are
+    evicted along with their populations. Otherwise it's scoped to a
+    single policy execution. Either way resources are returned as
+    copies, so annotations made by one filter don't leak into another.
+    """
+
+    # ids per point lookup, for resources supporting a list of ids
+    lookup_batch_size = 200
+    # estimated resources returned per page of a full sweep
+    scan_page_size = 100
+
+    # (account id, region) -> (expiry, broker)
+    brokers = {}
+    brokers_lock = threading.Lock()
+    # (account id, region, resource type) -> population from the last sweep
+    populations = {}
+    # populations kept, least recently swept are dropped first
+    populations_max = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (resource type, source) -> related type state
+        self.types = {}
+        # (resource class, region, profile, role, external id) -> resource manager
+        self.managers = {}
+
+    @classmethod
+    def get(cls, manager):
+        config = manager.config
+        if config.cache and config.cache_period:
+            key = (manager.account_id, config.region)
+            now = time.time()
+            with cls.brokers_lock:
+                for bkey, (expiry, _) in list(cls.brokers.items()):
+                    if expiry < now:
+                        cls.evict(bkey)
+                if key not in cls.brokers:
+                    cls.brokers[key] = (now + config.cache_period * 60, cls())
+                return cls.brokers[key][1]
+        ctx = manager.ctx
+        broker = getattr(ctx, 'related_broker', None)
+        if broker is None or broker.execution_id != ctx.execution_id:
+            broker = ctx.related_broker = cls()
+            broker.execution_id = ctx.execution_id
+        return broker
+
+    @classmethod
+    def evict(cls, key):
+        """Drop a shared broker and the populations of its account and region."""
+        cls.brokers.pop(key, None)
+        for pkey in [k for k in cls.populations if k[:2] == key]:
+            cls.populations.pop(pkey, None)
+
+    @classmethod
+    def set_population(cls, key, count):
+        with cls.brokers_lock:
+            cls.populations.pop(key, None)
+            cls.populations[key] = count
+            while len(cls.populations) > cls.populations_max:
+                cls.populations.pop(next(iter(cls.populations)))
+
+    def get_manager(self, manager, resource_class):
+        """Return the manager of a related resource class for the given manager's session.
+
+        Managers are shared by policies using the same session settings,
+        and built with the execution context of the first.
+        """
+        config = manager.config
+        key = (resource_class, config.region, getattr(config, 'profile', None),
+               getattr(config, 'assume_role', None), getattr(config, 'external_id', None))
+        with self.lock:
+            if key not in self.managers:
+                mod_path, class_name = resource_class.rsplit('.', 1)
+                module = importlib.import_module(mod_path)
+                self.managers[key] = getattr(module, class_name)(manager.ctx, {})
+            return self.managers[key]
+
+    def get_type(self, manager):
+        key = (manager.type, manager.source_type)
+        with self.lock:
+            if key not in self.types:
+                self.types[key] = {
+                    'lock': threading.Lock(), 'resources': {}, 'complete': False}
+            return self.types[key]
+
+    def get_population(self, manager):
+        """Return the estimated number of resources of a type, if known."""
+        key = (manager.account_id, manager.config.region, manager.type)
+        if key in self.populations:
+            return self.populations[key]
+        get_cache_key = getattr(manager, 'get_cache_key', None)
+        if get_cache_key is None:
+            return None
+        with manager._cache:
+            manifest = manager._cache.get(get_cache_key(None))
+        if isinstance(manifest, dict):
+            return len(manifest['ids'])
+        elif isinstance(manifest, list):
+            return len(manifest)
+
+    def use_sweep(self, manager, count, threshold):
+        """Whether fetching all resources of a type is cheaper than fetching count by id."""
+        population = self.get_population(manager)
+        if population is None:
+            return count >= threshold
+        m = manager.get_model()
+        if m.filter_name and m.filter_type == 'list':
+            lookups = math.ceil(count / self.lookup_batch_size)
+        else:
+            lookups = count
+        sweeps = math.ceil(population / self.scan_page_size)
+        # per resource detail calls apply to every resource swept
+        if getattr(m, 'detail_spec', None):
+            lookups += count
+            sweeps += population
+        return sweeps <= lookups
+
+    def get_resources(self, manager, ids, threshold):
+        """Return the related resources with the given ids."""
+        ids = set(ids)
+        rtype = self.get_type(manager)
+        model = manager.get_model()
+        with rtype['lock']:
+            known = rtype['resources']
+            missing = [i for i in ids if i not in known]
+            if not missing or rtype['complete']:
+                return [dict(known[i]) for i in ids if i in known]
+            if self.use_sweep(manager, len(missing), threshold):
+                return [dict(r) for r in self._sweep(manager, rtype) if r[model.id] in ids]
+            if model.filter_name and model.filter_type == 'list':
+                fetched = []
+                for id_set in chunks(missing, self.lookup_batch_size):
+                    fetched.extend(manager.get_resources(id_set))
+            else:
+                fetched = manager.get_resources(missing)
+            for r in fetched:
+                known[r[model.id]] = r
+            return [dict(known[i]) for i in ids if i in known]
+
+    def get_all(self, manager):
+        """Return all resources of the related type."""
+        rtype = self.get_type(manager)
+        with rtype['lock']:
+            if not rtype['complete']:
+                self._sweep(manager, rtype)
+            return [dict(r) for r in rtype['resources'].values()]
+
+    def _sweep(self, manager, rtype):
+        resources = manager.resources()
+        model = manager.get_model()
+        rtype['resources'] = {r[model.id]: r for r in resources}
+        rtype['complete'] = True
+        self.set_population(
+            (manager.account_id, manager.config.region, manager.type), len(resources))
+        return resources
 
 
 class RelatedResourceFilter(ValueFilter):
@@ -42,18 +218,18 @@ class RelatedResourceFilter(ValueFilter):
         resource_manager = self.get_resource_manager()
         related_ids = self.get_related_ids(resources)
         model = resource_manager.get_model()
-        if len(related_ids) < self.FetchThreshold:
-            related = resource_manager.get_resources(list(related_ids))
-        else:
-            related = resource_manager.resources()
+        related = self.get_broker().get_resources(
+            resource_manager, related_ids, self.FetchThreshold)
         return {r[model.id]: r for r in related
                 if r[model.id] in related_ids}
 
+    def get_broker(self):
+        return RelatedResourceBroker.get(self.manager)
+
     def get_resource_manager(self):
-        mod_path, class_name = self.RelatedResource.rsplit('.', 1)
-        module = importlib.import_module(mod_path)
-        manager_class = getattr(module, class_name)
-        return manager_class(self.manager.ctx, {})
+        # also borrowed by filters that aren't related resource filters.
+        return RelatedResourceBroker.get(self.manager).get_manager(
+            self.manager, self.RelatedResource)
 
     def process_resource(self, resource, related):
         related_ids = self.get_related_ids([resource])
@@ -121,7 +297,7 @@ class RelatedResourceByIdFilter(RelatedResourceFilter):
         related_ids = self.get_related_ids(resources)
 
         related = {}
-        for r in resource_manager.resources():
+        for r in self.get_broker().get_all(resource_manager):
             matched_vpc = self.get_related_by_ids(r) & related_ids
             if matched_vpc:
                 for vpc in matched_vpc:
@@ -1,11 +1,6 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 
-try:
-    from functools import lru_cache
-except ImportError:
-    from backports.functools_lru_cache import lru_cache
-
 import logging
 import re
 import os
@@ -69,13 +64,10 @@ class SchemaValidator:
         self.schema = v.schema
         return self.validator
 
-    @lru_cache(maxsize=32)
     def _gen_schema(self, resource_types):
         if schema is None:
             raise RuntimeError("missing jsonschema dependency")
-        rt_schema = schema.generate(resource_types)
-        schema.JsonSchemaValidator.check_schema(rt_schema)
-        return schema.JsonSchemaValidator(rt_schema)
+        return schema.get_validator(resource_types)
 
 
 class PolicyLoader:
@@ -187,8 +179,7 @@ class DirectoryLoader(PolicyLoader):
                 return errors
             rtypes = structure.get_resource_types(data)
             load_resources(rtypes)
-            schm = schema.generate(rtypes)
-            errors += schema.validate(data, schm)
+            errors += schema.validate(data, resource_types=rtypes)
             return errors
 
         def _load(path, raw_policies, errors, do_validate):
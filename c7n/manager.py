@@ -108,8 +108,10 @@ class ResourceManager:
                 break
             rcount = len(resources)
 
-            with self.ctx.tracer.subsegment("filter:%s" % f.type):
+            with self.ctx.tracer.subsegment("filter:%s" % f.type), \
+                    self.ctx.profiler.section("filter:%s" % f.type, rcount) as section:
                 resources = f.process(resources, event)
+                section['out'] = len(resources)
 
             if event and event.get('debug', False):
                 self.log.debug(
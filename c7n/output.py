@@ -8,12 +8,18 @@ See docs/usage/outputs.rst
 
 """
 import contextlib
+import contextvars
+import cProfile
 import datetime
 import gzip
+import io
 import logging
 import os
+import pstats
 import shutil
+import sys
 import tempfile
+import threading
 import time
 import uuid
 
@@ -21,7 +27,7 @@ from abc import ABC, abstractmethod
 
 from c7n.exceptions import InvalidOutputConfig
 from c7n.registry import PluginRegistry
-from c7n.utils import parse_url_config, join_output_path
+from c7n.utils import dumps, parse_url_config, join_output_path, write_records
 
 try:
     import psutil
@@ -82,6 +88,7 @@ log_outputs = LogOutputRegistry('c7n.output.logs')
 metrics_outputs = MetricsRegistry('c7n.output.metrics')
 tracer_outputs = OutputRegistry('c7n.output.tracer')
 sys_stats_outputs = OutputRegistry('c7n.output.sys_stats')
+profiler_outputs = OutputRegistry('c7n.output.profiler')
 
 
 @tracer_outputs.register('default')
@@ -109,6 +116,153 @@ class NullTracer:
         """
 
 
+@profiler_outputs.register('default')
+class NullProfiler:
+    """Profiling records where the time of a policy execution is spent.
+
+    Sections of the execution (resource fetch, augment, each filter and
+    action) are recorded with their resource counts.
+    """
+    def __init__(self, ctx, config=None):
+        self.ctx = ctx
+        self.config = config or {}
+
+    @contextlib.contextmanager
+    def section(self, name, count=None):
+        """Record a named section as a context manager.
+
+        Yields a dictionary, on which the count of resources the section
+        returned can be set as `out`.
+        """
+        yield {}
+
+    def __enter__(self):
+        """Start profiling a policy execution.
+        """
+
+    def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
+        """Stop profiling and write the profile to the policy output.
+        """
+
+
+@profiler_outputs.register('timing')
+class TimingProfiler(NullProfiler):
+    """Write a breakdown of a policy execution's sections to profile.json.
+    """
+    def __init__(self, ctx, config=None):
+        super().__init__(ctx, config)
+        self.start = None
+        self.sections = []
+
+    @contextlib.contextmanager
+    def section(self, name, count=None):
+        started = time.time()
+        record = {'name': name, 'offset': started - (self.start or started),
+                  'in': count, 'out': None}
+        self.sections.append(record)
+        try:
+            yield record
+        finally:
+            record['duration'] = time.time() - started
+
+    def get_profile(self):
+        return {'duration': time.time() - self.start, 'sections': self.sections}
+
+    def __enter__(self):
+        self.start = time.time()
+        self.sections = []
+
+    def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
+        self.ctx.output.write_file('profile.json', dumps(self.get_profile(), indent=2))
+
+
+@profiler_outputs.register('cprofile')
+class CProfiler(TimingProfiler):
+    """Also profile the policy's thread with cProfile.
+
+    Writes a report of the slowest functions by cumulative time to
+    profile.txt, and the raw stats to profile.prof when the output
+    is a directory.
+    """
+    def __init__(self, ctx, config=None):
+        super().__init__(ctx, config)
+        self.profile = None
+
+    def __enter__(self):
+        super().__enter__()
+        self.profile = cProfile.Profile()
+        try:
+            self.profile.enable()
+        except ValueError as e:
+            # only one profiler may be active at a time on recent pythons
+            log.warning("cprofile unavailable: %s", e)
+            self.profile = None
+
+    def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
+        super().__exit__(exc_type, exc_value, exc_traceback)
+        if self.profile is None:
+            return
+        self.profile.disable()
+        report = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=report)
+        stats.sort_stats('cumulative').print_stats(int(self.config.get('limit', 50)))
+        self.ctx.output.write_file('profile.txt', report.getvalue())
+        if os.path.isdir(getattr(self.ctx.output, 'root_dir', None) or ''):
+            stats.dump_stats(os.path.join(self.ctx.output.root_dir, 'profile.prof'))
+        self.profile = None
+
+
+@profiler_outputs.register('sample')
+class SamplingProfiler(TimingProfiler):
+    """Also sample the stacks of all threads while the policy executes.
+
+    Writes the samples to profile.collapsed in the collapsed stack
+    format consumed by flamegraph tools, one line per distinct stack
+    rooted at its thread name. Threads of concurrently executing
+    policies are included as well.
+    """
+    def __init__(self, ctx, config=None):
+        super().__init__(ctx, config)
+        self.interval = float(self.config.get('interval', 0.005))
+        self.stacks = {}
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    def sample(self):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident():
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("%s (%s:%d)" % (
+                    code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        super().__enter__()
+        self.stacks = {}
+        self.stopped.clear()
+        self.sampler = threading.Thread(
+            target=self.run, name='c7n-profile-sampler', daemon=True)
+        self.sampler.start()
+
+    def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
+        self.stopped.set()
+        self.sampler.join()
+        super().__exit__(exc_type, exc_value, exc_traceback)
+        self.ctx.output.write_file('profile.collapsed', "".join(
+            "%s %d\n" % (k, v) for k, v in sorted(self.stacks.items())))
+
+
 class DeltaStats:
     """Capture stats (dictionary of string->integer) as a stack.
 
@@ -168,6 +322,11 @@ class NullStats:
         """
         return {}
 
+    def get_profile(self):
+        """Return detailed statistics (latency, retries, etc) per api operation.
+        """
+        return {}
+
     def __enter__(self):
         """Push a snapshot
         """
@@ -314,6 +473,26 @@ class LogMetrics(Metrics):
         return res
 
 
+# log output of the policy executing in the current context
+policy_log = contextvars.ContextVar('c7n_policy_log', default=None)
+
+
+class PolicyLogFilter(logging.Filter):
+    """Only pass log records emitted while executing the log output's policy.
+
+    Used to keep policy log outputs separate when policies are
+    executing concurrently. Work submitted to a c7n.executor thread
+    pool is attributed to the policy which submitted it.
+    """
+
+    def __init__(self, log_output):
+        super().__init__()
+        self.log_output = log_output
+
+    def filter(self, record):
+        return policy_log.get() is self.log_output
+
+
 class LogOutput:
 
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -322,6 +501,7 @@ class LogOutput:
         self.ctx = ctx
         self.config = config or {}
         self.handler = None
+        self.context_token = None
 
     def get_handler(self):
         raise NotImplementedError()
@@ -342,6 +522,11 @@ class LogOutput:
             return
         self.handler.setLevel(logging.DEBUG)
         self.handler.setFormatter(logging.Formatter(self.log_format))
+        options = getattr(self.ctx, 'options', None)
+        if max(getattr(options, 'policy_concurrency', None) or 1,
+               getattr(options, 'region_concurrency', None) or 1) > 1:
+            self.context_token = policy_log.set(self)
+            self.handler.addFilter(PolicyLogFilter(self))
         mlog = logging.getLogger('custodian')
         mlog.addHandler(self.handler)
 
@@ -352,6 +537,9 @@ class LogOutput:
         mlog.removeHandler(self.handler)
         self.handler.flush()
         self.handler.close()
+        if self.context_token is not None:
+            policy_log.reset(self.context_token)
+            self.context_token = None
 
 
 @log_outputs.register('default')
@@ -408,6 +596,30 @@ class OutputFileHandler(ABC):
         "Write a file at the relative path specified with the value as the content."
         raise NotImplementedError()
 
+    @contextlib.contextmanager
+    def open_file(self, rel_path, compress=False):
+        """Open a text file at the relative path for incremental writes.
+
+        Handlers without native support buffer the content in memory
+        and write it on close.
+        """
+        buf = io.StringIO()
+        yield buf
+        self.write_file(rel_path, buf.getvalue())
+
+    def write_resources(self, resources):
+        """Write a policy's resources, serializing them incrementally.
+
+        The format is a json array (resources.json) by default or
+        json lines (resources.jsonl) with the output_format option.
+        """
+        options = self.ctx.options
+        lines = options.get('output_format') == 'jsonl'
+        with self.open_file(
+                lines and 'resources.jsonl' or 'resources.json',
+                compress=bool(options.get('output_compress'))) as fh:
+            write_records(fh, resources, lines=lines)
+
 
 @blob_outputs.register('null')
 class NullBlobOutput(OutputFileHandler):
@@ -430,6 +642,12 @@ class NullBlobOutput(OutputFileHandler):
     def write_file(self, rel_path, value):
         "A no-op for the null handler."
 
+    @contextlib.contextmanager
+    def open_file(self, rel_path, compress=False):
+        "Discards content for the null handler."
+        with open(os.devnull, 'w') as fh:
+            yield fh
+
 
 @blob_outputs.register('file')
 @blob_outputs.register('default')
@@ -459,14 +677,26 @@ class DirectoryOutput(OutputFileHandler):
         return "<%s to dir:%s>" % (self.__class__.__name__, self.root_dir)
 
     def write_file(self, rel_path, value):
-        with open(os.path.join(self.root_dir, rel_path), 'w') as fh:
+        with open(os.path.join(self.root_dir, rel_path), 'w', encoding='utf8') as fh:
             fh.write(value)
 
+    @contextlib.contextmanager
+    def open_file(self, rel_path, compress=False):
+        path = os.path.join(self.root_dir, rel_path)
+        if compress:
+            fh = gzip.open(path + ".gz", "wt", compresslevel=7, encoding='utf8')
+        else:
+            fh = open(path, 'w', encoding='utf8')
+        with fh:
+            yield fh
+
     def compress(self):
         # Compress files individually so thats easy to walk them, without
         # downloading tar and extracting.
         for root, dirs, files in os.walk(self.root_dir):
             for f in files:
+                if f.endswith(".gz"):
+                    continue
                 fp = os.path.join(root, f)
                 with gzip.open(fp + ".gz", "wb", compresslevel=7) as zfh:
                     with open(fp, "rb") as sfh:
@@ -518,6 +748,11 @@ class BlobOutput(DirectoryOutput):
             )
         return output_url.format(**self.get_output_vars()).rstrip('/')
 
+    def open_file(self, rel_path, compress=True):
+        # blob outputs are always compressed on upload, so write
+        # compressed to avoid another pass.
+        return super().open_file(rel_path, compress=True)
+
     def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
         self.log.debug("%s: uploading policy logs", self.type)
         self.compress()
@@ -1,8 +1,10 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+from concurrent.futures import as_completed
 from datetime import datetime
 import json
 import fnmatch
+import functools
 import itertools
 import logging
 import os
@@ -14,28 +16,29 @@ import jmespath
 
 from c7n.cwe import CloudWatchEvents
 from c7n.ctx import ExecutionContext
+from c7n.executor import ProcessPoolExecutor, ThreadPoolExecutor
 from c7n.exceptions import PolicyValidationError, ClientError, ResourceLimitExceeded
 from c7n.filters import FilterRegistry, And, Or, Not
 from c7n.manager import iter_filters
 from c7n.output import DEFAULT_NAMESPACE
 from c7n.resources import load_resources
+from c7n.structure import StructureParser
 from c7n.registry import PluginRegistry
 from c7n.provider import clouds, get_resource_class
-from c7n import deprecated, utils
+from c7n import cache, deprecated, utils
 from c7n.version import version
-from c7n.query import RetryPageIterator
+from c7n.query import QueryResourceManager, RetryPageIterator
 from c7n.varfmt import VarFormat
 from c7n.utils import get_policy_provider
 
 log = logging.getLogger('c7n.policy')
 
 
-def load(options, path, format=None, validate=True, vars=None):
+def load(options, path, format=None, validate=True, vars=None, cache=False):
     # should we do os.path.expanduser here?
     if not os.path.exists(path):
         raise IOError("Invalid path for config %r" % path)
 
-    from c7n.schema import validate as schema_validate, StructureParser
     if os.path.isdir(path):
         from c7n.loader import DirectoryLoader
         collection = DirectoryLoader(options).load_directory(path, validate)
@@ -43,6 +46,17 @@ def load(options, path, format=None, validate=True, vars=None):
             [p.validate() for p in collection]
         return collection
 
+    data = load_data(path, format=format, validate=validate, vars=vars, cache=cache)
+    return load_collection(options, data, validate)
+
+
+def load_data(path, format=None, validate=True, vars=None, cache=False):
+    """Parse and schema validate a policy file, returning its data.
+
+    With cache, data which validated on a previous run is not validated
+    again, see :func:`c7n.schema.validate_cached`.
+    """
+    from c7n.schema import validate as schema_validate, validate_cached
     if os.path.isfile(path):
         data = utils.load_file(path, format=format, vars=vars)
 
@@ -56,12 +70,16 @@ def load(options, path, format=None, validate=True, vars=None):
         return None
 
     if validate:
-        errors = schema_validate(data, resource_types=rtypes)
+        errors = (validate_cached if cache else schema_validate)(
+            data, resource_types=rtypes)
         if errors:
             raise PolicyValidationError(
                 "Failed to validate policy %s \n %s" % (
                     errors[1], errors[0]))
+    return data
+
 
+def load_collection(options, data, validate=True):
     # Test for empty policy file
     if not data or data.get('policies') is None:
         return None
@@ -73,6 +91,57 @@ def load(options, path, format=None, validate=True, vars=None):
     return collection
 
 
+# below this many files, loading serially is quicker than starting a pool
+LOAD_POOL_MIN_FILES = 4
+
+
+def get_load_workers(options, files):
+    workers = getattr(options, 'load_workers', None)
+    if workers is None:
+        workers = len(files) >= LOAD_POOL_MIN_FILES and os.cpu_count() or 1
+    return min(workers, len(files))
+
+
+def map_files(func, files, workers=1, **kw):
+    """Call func on each file, in a process pool given several workers.
+
+    Returns a callable per file which returns func's result or raises
+    its error, so callers can handle failures per file and in order.
+    """
+    if workers <= 1:
+        return [functools.partial(func, f, **kw) for f in files]
+    with ProcessPoolExecutor(max_workers=workers) as w:
+        futures = [w.submit(func, f, **kw) for f in files]
+    return [f.result for f in futures]
+
+
+def load_files(options, paths, validate=True, vars=None):
+    """Load a collection from each of the given policy files or directories.
+
+    Files are parsed and schema validated in a process pool when there
+    are several of them, see :func:`map_files`. Files which validated on
+    a previous run skip schema validation.
+    """
+    files = list(dict.fromkeys(p for p in paths if os.path.isfile(p)))
+    workers = get_load_workers(options, files)
+    if workers <= 1:
+        return [functools.partial(
+            load, options, p, validate=validate, vars=vars, cache=True) for p in paths]
+    results = dict(zip(files, map_files(
+        load_data, files, workers, validate=validate, vars=vars, cache=True)))
+
+    def _load(path):
+        if path not in results:
+            return load(options, path, validate=validate, vars=vars, cache=True)
+        data = results[path]()
+        if data:
+            # the pool loaded the file's resources in another process
+            load_resources(StructureParser().get_resource_types(data))
+        return load_collection(options, data, validate)
+
+    return [functools.partial(_load, p) for p in paths]
+
+
 class PolicyCollection:
 
     log = logging.getLogger('c7n.policies')
@@ -216,6 +285,140 @@ class PolicyCollection:
         return None
 
 
+class ResourceFetchPlan:
+    """Share resource fetches between the policies of a run.
+
+    Pull mode policies that enumerate the same resource type, source and
+    query within the same account and region are grouped. The first
+    policy in a group to execute fetches and augments the resources, the
+    remaining members are served a copy from memory. A group's resources
+    are released once its last member has executed.
+
+    Policy execution order is preserved. Groups are formed regardless of
+    the cache settings, the in memory store only lives for the run, so
+    sharing a fetch is no staler than executing the group's policies
+    back to back.
+    """
+
+    def __init__(self, policies):
+        self.stores = {}
+        self.pending = {}
+        self.policy_keys = {}
+
+        groups = {}
+        for p in policies:
+            key = self.get_group_key(p)
+            if key is not None:
+                groups.setdefault(key, []).append(p)
+
+        for key, members in groups.items():
+            if len(members) < 2:
+                continue
+            store = self.stores[key] = {}
+            self.pending[key] = len(members)
+            for p in members:
+                self.policy_keys[p] = key
+                rm = p.resource_manager
+                rm._cache = cache.SharedResourceCache(rm.config, rm._cache, store)
+
+    def __len__(self):
+        return len(self.pending)
+
+    @staticmethod
+    def get_group_key(policy):
+        if not policy.options.dryrun and policy.execution_mode != 'pull':
+            return None
+        rm = policy.resource_manager
+        if not isinstance(rm, QueryResourceManager):
+            return None
+        return cache.encode(rm.get_cache_key(rm.data.get('query')))
+
+    def get_lanes(self, policies):
+        """Partition policies into lanes of sequential execution.
+
+        Members of a fetch group share a lane, in their original order,
+        so that a single fetch still serves the group.
+        """
+        lanes, group_lanes = [], {}
+        for p in policies:
+            key = self.policy_keys.get(p)
+            if key is None:
+                lanes.append([p])
+            elif key in group_lanes:
+                group_lanes[key].append(p)
+            else:
+                group_lanes[key] = [p]
+                lanes.append(group_lanes[key])
+        return lanes
+
+    def release(self, policy):
+        """Mark a policy as executed, releasing its group's resources when done."""
+        key = self.policy_keys.pop(policy, None)
+        if key is None:
+            return
+        self.pending[key] -= 1
+        if self.pending[key] == 0:
+            self.pending.pop(key)
+            self.stores.pop(key)
+
+
+def run_policies(policies, execute, concurrency=1, fetch_plan=None, region_concurrency=1):
+    """Execute a set of policies, optionally running pull policies concurrently.
+
+    `execute` is called with each policy and is responsible for the
+    policy's error handling, any exception it raises is propagated.
+
+    With a concurrency above one, pull mode policies are executed on a
+    thread pool in lanes (see :meth:`ResourceFetchPlan.get_lanes`), any
+    other policies (ie. serverless provisioning) are executed serially
+    beforehand on the calling thread.
+
+    With a region concurrency above one, the pull mode policies of
+    several regions are executed at once, each region's per the policy
+    concurrency. A region's policies share a thread, and so its
+    sessions, when executed serially.
+    """
+    if fetch_plan is None:
+        fetch_plan = ResourceFetchPlan(())
+
+    def run_lane(lane):
+        for p in lane:
+            try:
+                execute(p)
+            finally:
+                fetch_plan.release(p)
+
+    if concurrency < 2 and region_concurrency < 2:
+        return run_lane(policies)
+
+    pull_policies = []
+    for p in policies:
+        if p.options.dryrun or p.execution_mode == 'pull':
+            pull_policies.append(p)
+        else:
+            run_lane([p])
+
+    def run_region(region_policies):
+        if concurrency < 2:
+            return run_lane(region_policies)
+        with ThreadPoolExecutor(max_workers=concurrency) as w:
+            futures = [w.submit(run_lane, lane)
+                       for lane in fetch_plan.get_lanes(region_policies)]
+            for f in as_completed(futures):
+                f.result()
+
+    regions = {}
+    for p in pull_policies:
+        regions.setdefault(region_concurrency > 1 and p.options.region, []).append(p)
+    if len(regions) < 2:
+        return run_region(pull_policies)
+
+    with ThreadPoolExecutor(max_workers=region_concurrency) as w:
+        futures = [w.submit(run_region, rp) for rp in regions.values()]
+        for f in as_completed(futures):
+            f.result()
+
+
 class PolicyExecutionMode:
     """Policy execution semantics"""
 
@@ -349,7 +552,7 @@ class PullMode(PolicyExecutionMode):
                 "ResourceCount", len(resources), "Count", Scope="Policy"
             )
             ctx.metrics.put_metric("ResourceTime", rt, "Seconds", Scope="Policy")
-            ctx.output.write_file('resources.json', utils.dumps(resources, indent=2))
+            ctx.output.write_resources(resources)
 
             if not resources:
                 return []
@@ -361,7 +564,8 @@ class PullMode(PolicyExecutionMode):
             at = time.time()
             for a in self.policy.resource_manager.actions:
                 s = time.time()
-                with ctx.tracer.subsegment('action:%s' % a.type):
+                with ctx.tracer.subsegment('action:%s' % a.type), \
+                        ctx.profiler.section('action:%s' % a.type, len(resources)):
                     results = a.process(resources)
                 self.policy.log.info(
                     "policy:%s action:%s"
@@ -539,7 +743,7 @@ class LambdaMode(ServerlessExecutionMode):
                     "Invoking actions %s", self.policy.resource_manager.actions
                 )
 
-            ctx.output.write_file('resources.json', utils.dumps(resources, indent=2))
+            ctx.output.write_resources(resources)
 
             for action in self.policy.resource_manager.actions:
                 self.policy.log.info(
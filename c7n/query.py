@@ -7,21 +7,28 @@ tags_spec -> s3, elb, rds
 """
 from concurrent.futures import as_completed
 import functools
+import hashlib
 import itertools
 import json
+import re
+import threading
+import time
 from typing import List
 
 import jmespath
 import os
 
+from c7n import cache
 from c7n.actions import ActionRegistry
 from c7n.exceptions import ClientError, ResourceLimitExceeded, PolicyExecutionError
 from c7n.filters import FilterRegistry, MetricsFilter
+from c7n.filters.core import BooleanGroupFilter, EventFilter, ValueFilter
 from c7n.manager import ResourceManager
 from c7n.registry import PluginRegistry
 from c7n.tags import register_ec2_tags, register_universal_tags, universal_augment
 from c7n.utils import (
-    local_session, generate_arn, get_retry, chunks, camelResource)
+    local_session, generate_arn, get_retry, chunks, camelResource, loads, observe_retries)
+from c7n.version import version
 
 
 try:
@@ -264,17 +271,27 @@ class DescribeSource:
             _augment = _batch_augment
         else:
             return resources
+        # a selectively augmented policy only needs detail calls for
+        # keys the enumeration didn't return.
+        augment_keys = self.manager.get_augment_keys()
+        if augment_keys is not None and all(
+                isinstance(r, dict) and augment_keys.issubset(r) for r in resources):
+            return resources
         if self.manager.get_client:
             client = self.manager.get_client()
         else:
             client = local_session(self.manager.session_factory).client(
                 model.service, region_name=self.manager.config.region)
+        # scalar detail calls are pipelined individually rather than
+        # issued serially within a chunk.
+        chunk_size = _augment is _scalar_augment and 1 or self.manager.chunk_size
+        limiter = self.manager.get_augment_limiter()
         _augment = functools.partial(
-            _augment, self.manager, model, detail_spec, client)
+            limiter.call, _augment, self.manager, model, detail_spec, client)
         with self.manager.executor_factory(
-                max_workers=self.manager.max_workers) as w:
+                max_workers=limiter.maximum) as w:
             results = list(w.map(
-                _augment, chunks(resources, self.manager.chunk_size)))
+                _augment, chunks(resources, chunk_size)))
             return list(itertools.chain(*results))
 
 
@@ -304,8 +321,12 @@ class ConfigSource:
         self.titleCase = self.manager.resource_type.id[0].isupper()
 
     def get_permissions(self):
-        return ["config:GetResourceConfigHistory",
-                "config:ListDiscoveredResources"]
+        perms = ["config:GetResourceConfigHistory",
+                 "config:ListDiscoveredResources",
+                 "config:SelectResourceConfig"]
+        if any('aggregator' in q for q in self.manager.data.get('query', ())):
+            perms.append("config:SelectAggregateResourceConfig")
+        return perms
 
     def get_resources(self, ids, cache=True):
         client = local_session(self.manager.session_factory).client('config')
@@ -355,9 +376,91 @@ class ConfigSource:
              "where resourceType = '{}'").format(self.manager.resource_type.config_type)
 
         if _c:
-            s += "AND {}".format(_c)
-
-        return {'expr': s}
+            s += " AND {}".format(_c)
+
+        params = {'expr': s}
+        pushdown = self.get_pushdown_clauses()
+        if pushdown:
+            params['expr'] = " AND ".join([s] + pushdown)
+            params['default_expr'] = s
+        aggregators = [q['aggregator'] for q in self.manager.data.get('query', ())
+                       if 'aggregator' in q]
+        if aggregators:
+            params['aggregators'] = aggregators
+        return params
+
+    # value filter operators and the sql operator to push them down as
+    pushdown_ops = {None: '=', 'eq': '=', 'equal': '=', 'in': 'IN'}
+    pushdown_key = re.compile(r'^[A-Za-z][A-Za-z0-9]*(\.[A-Za-z][A-Za-z0-9]*)?$')
+
+    def get_pushdown_clauses(self):
+        """Compile the policy's value filters into select where clauses.
+
+        Only the subset config can evaluate equivalently is pushed down,
+        equality and membership on tags or configuration attributes, and
+        tag presence. Filters are still evaluated client side, this only
+        narrows the resources config returns.
+        """
+        clauses = []
+        for f in self.manager.filters:
+            if type(f) is not ValueFilter:
+                continue
+            clause = self.get_pushdown_clause(f.data)
+            if clause:
+                clauses.append(clause)
+        return clauses
+
+    def get_pushdown_clause(self, data):
+        if len(data) == 1 and 'type' not in data:
+            [(key, value)], op = data.items(), None
+        elif set(data) <= {'type', 'key', 'value', 'op'}:
+            key, value, op = data.get('key'), data.get('value'), data.get('op')
+        else:
+            return None
+        if op not in self.pushdown_ops or not isinstance(key, str):
+            return None
+        values = op == 'in' and value or [value]
+        if not isinstance(values, list) or not all(
+                isinstance(v, str) and v and "'" not in v for v in values):
+            return None
+
+        if key.startswith('tag:'):
+            tag = key[4:]
+            if "'" in tag or '=' in tag:
+                return None
+            if value == 'present':
+                return "tags.key = '%s'" % tag
+            if op == 'in':
+                return "tags.tag IN (%s)" % ", ".join("'%s=%s'" % (tag, v) for v in values)
+            if value not in ('absent', 'not-null', 'empty'):
+                return "tags.tag = '%s=%s'" % (tag, value)
+            return None
+
+        # configuration attributes, provided the source doesn't reshape them
+        if (type(self).load_resource is not ConfigSource.load_resource or
+                type(self)._load_item_config is not ConfigSource._load_item_config):
+            return None
+        if not self.pushdown_key.match(key) or any(
+                t in key.lower() for t in ('date', 'time')):
+            return None
+        if op != 'in' and value in ('absent', 'present', 'not-null', 'empty'):
+            return None
+        if any(v[0].isdigit() for v in values):
+            # may be a date or number in config's json
+            return None
+        # title cased attributes may be either case in config
+        paths = ['configuration']
+        for part in key.split('.'):
+            variants = {part}
+            if self.titleCase:
+                variants.add(part[0].lower() + part[1:])
+            paths = ['%s.%s' % (p, v) for p in paths for v in sorted(variants)]
+        if op == 'in':
+            predicate = "IN (%s)" % ", ".join("'%s'" % v for v in values)
+        else:
+            predicate = "= '%s'" % value
+        clause = " OR ".join("%s %s" % (p, predicate) for p in paths)
+        return len(paths) > 1 and "(%s)" % clause or clause
 
     def load_resource(self, item):
         item_config = self._load_item_config(item)
@@ -368,7 +471,7 @@ class ConfigSource:
 
     def _load_item_config(self, item):
         if isinstance(item['configuration'], str):
-            item_config = json.loads(item['configuration'])
+            item_config = loads(item['configuration'])
         else:
             item_config = item['configuration']
         return item_config
@@ -383,7 +486,7 @@ class ConfigSource:
         elif item['supplementaryConfiguration'].get('Tags'):
             stags = item['supplementaryConfiguration']['Tags']
             if isinstance(stags, str):
-                stags = json.loads(stags)
+                stags = loads(stags)
             if isinstance(stags, list):
                 resource['Tags'] = [
                     {u'Key': t.get('key', t.get('tagKey')),
@@ -422,51 +525,150 @@ class ConfigSource:
                     results.extend(f.result())
         return results
 
-    def resources(self, query=None):
-        client = local_session(self.manager.session_factory).client('config')
-        query = self.get_query_params(query)
+    def select(self, client, expr, aggregator=None):
+        if aggregator:
+            method, op = client.select_aggregate_resource_config, 'SelectAggregateResourceConfig'
+            params = {'Expression': expr, 'ConfigurationAggregatorName': aggregator}
+        else:
+            method, op = client.select_resource_config, 'SelectResourceConfig'
+            params = {'Expression': expr}
         pager = Paginator(
-            client.select_resource_config,
+            method,
             {'input_token': 'NextToken', 'output_token': 'NextToken',
              'result_key': 'Results'},
-            client.meta.service_model.operation_model('SelectResourceConfig'))
+            client.meta.service_model.operation_model(op))
         pager.PAGE_ITERATOR_CLS = RetryPageIterator
-
         results = []
-        for page in pager.paginate(Expression=query['expr']):
-            results.extend([
-                self.load_resource(json.loads(r)) for r in page['Results']])
+        for page in pager.paginate(**params):
+            results.extend(loads(r) for r in page['Results'])
+        return results
+
+    def select_resources(self, client, query, aggregator=None):
+        try:
+            items = self.select(client, query['expr'], aggregator)
+        except ClientError as e:
+            if 'default_expr' not in query:
+                raise
+            self.manager.log.warning(
+                "config query with pushed down filters failed, retrying without: %s", e)
+            items = self.select(client, query['default_expr'], aggregator)
+        return [self.load_resource(i) for i in items]
+
+    def is_select_supported(self, client):
+        count = self.select(client, "select COUNT(*) where resourceType = '%s'" % (
+            self.manager.resource_type.config_type))
+        return bool(count and list(count[0].values())[0])
+
+    def resources(self, query=None):
+        client = local_session(self.manager.session_factory).client('config')
+        query = self.get_query_params(query)
+        aggregators = query.get('aggregators', [None])
+
+        with self.manager.executor_factory(max_workers=len(aggregators)) as w:
+            results = list(itertools.chain(*w.map(
+                functools.partial(self.select_resources, client, query), aggregators)))
 
         # Config arbitrarily breaks which resource types its supports for query/select
         # on any given day, if we don't have a user defined query, then fallback
-        # to iteration mode.
-        if not results and query == self.get_query_params({}):
-            results = self.get_listed_resources(client)
+        # to iteration mode. With filters pushed down, no results may be genuine
+        # so check whether select works for the resource type at all.
+        if not results and query == self.get_query_params({}) and 'aggregators' not in query:
+            if 'default_expr' not in query or not self.is_select_supported(client):
+                results = self.get_listed_resources(client)
         return results
 
     def augment(self, resources):
         return resources
 
 
+THROTTLE_CODES = (
+    'TooManyRequestsException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'Throttled',
+    'ThrottledException',
+    'Throttling',
+    'Client.RequestLimitExceeded')
+
+
+class AugmentLimiter:
+    """Adaptive limit on the number of concurrent augment api calls.
+
+    Additive increase, multiplicative decrease. The limit is halved
+    when a call is retried on throttling, and grows by one after a
+    limit's worth of calls complete without being throttled, up to
+    the maximum.
+    """
+
+    def __init__(self, initial, maximum, minimum=1):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.active = 0
+        self.successes = 0
+        self.cond = threading.Condition()
+
+    def throttled(self):
+        with self.cond:
+            self.limit = max(self.minimum, self.limit // 2)
+            self.successes = 0
+
+    def succeeded(self):
+        with self.cond:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.successes = 0
+                self.cond.notify_all()
+
+    def call(self, func, *args, **kw):
+        with self.cond:
+            while self.active >= self.limit:
+                self.cond.wait()
+            self.active += 1
+
+        throttled = []
+
+        def observe(error_code):
+            if error_code in THROTTLE_CODES and not throttled:
+                throttled.append(error_code)
+                self.throttled()
+
+        try:
+            with observe_retries(observe):
+                result = func(*args, **kw)
+        finally:
+            with self.cond:
+                self.active -= 1
+                self.cond.notify()
+        if not throttled:
+            self.succeeded()
+        return result
+
+
+def resource_fingerprint(resource):
+    """Digest of a resource's attributes, excluding policy annotations."""
+    if isinstance(resource, dict):
+        resource = {k: v for k, v in resource.items() if not k.startswith('c7n:')}
+    return hashlib.sha256(
+        json.dumps(resource, sort_keys=True, default=str).encode('utf8')).digest()
+
+
 class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
 
     resource_type = ""
 
     # TODO Check if we can move to describe source
+    # initial and maximum concurrency of augment api calls, the
+    # maximum may be overridden per resource type via the
+    # augment_concurrency option.
     max_workers = 3
+    augment_max_workers = 10
     chunk_size = 20
 
     _generate_arn = None
 
-    retry = staticmethod(
-        get_retry((
-            'TooManyRequestsException',
-            'ThrottlingException',
-            'RequestLimitExceeded',
-            'Throttled',
-            'ThrottledException',
-            'Throttling',
-            'Client.RequestLimitExceeded')))
+    retry = staticmethod(get_retry(THROTTLE_CODES))
 
     source_mapping = sources
 
@@ -514,13 +716,89 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
         return perms
 
     def get_cache_key(self, query):
-        return {
+        key = {
             'account': self.account_id,
             'region': self.config.region,
             'resource': str(self.__class__.__name__),
             'source': self.source_type,
             'q': query
         }
+        augment_keys = self.get_augment_keys()
+        # partially augmented resources are only shared with policies
+        # needing the same keys.
+        if augment_keys is not None:
+            key['augment'] = sorted(augment_keys)
+        return key
+
+    def get_augment_keys(self):
+        """Return the resource keys referenced by the policy's filters and actions.
+
+        Only applies with the selective_augment option, as the policy's
+        output then omits any other augmented keys. None denotes all
+        augments are needed, ie. for a policy without filters or actions
+        (an inventory), or one using a filter or action which doesn't
+        declare the keys it depends on via an ``augment_keys`` attribute.
+        """
+        if not getattr(self.config, 'selective_augment', False):
+            return None
+        elements = list(getattr(self, 'filters', ())) + list(getattr(self, 'actions', ()))
+        if not elements:
+            return None
+        keys = set()
+        for e in elements:
+            element_keys = get_element_keys(e)
+            if element_keys is None:
+                return None
+            keys.update(element_keys)
+        return keys
+
+    def get_resource_cache_key(self, resource_id):
+        key = self.get_cache_key(None)
+        key.pop('q')
+        key['id'] = resource_id
+        return key
+
+    def _load_cached_resources(self, cache_key, ids=None):
+        """Load a query's resources from the cache, optionally only the given ids.
+
+        Returns None when the query's results aren't cached.
+        """
+        manifest = self._cache.get(cache_key)
+        if manifest is None:
+            return None
+        # resources without unique ids are cached as a single list
+        if isinstance(manifest, list):
+            if ids is None:
+                return manifest
+            m = self.get_model()
+            id_set = set(ids)
+            return [r for r in manifest if r[m.id] in id_set]
+
+        resource_ids = manifest['ids']
+        if ids is not None:
+            id_set = set(ids)
+            resource_ids = [i for i in resource_ids if i in id_set]
+        resources = self._cache.get_many(
+            [self.get_resource_cache_key(i) for i in resource_ids])
+        # individual entries may have been expired or evicted
+        if None in resources:
+            return None
+        return resources
+
+    def _save_cached_resources(self, cache_key, resources):
+        """Save resources individually, along with a manifest of the query's ids.
+
+        This allows for fetching a subset of the resources without
+        loading the entire set.
+        """
+        m = self.get_model()
+        ids = [isinstance(r, dict) and r.get(m.id) or None for r in resources]
+        if not all(isinstance(i, str) for i in ids) or len(set(ids)) != len(ids):
+            self._cache.save(cache_key, resources)
+            return
+        items = [(self.get_resource_cache_key(i), r) for i, r in zip(ids, resources)]
+        items.append((cache_key, {'ids': ids}))
+        self._cache.save_many(items)
 
     def resources(self, query=None, augment=True) -> List[dict]:
         query = self.source.get_query_params(query)
@@ -528,7 +806,7 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
         resources = None
 
         with self._cache:
-            resources = self._cache.get(cache_key)
+            resources = self._load_cached_resources(cache_key)
             if resources is not None:
                 self.log.debug("Using cached %s: %d" % (
                     "%s.%s" % (self.__class__.__module__, self.__class__.__name__),
@@ -537,23 +815,96 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
             if resources is None:
                 if query is None:
                     query = {}
-                with self.ctx.tracer.subsegment('resource-fetch'):
+                with self.ctx.tracer.subsegment('resource-fetch'), \
+                        self.ctx.profiler.section('resource-fetch') as section:
                     resources = self.source.resources(query)
+                    section['out'] = len(resources)
                 if augment:
-                    with self.ctx.tracer.subsegment('resource-augment'):
+                    with self.ctx.tracer.subsegment('resource-augment'), \
+                            self.ctx.profiler.section(
+                                'resource-augment', len(resources)) as section:
                         resources = self.augment(resources)
+                        section['out'] = len(resources)
                     # Don't pollute cache with unaugmented resources.
-                    self._cache.save(cache_key, resources)
+                    self._save_cached_resources(cache_key, resources)
 
         resource_count = len(resources)
         with self.ctx.tracer.subsegment('filter'):
-            resources = self.filter_resources(resources)
+            if self.is_incremental():
+                resources = self.filter_incremental(resources)
+            else:
+                resources = self.filter_resources(resources)
 
         # Check if we're out of a policies execution limits.
         if self.data == self.ctx.policy.data:
             self.check_resource_limit(len(resources), resource_count)
         return resources
 
+    def is_incremental(self):
+        """Whether the policy's filter verdicts may be reused across runs.
+
+        Opt in via the incremental_period option, and only for a policy's
+        own resources. Filters are run on the subset of new or changed
+        resources, so filters whose verdicts depend on the rest of the
+        set (ie. reduce) or vary with the time of day (ie. offhours)
+        declare ``incremental = False``. Batching filters such as metrics
+        only change how their queries are grouped.
+        """
+        if not getattr(self.config, 'incremental_period', None) or not self.filters:
+            return False
+        if self.data != self.ctx.policy.data:
+            return False
+        return all(getattr(f, 'incremental', True) for f in self.iter_filters())
+
+    def get_incremental_key(self):
+        return {
+            'account': self.account_id,
+            'region': self.config.region,
+            'policy': self.ctx.policy.name,
+            'version': version,
+            'data': hashlib.sha256(repr(self.data).encode('utf8')).hexdigest()}
+
+    def filter_incremental(self, resources):
+        """Filter only new or changed resources since the policy's last run.
+
+        Resources are fingerprinted, and the previous run's verdicts are
+        reused for unchanged ones, matches with their annotations. Every
+        resource is filtered again once the verdicts are older than the
+        incremental period, bounding the staleness of filters on time or
+        on other resources, ie. age or marked-for-op.
+        """
+        store = cache.incremental_factory(self.config)
+        key = self.get_incremental_key()
+        now = time.time()
+        with store:
+            previous = store.get(key)
+            if previous is None or (
+                    now - previous['evaluated'] > self.config.incremental_period * 60):
+                previous = {'evaluated': now, 'verdicts': {}}
+            fingerprints = [resource_fingerprint(r) for r in resources]
+            pending = [r for r, fp in zip(resources, fingerprints)
+                       if fp not in previous['verdicts']]
+            self.log.debug(
+                "Incremental filtering of %d of %d resources", len(pending), len(resources))
+            matched = {id(r): r for r in self.filter_resources(pending)}
+            if not matched.keys() <= {id(r) for r in pending}:
+                # a filter returned copies, its verdicts can't be attributed,
+                # so filter everything without storing verdicts.
+                self.log.debug("Incremental verdicts unavailable, filtering all resources")
+                return self.filter_resources(resources)
+
+            verdicts, results = {}, []
+            for r, fp in zip(resources, fingerprints):
+                if fp in previous['verdicts']:
+                    r = previous['verdicts'][fp]
+                else:
+                    r = matched.get(id(r))
+                verdicts[fp] = r
+                if r is not None:
+                    results.append(r)
+            store.save(key, {'evaluated': previous['evaluated'], 'verdicts': verdicts})
+        return results
+
     def check_resource_limit(self, selection_count, population_count):
         """Check if policy's execution affects more resources then its limit.
 
@@ -567,12 +918,10 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
     def _get_cached_resources(self, ids):
         key = self.get_cache_key(None)
         with self._cache:
-            resources = self._cache.get(key)
+            resources = self._load_cached_resources(key, ids)
             if resources is not None:
                 self.log.debug("Using cached results for get_resources")
-                m = self.get_model()
-                id_set = set(ids)
-                return [r for r in resources if r[m.id] in id_set]
+                return resources
         return None
 
     def get_resources(self, ids, cache=True, augment=True):
@@ -591,6 +940,12 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
             self.log.warning("event ids not resolved: %s error:%s" % (ids, e))
             return []
 
+    def get_augment_limiter(self, initial=None):
+        overrides = dict(getattr(self.config, 'augment_concurrency', None) or ())
+        maximum = overrides.get(
+            'aws.%s' % self.type, overrides.get(self.type, self.augment_max_workers))
+        return AugmentLimiter(min(initial or self.max_workers, maximum), maximum)
+
     def augment(self, resources):
         """subclasses may want to augment resources with additional information.
 
@@ -719,6 +1074,45 @@ class ChildResourceManager(QueryResourceManager):
         return self.get_resource_manager(self.resource_type.parent_spec[0])
 
 
+def get_element_keys(element):
+    """Return the resource keys a filter or action references, or None if unknown."""
+    if isinstance(element, BooleanGroupFilter):
+        keys = set()
+        for f in element.filters:
+            element_keys = get_element_keys(f)
+            if element_keys is None:
+                return None
+            keys.update(element_keys)
+        return keys
+    if type(element) is EventFilter:
+        return set()
+    if type(element) is ValueFilter:
+        k = element.data.get('key')
+        if k is None and len(element.data) == 1:
+            # shorthand form ie. {'tag:Owner': 'absent'}
+            [k] = element.data
+        if not isinstance(k, str):
+            return None
+        if k.startswith('tag:'):
+            return {'Tags'}
+        try:
+            return _jmespath_fields(jmespath.compile(k).parsed)
+        except jmespath.exceptions.JMESPathError:
+            return None
+    return getattr(element, 'augment_keys', None)
+
+
+def _jmespath_fields(node):
+    # over approximates, every field named anywhere in the expression.
+    fields = set()
+    if node.get('type') == 'field':
+        fields.add(node['value'])
+    for child in node.get('children', ()):
+        if isinstance(child, dict):
+            fields.update(_jmespath_fields(child))
+    return fields
+
+
 def _batch_augment(manager, model, detail_spec, client, resource_set):
     detail_op, param_name, param_key, detail_path, detail_args = detail_spec
     op = getattr(client, detail_op)
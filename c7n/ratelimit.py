@@ -0,0 +1,126 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Client side rate limiting of aws api calls.
+
+Rather than waiting for the service to throttle requests and backing
+off, calls are spaced out up front via token buckets keyed on account,
+region, service and operation. Budgets are expressed in calls per
+second, for a service (ie. ``ec2``), an operation (ie.
+``ec2.DescribeInstances``) or any call (``*``).
+
+Buckets are shared by every session, thread and policy within a
+process.
+"""
+from collections import Counter
+import logging
+import threading
+import time
+
+log = logging.getLogger('custodian.ratelimit')
+
+# account id, sorted budgets -> rate limiter
+LIMITERS = {}
+LIMITERS_LOCK = threading.Lock()
+
+
+def parse_budget(value):
+    """Parse a budget of the form ``service[.operation]=calls per second``"""
+    api, _, rate = value.partition('=')
+    try:
+        rate = float(rate)
+    except ValueError:
+        rate = 0
+    if not api or rate <= 0:
+        raise ValueError(
+            "api rate limit must be of the form `service[.operation]=N` ie. `ec2=20`")
+    return api, rate
+
+
+def get_limiter(account_id, budgets):
+    """Return the process wide rate limiter for an account's budgets."""
+    budgets = dict(budgets)
+    key = (account_id, tuple(sorted(budgets.items())))
+    with LIMITERS_LOCK:
+        if key not in LIMITERS:
+            LIMITERS[key] = RateLimiter(budgets, account_id)
+        return LIMITERS[key]
+
+
+class TokenBucket:
+    """Thread safe token bucket.
+
+    Callers reserve a token and sleep until it becomes available, so
+    concurrent callers queue in order without holding the lock while
+    waiting.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self.tokens = self.burst
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, returning the seconds spent waiting for it."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = self.tokens < 0 and -self.tokens / self.rate or 0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+
+    bucket_factory = TokenBucket
+
+    def __init__(self, budgets, account_id=None):
+        self.budgets = dict(budgets)
+        self.account_id = account_id
+        self.buckets = {}
+        self.lock = threading.Lock()
+        # service.operation -> seconds spent waiting
+        self.wait_times = Counter()
+
+    @property
+    def total_wait(self):
+        with self.lock:
+            return sum(self.wait_times.values())
+
+    def get_budget(self, service, operation):
+        for k in ('%s.%s' % (service, operation), service, '*'):
+            if k in self.budgets:
+                return self.budgets[k]
+
+    def get_bucket(self, key, rate):
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = self.bucket_factory(rate)
+            return bucket
+
+    def acquire(self, region, service, operation):
+        rate = self.get_budget(service, operation)
+        if not rate:
+            return 0
+        bucket = self.get_bucket((self.account_id, region, service, operation), rate)
+        waited = bucket.acquire()
+        if waited:
+            with self.lock:
+                self.wait_times['%s.%s' % (service, operation)] += waited
+        return waited
+
+    def register(self, session):
+        session.events.register(
+            'before-call.*.*', self._before_call, unique_id='c7n-rate-limit')
+
+    def _before_call(self, model, request_signer=None, **kwargs):
+        self.acquire(
+            getattr(request_signer, 'region_name', None),
+            model.service_model.endpoint_prefix, model.name)
@@ -1,5 +1,6 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+import importlib
 
 
 class PluginRegistry:
@@ -31,6 +32,8 @@ class PluginRegistry:
 
       PluginRegistry('ec2.filters').load_plugins()
 
+    Plugins can also be registered by dotted path, deferring the import
+    of their module until they're first looked up.
     """
 
     EVENT_REGISTER = 0
@@ -40,6 +43,7 @@ class PluginRegistry:
     def __init__(self, plugin_type):
         self.plugin_type = plugin_type
         self._factories = {}
+        self._lazy = {}
         self._subscribers = []
 
     def subscribe(self, func):
@@ -67,7 +71,36 @@ class PluginRegistry:
             return klass
         return _register_class
 
+    def register_lazy(self, name, path):
+        """Register a plugin class by its dotted path."""
+        if name not in self._factories:
+            self._lazy[name] = path
+
+    def _resolve(self, name):
+        path = self._lazy.get(name)
+        if path is None:
+            return
+        module, klass = path.rsplit('.', 1)
+        klass = getattr(importlib.import_module(module), klass)
+        if name not in self._factories:
+            self.register(name, klass)
+        # only drop the path once registered, so concurrent lookups
+        # never observe the plugin as missing.
+        self._lazy.pop(name, None)
+
+    def _resolve_all(self):
+        for name in list(self._lazy):
+            self._resolve(name)
+
+    def paths(self):
+        """Return the dotted path of each plugin, without importing lazy ones."""
+        paths = {name: '%s.%s' % (klass.__module__, klass.__qualname__)
+                 for name, klass in self._factories.items()}
+        paths.update(self._lazy)
+        return paths
+
     def unregister(self, name):
+        self._lazy.pop(name, None)
         if name in self._factories:
             del self._factories[name]
 
@@ -76,7 +109,7 @@ class PluginRegistry:
             subscriber(self, key)
 
     def __contains__(self, key):
-        return key in self._factories
+        return key in self._factories or key in self._lazy
 
     def __getitem__(self, name):
         v = self.get(name)
@@ -85,9 +118,12 @@ class PluginRegistry:
         return v
 
     def __len__(self):
-        return len(self._factories)
+        # a plugin is briefly in both while a lazy one is resolved
+        return len(self._factories.keys() | self._lazy.keys())
 
     def get(self, name):
+        if name in self._lazy:
+            self._resolve(name)
         factory = self._factories.get(name)
 
         if factory:
@@ -98,10 +134,13 @@ class PluginRegistry:
                     None)
 
     def keys(self):
+        self._resolve_all()
         return self._factories.keys()
 
     def values(self):
+        self._resolve_all()
         return self._factories.values()
 
     def items(self):
+        self._resolve_all()
         return self._factories.items()
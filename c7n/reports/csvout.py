@@ -28,13 +28,13 @@ CLI Usage
 
 
 """
-from concurrent.futures import as_completed
+from collections import deque
 
 import csv
 from datetime import datetime
 import gzip
+import heapq
 import io
-import json
 import jmespath
 import logging
 import os
@@ -44,7 +44,7 @@ from botocore.compat import OrderedDict
 from dateutil.parser import parse as date_parse
 
 from c7n.executor import ThreadPoolExecutor
-from c7n.utils import local_session, dumps
+from c7n.utils import local_session, dumps, iter_records, read_records
 
 log = logging.getLogger('custodian.reports')
 
@@ -64,7 +64,12 @@ def strip_output_path(path, policy_name):
 
 
 def report(policies, start_date, options, output_fh, raw_output_fh=None):
-    """Format a policy's extant records into a report."""
+    """Format a policy's extant records into a report.
+
+    Records are streamed newest first across the policies, so csv and
+    json output is written as records arrive, holding only the ids of
+    reported resources in memory.
+    """
     regions = {p.options.region for p in policies}
     policy_names = {p.name for p in policies}
     formatter = Formatter(
@@ -75,41 +80,75 @@ def report(policies, start_date, options, output_fh, raw_output_fh=None):
         include_policy=len(policy_names) > 1
     )
 
-    records = []
+    streams = []
     for policy in policies:
         # initialize policy execution context for output access
         policy.ctx.initialize()
-        if policy.ctx.output.type == 's3':
-            policy_records = record_set(
-                policy.session_factory,
-                policy.ctx.output.config['netloc'],
-                strip_output_path(policy.ctx.output.config['path'], policy.name),
-                start_date)
-        else:
-            policy_records = fs_record_set(policy.ctx.log_dir, policy.name)
-
-        log.debug("Found %d records for region %s", len(policy_records), policy.options.region)
-
-        for record in policy_records:
-            record['policy'] = policy.name
-            record['region'] = policy.options.region
+        streams.append(policy_record_set(policy, start_date))
 
-        records += policy_records
-
-    rows = formatter.to_csv(records, unique=not options.all_findings)
+    records = heapq.merge(*streams, key=lambda r: r['CustodianDate'], reverse=True)
+    raw_writer = None
+    if raw_output_fh is not None:
+        raw_writer = JsonArrayWriter(raw_output_fh)
+        records = raw_writer.tee(records)
 
     if options.format == 'csv':
         writer = csv.writer(output_fh, formatter.headers(), quoting=csv.QUOTE_ALL)
         writer.writerow(formatter.headers())
-        writer.writerows(rows)
+        writer.writerows(formatter.iter_rows(records, unique=not options.all_findings))
     elif options.format == 'json':
-        print(dumps(records, indent=2))
+        json_writer = JsonArrayWriter(output_fh)
+        for r in records:
+            json_writer.write(r)
+        json_writer.close()
+        output_fh.write('\n')
     else:
         # We special case CSV, and for other formats we pass to tabulate
-        print(tabulate(rows, formatter.headers(), tablefmt=options.format))
+        # which needs every row to size its columns.
+        rows = list(formatter.iter_rows(records, unique=not options.all_findings))
+        output_fh.write(tabulate(rows, formatter.headers(), tablefmt=options.format) + '\n')
+
+    if raw_writer is not None:
+        raw_writer.close()
+
+
+def policy_record_set(policy, start_date):
+    """Stream a policy's records newest first, annotated with policy and region."""
+    if policy.ctx.output.type == 's3':
+        records = iter_record_set(
+            policy.session_factory,
+            policy.ctx.output.config['netloc'],
+            strip_output_path(policy.ctx.output.config['path'], policy.name),
+            start_date)
+    else:
+        records = fs_record_set(policy.ctx.log_dir, policy.name)
+        log.debug("Found %d records for region %s", len(records), policy.options.region)
 
-    if raw_output_fh is not None:
-        dumps(records, raw_output_fh, indent=2)
+    for record in records:
+        record['policy'] = policy.name
+        record['region'] = policy.options.region
+        yield record
+
+
+class JsonArrayWriter:
+    """Write records to a file handle as a json array, one at a time."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.count = 0
+
+    def write(self, record):
+        self.fh.write(self.count and ',\n  ' or '[\n  ')
+        self.fh.write(dumps(record, indent=2).replace('\n', '\n  '))
+        self.count += 1
+
+    def tee(self, records):
+        for r in records:
+            self.write(r)
+            yield r
+
+    def close(self):
+        self.fh.write(self.count and '\n]' or '[]')
 
 
 def _get_values(record, field_list, tag_map):
@@ -191,7 +230,14 @@ class Formatter:
 
     def uniq_by_id(self, records):
         """Only the first record for each id"""
-        uniq = []
+        return list(self.iter_unique(records))
+
+    def iter_unique(self, records):
+        """Yield only the first record for each id, retaining just the ids seen.
+
+        The set of ids seen isn't bounded, it grows with the number of
+        distinct resources reported, not with the number of records.
+        """
         keys = set()
         compiled = None
         if '.' in self._id_field:
@@ -202,9 +248,14 @@ class Formatter:
             else:
                 rec_id = rec[self._id_field]
             if rec_id not in keys:
-                uniq.append(rec)
                 keys.add(rec_id)
-        return uniq
+                yield rec
+
+    def iter_rows(self, records, unique=True):
+        """Yield rows for records which are already sorted newest first."""
+        if unique:
+            records = self.iter_unique(records)
+        return map(self.extract_csv, records)
 
     def to_csv(self, records, reverse=True, unique=True):
         if not records:
@@ -227,17 +278,24 @@ class Formatter:
         return rows
 
 
-def fs_record_set(output_path, policy_name):
-    record_path = os.path.join(output_path, 'resources.json')
+RECORD_FILES = (
+    'resources.json', 'resources.json.gz', 'resources.jsonl', 'resources.jsonl.gz')
+
 
-    if not os.path.exists(record_path):
+def fs_record_set(output_path, policy_name):
+    for record_file in RECORD_FILES:
+        record_path = os.path.join(output_path, record_file)
+        if os.path.exists(record_path):
+            break
+    else:
         return []
 
     mdate = datetime.fromtimestamp(
         os.stat(record_path).st_ctime)
 
-    with open(record_path) as fh:
-        records = json.load(fh)
+    opener = record_path.endswith('.gz') and gzip.open or open
+    with opener(record_path, 'rt', encoding='utf8') as fh:
+        records = read_records(fh, lines='.jsonl' in record_file)
         [r.__setitem__('CustodianDate', mdate) for r in records]
         return records
 
@@ -247,11 +305,19 @@ def record_set(session_factory, bucket, key_prefix, start_date, specify_hour=Fal
 
     From the given start date.
     """
+    return list(iter_record_set(
+        session_factory, bucket, key_prefix, start_date, specify_hour))
 
-    s3 = local_session(session_factory).client('s3')
 
-    records = []
-    key_count = 0
+def iter_record_set(session_factory, bucket, key_prefix, start_date,
+                    specify_hour=False, max_workers=20):
+    """Stream the s3 records for the given policy output url, newest first.
+
+    Objects are downloaded concurrently, but no more than max_workers
+    ahead of the records being consumed. Records of json lines objects
+    are parsed as they're read, json array objects are parsed whole.
+    """
+    s3 = local_session(session_factory).client('s3')
 
     date = start_date.strftime('%Y/%m/%d')
     if specify_hour:
@@ -267,40 +333,62 @@ def record_set(session_factory, bucket, key_prefix, start_date, specify_hour=Fal
         StartAfter=marker,
     )
 
-    with ThreadPoolExecutor(max_workers=20) as w:
-        for key_set in p:
-            if 'Contents' not in key_set:
-                continue
-            keys = [k for k in key_set['Contents']
-                    if k['Key'].endswith('resources.json.gz')]
-            key_count += len(keys)
-            futures = map(lambda k: w.submit(
-                get_records, bucket, k, session_factory), keys)
-
-            for f in as_completed(futures):
-                records.extend(f.result())
+    keys = []
+    for key_set in p:
+        keys.extend(k for k in key_set.get('Contents', ())
+                    if k['Key'].endswith(('resources.json.gz', 'resources.jsonl.gz')))
+    keys.sort(key=lambda k: (get_key_date(k), k['Key']), reverse=True)
+
+    record_count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as w:
+        remaining = iter(keys)
+        pending = deque()
+
+        def fetch_next():
+            for k in remaining:
+                pending.append((k, w.submit(get_object, bucket, k, session_factory)))
+                break
+
+        for _ in range(max_workers):
+            fetch_next()
+        while pending:
+            key, f = pending.popleft()
+            blob = f.result()
+            fetch_next()
+            for r in iter_object_records(bucket, key, blob):
+                record_count += 1
+                yield r
 
     log.info("Fetched %d records across %d files" % (
-        len(records), key_count))
-    return records
-
+        record_count, len(keys)))
 
-def get_records(bucket, key, session_factory):
-    # we're doing a lot of this in memory, worst case
-    # though we're talking about a 10k objects, else
-    # we should spool to temp files
 
+def get_key_date(key):
     # key ends with 'YYYY/mm/dd/HH/resources.json.gz'
     # so take the date parts only
-    date_str = '-'.join(key['Key'].rsplit('/', 5)[-5:-1])
-    custodian_date = date_parse(date_str)
+    return '-'.join(key['Key'].rsplit('/', 5)[-5:-1])
+
+
+def get_object(bucket, key, session_factory):
     s3 = local_session(session_factory).client('s3')
     result = s3.get_object(Bucket=bucket, Key=key['Key'])
-    blob = io.BytesIO(result['Body'].read())
+    return result['Body'].read()
 
-    records = json.load(gzip.GzipFile(fileobj=blob))
-    log.debug("bucket: %s key: %s records: %d",
-              bucket, key['Key'], len(records))
+
+def iter_object_records(bucket, key, blob):
+    """Decompress and parse the records of a downloaded object incrementally."""
+    custodian_date = date_parse(get_key_date(key))
+    records = iter_records(
+        io.TextIOWrapper(gzip.GzipFile(fileobj=io.BytesIO(blob)), encoding='utf8'),
+        lines=key['Key'].endswith('.jsonl.gz'))
+    count = 0
     for r in records:
         r['CustodianDate'] = custodian_date
-    return records
+        count += 1
+        yield r
+    log.debug("bucket: %s key: %s records: %d", bucket, key['Key'], count)
+
+
+def get_records(bucket, key, session_factory):
+    return list(iter_object_records(
+        bucket, key, get_object(bucket, key, session_factory)))
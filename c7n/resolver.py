@@ -3,7 +3,6 @@
 import csv
 import io
 import jmespath
-import json
 import os.path
 import logging
 import itertools
@@ -13,7 +12,7 @@ import zlib
 from contextlib import closing
 
 from c7n.cache import NullCache
-from c7n.utils import format_string_values
+from c7n.utils import format_string_values, loads
 
 log = logging.getLogger('custodian.resolver')
 
@@ -172,7 +171,7 @@ class ValuesFrom:
         contents, format = self.get_contents()
 
         if format == 'json':
-            data = json.loads(contents)
+            data = loads(contents)
             if 'expr' in self.data:
                 return self._get_resource_values(data)
             else:
@@ -62,12 +62,15 @@ def load_available(resources=True):
 def load_providers(provider_types):
     global LOADED
 
-    # Even though we're lazy loading resources we still need to import
-    # those that are making available generic filters/actions
+    # Generic modes, filters and actions are registered by import path,
+    # see resource_map.ElementMap, and only imported when used.
     if should_load_provider('aws', provider_types):
-        import c7n.resources.securityhub
-        import c7n.resources.sfn
-        import c7n.resources.ssm # NOQA
+        from c7n.policy import execution
+        from c7n.resources.resource_map import ElementMap
+        import c7n.resources.aws # NOQA
+
+        for name, path in ElementMap['modes'].items():
+            execution.register_lazy(name, path)
 
     if should_load_provider('awscc', provider_types):
         from c7n_awscc.entry import initialize_awscc
@@ -31,7 +31,7 @@ from c7n.exceptions import InvalidOutputConfig, PolicyValidationError
 from c7n.log import CloudWatchLogHandler
 from c7n.utils import parse_url_config, backoff_delays
 
-from .resource_map import ResourceMap
+from .resource_map import ElementMap, ResourceMap
 
 # Import output registries aws provider extends.
 from c7n.output import (
@@ -51,7 +51,7 @@ from c7n.output import (
 )
 
 from c7n.registry import PluginRegistry
-from c7n import credentials, utils
+from c7n import credentials, ratelimit, utils
 
 log = logging.getLogger('custodian.aws')
 
@@ -633,10 +633,21 @@ class XrayTracer:
 
 @api_stats_outputs.register('aws')
 class ApiStats(DeltaStats):
+    """Record api calls made during a policy execution.
+
+    Besides call counts, a profile per service operation is kept with
+    a latency histogram, bytes received, retries (both botocore's and
+    get_retry's) and the time slept on get_retry backoff.
+    """
+
+    # upper bounds in seconds of the latency histogram buckets
+    latency_buckets = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
 
     def __init__(self, ctx, config=None):
         super(ApiStats, self).__init__(ctx, config)
         self.api_calls = Counter()
+        self.api_profile = {}
+        self.rate_limit_wait = 0
 
     def get_snapshot(self):
         return dict(self.api_calls)
@@ -644,9 +655,16 @@ class ApiStats(DeltaStats):
     def get_metadata(self):
         return self.get_snapshot()
 
+    def get_profile(self):
+        return {k: dict(v, histogram=dict(v['histogram']))
+                for k, v in self.api_profile.items()}
+
     def __enter__(self):
         if isinstance(self.ctx.session_factory, credentials.SessionFactory):
             self.ctx.session_factory.set_subscribers((self,))
+        rate_limiter = getattr(self.ctx.session_factory, 'rate_limiter', None)
+        if rate_limiter is not None:
+            self.rate_limit_wait = rate_limiter.total_wait
         self.push_snapshot()
 
     def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
@@ -655,20 +673,89 @@ class ApiStats(DeltaStats):
 
         # With cached sessions, we need to unregister any events subscribers
         # on extant sessions to allow for the next registration.
-        utils.local_session(self.ctx.session_factory).events.unregister(
-            'after-call.*.*', self._record, unique_id='c7n-api-stats')
+        events = utils.local_session(self.ctx.session_factory).events
+        for event, handler, unique_id in self.get_handlers():
+            events.unregister(event, handler, unique_id=unique_id)
 
         self.ctx.metrics.put_metric(
             "ApiCalls", sum(self.api_calls.values()), "Count")
+        if self.api_profile:
+            profiles = self.api_profile.values()
+            self.ctx.metrics.put_metric(
+                "ApiLatency", sum(p['latency'] for p in profiles), "Seconds")
+            self.ctx.metrics.put_metric(
+                "ApiBytesReceived", sum(p['bytes'] for p in profiles), "Bytes")
+            self.ctx.metrics.put_metric(
+                "ApiRetries", sum(p['retries'] for p in profiles), "Count")
+            self.ctx.metrics.put_metric(
+                "ApiThrottleWait", sum(p['throttle-wait'] for p in profiles), "Seconds")
+        # waits are process wide, so this includes concurrently executing policies.
+        rate_limiter = getattr(self.ctx.session_factory, 'rate_limiter', None)
+        if rate_limiter is not None:
+            self.ctx.metrics.put_metric(
+                "ApiRateLimitWait", rate_limiter.total_wait - self.rate_limit_wait, "Seconds")
         self.pop_snapshot()
 
     def __call__(self, s):
-        s.events.register(
-            'after-call.*.*', self._record, unique_id='c7n-api-stats')
+        for event, handler, unique_id in self.get_handlers():
+            s.events.register(event, handler, unique_id=unique_id)
+
+    def get_handlers(self):
+        # before-parameter-build is emitted ahead of before-call, where
+        # stubbed responses (placebo) short circuit the remaining handlers.
+        return (
+            ('before-parameter-build.*.*', self._start, 'c7n-api-stats-start'),
+            ('after-call.*.*', self._record, 'c7n-api-stats'),
+            ('c7n-retry.*.*', self._record_retry, 'c7n-api-stats-retry'))
+
+    def get_operation(self, key):
+        if key not in self.api_profile:
+            self.api_profile[key] = {
+                'calls': 0, 'latency': 0, 'latency-max': 0, 'bytes': 0,
+                'retries': 0, 'throttle-wait': 0,
+                'histogram': Counter()}
+        return self.api_profile[key]
+
+    def _start(self, params, model, context=None, **kwargs):
+        if context is not None:
+            context['c7n-api-start'] = time.time()
+
+    def _record(self, http_response, parsed, model, context=None, **kwargs):
+        key = "%s.%s" % (model.service_model.endpoint_prefix, model.name)
+        self.api_calls[key] += 1
+
+        op = self.get_operation(key)
+        op['calls'] += 1
+        started = (context or {}).get('c7n-api-start')
+        if started is not None:
+            latency = time.time() - started
+            op['latency'] += latency
+            op['latency-max'] = max(op['latency-max'], latency)
+            op['histogram'][self.get_bucket(latency)] += 1
+        op['bytes'] += self.get_response_size(http_response)
+        op['retries'] += (parsed or {}).get(
+            'ResponseMetadata', {}).get('RetryAttempts', 0)
+
+    def _record_retry(self, service, operation, code, delay, **kwargs):
+        op = self.get_operation("%s.%s" % (service, operation))
+        op['retries'] += 1
+        op['throttle-wait'] += delay
+
+    def get_bucket(self, latency):
+        for bound in self.latency_buckets:
+            if latency <= bound:
+                return "<=%s" % bound
+        return ">%s" % self.latency_buckets[-1]
 
-    def _record(self, http_response, parsed, model, **kwargs):
-        self.api_calls["%s.%s" % (
-            model.service_model.endpoint_prefix, model.name)] += 1
+    @staticmethod
+    def get_response_size(http_response):
+        headers = getattr(http_response, 'headers', None) or {}
+        if 'content-length' in headers:
+            return int(headers['content-length'])
+        content = getattr(http_response, 'content', None)
+        if isinstance(content, bytes):
+            return len(content)
+        return 0
 
 
 @blob_outputs.register('s3')
@@ -728,11 +815,15 @@ class AWS(Provider):
         return options
 
     def get_session_factory(self, options):
-        return SessionFactory(
+        factory = SessionFactory(
             options.region,
             options.profile,
             options.assume_role,
             options.external_id)
+        budgets = getattr(options, 'api_rate_limit', None)
+        if budgets:
+            factory.rate_limiter = ratelimit.get_limiter(options.account_id, budgets)
+        return factory
 
     def initialize_policies(self, policy_collection, options):
         """Return a set of policies targetted to the given regions.
@@ -803,6 +894,21 @@ class AWS(Provider):
             options)
 
 
+def register_lazy_elements(registry, resource_class):
+    """Register the generic filters and actions of the element map by path.
+    """
+    for name, path in ElementMap['actions'].items():
+        resource_class.action_registry.register_lazy(name, path)
+    for name, path in ElementMap['filters'].items():
+        # findings are matched by resource arn
+        if name == 'finding' and not resource_class.has_arn():
+            continue
+        resource_class.filter_registry.register_lazy(name, path)
+
+
+AWS.resources.subscribe(register_lazy_elements)
+
+
 def join_output(output_dir, suffix):
     if '{region}' in output_dir:
         return output_dir.rstrip('/')
@@ -7,7 +7,6 @@ import random
 import re
 import zlib
 from typing import List
-from distutils.version import LooseVersion
 
 import botocore
 from botocore.exceptions import ClientError
@@ -29,7 +28,7 @@ import c7n.filters.vpc as net_filters
 from c7n.manager import resources
 from c7n import query, utils
 from c7n.tags import coalesce_copy_user_tags
-from c7n.utils import type_schema, filter_empty
+from c7n.utils import LooseVersion, type_schema, filter_empty
 
 from c7n.resources.iam import CheckPermissions, SpecificIamProfileManagedPolicy
 from c7n.resources.securityhub import PostFinding
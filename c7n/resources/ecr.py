@@ -1,5 +1,6 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+import functools
 import json
 
 from c7n.actions import RemovePolicyBase, Action, ModifyPolicyBase
@@ -17,15 +18,20 @@ class DescribeECR(DescribeSource):
 
     def augment(self, resources):
         client = local_session(self.manager.session_factory).client('ecr')
-        results = []
-        for r in resources:
+
+        def _augment(r):
             try:
-                r['Tags'] = client.list_tags_for_resource(
+                r['Tags'] = self.manager.retry(
+                    client.list_tags_for_resource,
                     resourceArn=r['repositoryArn']).get('tags')
-                results.append(r)
+                return r
             except client.exceptions.RepositoryNotFoundException:
-                continue
-        return results
+                return None
+
+        limiter = self.manager.get_augment_limiter()
+        with self.manager.executor_factory(max_workers=limiter.maximum) as w:
+            return list(filter(None, w.map(
+                functools.partial(limiter.call, _augment), resources)))
 
 
 @resources.register('ecr')
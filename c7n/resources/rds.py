@@ -43,7 +43,6 @@ from datetime import timedelta
 
 from decimal import Decimal as D, ROUND_HALF_UP
 
-from distutils.version import LooseVersion
 from botocore.exceptions import ClientError
 from concurrent.futures import as_completed
 
@@ -63,7 +62,7 @@ from c7n.tags import universal_augment
 
 from c7n.utils import (
     local_session, type_schema, get_retry, chunks, snapshot_identifier,
-    merge_dict_list, filter_empty)
+    merge_dict_list, filter_empty, LooseVersion)
 from c7n.resources.kms import ResourceKmsKeyAlias
 from c7n.resources.securityhub import PostFinding
 
@@ -1707,12 +1706,14 @@ class ParameterFilter(ValueFilter):
         cache = self.manager._cache
 
         with cache:
-            for pg in param_groups:
-                cache_key = {
-                    'region': self.manager.config.region,
-                    'account_id': self.manager.config.account_id,
-                    'rds-pg': pg}
-                pg_values = cache.get(cache_key)
+            param_groups = list(param_groups)
+            cache_keys = [{
+                'region': self.manager.config.region,
+                'account_id': self.manager.config.account_id,
+                'rds-pg': pg} for pg in param_groups]
+            misses = []
+            for pg, cache_key, pg_values in zip(
+                    param_groups, cache_keys, cache.get_many(cache_keys)):
                 if pg_values is not None:
                     pgcache[pg] = pg_values
                     continue
@@ -1720,7 +1721,8 @@ class ParameterFilter(ValueFilter):
                 pgcache[pg] = {
                     p['ParameterName']: self.recast(p['ParameterValue'], p['DataType'])
                     for p in param_list if 'ParameterValue' in p}
-                cache.save(cache_key, pgcache[pg])
+                misses.append((cache_key, pgcache[pg]))
+            cache.save_many(misses)
         return pgcache
 
     def process(self, resources, event=None):
@@ -234,3 +234,21 @@ ResourceMap = {
     "aws.workspaces-directory": "c7n.resources.workspaces.WorkspaceDirectory",
     "aws.workspaces-image": "c7n.resources.workspaces.WorkspaceImage"
 }
+
+# Execution modes, filters and actions which modules register for every
+# aws resource, loaded by path on first use rather than with the provider.
+ElementMap = {
+    "modes": {
+        "hub-action": "c7n.resources.securityhub.SecurityHubAction",
+        "hub-finding": "c7n.resources.securityhub.SecurityHub",
+    },
+    "actions": {
+        "invoke-sfn": "c7n.resources.sfn.InvokeStepFunction",
+        "post-finding": "c7n.resources.securityhub.OtherResourcePostFinding",
+        "post-item": "c7n.resources.ssm.PostItem",
+    },
+    "filters": {
+        "finding": "c7n.resources.securityhub.SecurityHubFindingFilter",
+        "ops-item": "c7n.resources.ssm.OpsItemFilter",
+    },
+}
@@ -29,11 +29,11 @@ Actions:
 import copy
 import functools
 import json
-import itertools
 import logging
 import math
 import os
 import time
+import threading
 import ssl
 
 from botocore.client import Config
@@ -78,13 +78,16 @@ MAX_COPY_SIZE = 1024 * 1024 * 1024 * 2
 class DescribeS3(query.DescribeSource):
 
     def augment(self, buckets):
+        assembly = BucketAssembly(
+            self.manager.session_factory, self.manager.get_augment_keys())
         with self.manager.executor_factory(
                 max_workers=min((10, len(buckets) + 1))) as w:
-            results = w.map(
-                assemble_bucket,
-                zip(itertools.repeat(self.manager.session_factory), buckets))
-            results = list(filter(None, results))
-            return results
+            # resolve bucket regions in bulk, then issue the remaining
+            # calls for every bucket concurrently against regional clients.
+            list(w.map(assembly.assemble_location, buckets))
+            list(w.map(assembly.assemble_method, [
+                (b, m) for b in buckets for m in assembly.methods]))
+            return buckets
 
 
 class ConfigS3(query.ConfigSource):
@@ -385,6 +388,12 @@ class S3(query.QueryResourceManager):
         perms.extend([n[-1] for n in S3_AUGMENT_TABLE])
         return perms
 
+    def get_augment_keys(self):
+        keys = super().get_augment_keys()
+        if keys is None:
+            return keys
+        return keys.intersection([m[1] for m in S3_AUGMENT_TABLE])
+
 
 S3_CONFIG_SUPPLEMENT_NULL_MAP = {
     'BucketLoggingConfiguration': u'{"destinationBucketName":null,"logFilePrefix":null}',
@@ -417,22 +426,49 @@ S3_AUGMENT_TABLE = (
 )
 
 
-def assemble_bucket(item):
-    """Assemble a document representing all the config state around a bucket.
+class BucketAssembly:
+    """Assemble documents representing the config state around buckets.
 
-    TODO: Refactor this, the logic here feels quite muddled.
+    A bucket's location is resolved first, so the remaining
+    S3_AUGMENT_TABLE calls go to a client in the bucket's region.
+    Clients are reused per region and thread. When augment keys are
+    given, only the matching methods are called.
     """
-    factory, b = item
-    s = factory()
-    c = s.client('s3')
-    # Bucket Location, Current Client Location, Default Location
-    b_location = c_location = location = "us-east-1"
-    methods = list(S3_AUGMENT_TABLE)
-    for minfo in methods:
+
+    def __init__(self, session_factory, augment_keys=None):
+        self.session_factory = session_factory
+        self.location = [m for m in S3_AUGMENT_TABLE if m[1] == 'Location']
+        self.methods = [m for m in S3_AUGMENT_TABLE if m[1] != 'Location' and (
+            augment_keys is None or m[1] in augment_keys)]
+        self.clients = threading.local()
+
+    def get_client(self, region=None):
+        session = local_session(self.session_factory)
+        clients = self.clients.__dict__.setdefault(id(session), {})
+        if region not in clients:
+            clients[region] = session.client('s3', region_name=region)
+        return clients[region]
+
+    def assemble_location(self, b):
+        for m in self.location:
+            self.invoke(b, m, self.get_client())
+            if b.get('Location'):
+                # Location == region for all cases but EU
+                # https://docs.aws.amazon.com/AmazonS3/latest/API/RESTBucketGETlocation.html
+                if b['Location'].get('LocationConstraint') == 'EU':
+                    b['Location']['LocationConstraint'] = 'eu-west-1'
+        return b
+
+    def assemble_method(self, item):
+        b, m = item
+        region = 'Location' in b and get_region(b) or None
+        self.invoke(b, m, self.get_client(region))
+        return b
+
+    def invoke(self, b, minfo, client, redirected=False):
         m, k, default, select = minfo[:4]
         try:
-            method = getattr(c, m)
-            v = method(Bucket=b['Name'])
+            v = getattr(client, m)(Bucket=b['Name'])
             v.pop('ResponseMetadata')
             if select is not None and select in v:
                 v = v[select]
@@ -441,17 +477,17 @@ def assemble_bucket(item):
             log.warning("Bucket ssl error %s: %s %s",
                         b['Name'], b.get('Location', 'unknown'),
                         e)
-            continue
+            return
         except ClientError as e:
             code = e.response['Error']['Code']
             if code.startswith("NoSuch") or "NotFound" in code:
                 v = default
-            elif code == 'PermanentRedirect':
-                s = factory()
-                c = bucket_client(s, b)
-                # Requeue with the correct region given location constraint
-                methods.append((m, k, default, select))
-                continue
+            elif code == 'PermanentRedirect' and not redirected:
+                # Retry against the bucket's region, per the redirect if given
+                # else the location constraint.
+                region = e.response.get('ResponseMetadata', {}).get(
+                    'HTTPHeaders', {}).get('x-amz-bucket-region') or get_region(b)
+                return self.invoke(b, minfo, self.get_client(region), True)
             else:
                 log.warning(
                     "Bucket:%s unable to invoke method:%s error:%s ",
@@ -468,23 +504,18 @@ def assemble_bucket(item):
                 # For other error types we raise and bail policy execution.
                 if e.response['Error']['Code'] == 'AccessDenied':
                     b.setdefault('c7n:DeniedMethods', []).append(m)
-                    continue
+                    return
                 raise
-        # As soon as we learn location (which generally works)
-        if k == 'Location' and v is not None:
-            b_location = v.get('LocationConstraint')
-            # Location == region for all cases but EU
-            # https://docs.aws.amazon.com/AmazonS3/latest/API/RESTBucketGETlocation.html
-            if b_location is None:
-                b_location = "us-east-1"
-            elif b_location == 'EU':
-                b_location = "eu-west-1"
-                v['LocationConstraint'] = 'eu-west-1'
-            if v and v != c_location:
-                c = s.client('s3', region_name=b_location)
-            elif c_location != location:
-                c = s.client('s3', region_name=location)
         b[k] = v
+
+
+def assemble_bucket(item):
+    """Assemble a document representing all the config state around a bucket."""
+    factory, b = item
+    assembly = BucketAssembly(factory)
+    assembly.assemble_location(b)
+    for m in assembly.methods:
+        assembly.assemble_method((b, m))
     return b
 
 
@@ -567,6 +598,8 @@ class S3Metrics(MetricsFilter):
     mismatch, and additional required dimension.
     """
 
+    augment_keys = ()
+
     def get_dimensions(self, resource):
         dims = [{'Name': 'BucketName', 'Value': resource['Name']}]
         if (self.data['name'] == 'NumberOfObjects' and
@@ -591,6 +624,8 @@ class S3CrossAccountFilter(CrossAccountAccessFilter):
                 filters:
                   - type: cross-account
     """
+
+    augment_keys = ('Policy',)
     permissions = ('s3:GetBucketPolicy',)
 
     def get_accounts(self):
@@ -701,6 +736,8 @@ class GlobalGrantsFilter(Filter):
 
     """
 
+    augment_keys = ('Acl',)
+
     schema = type_schema(
         'global-grants',
         allow_website={'type': 'boolean'},
@@ -816,6 +853,9 @@ class BucketFinding(PostFinding):
 
 @S3.filter_registry.register('has-statement')
 class HasStatementFilter(polstmt_filter.HasStatementFilter):
+
+    augment_keys = ('Policy',)
+
     def get_std_format_args(self, bucket):
         return {
             'account_id': self.manager.config.account_id,
@@ -848,6 +888,8 @@ class EncryptionEnabledFilter(Filter):
                 filters:
                   - type: no-encryption-statement
     """
+
+    augment_keys = ('Policy',)
     schema = type_schema(
         'no-encryption-statement')
 
@@ -899,6 +941,8 @@ class MissingPolicyStatementFilter(Filter):
                       - RequiredEncryptedPutObject
     """
 
+    augment_keys = ('Policy',)
+
     schema = type_schema(
         'missing-policy-statement',
         aliases=('missing-statement',),
@@ -943,6 +987,8 @@ class BucketNotificationFilter(ValueFilter):
                     statement_ids: matched
     """
 
+    augment_keys = ('Notification',)
+
     schema = type_schema(
         'bucket-notification',
         required=['kind'],
@@ -1342,6 +1388,8 @@ class FilterPublicBlock(Filter):
                     BlockPublicPolicy: true
     """
 
+    augment_keys = ()
+
     schema = type_schema(
         'check-public-block',
         BlockPublicAcls={'type': 'boolean'},
@@ -2507,6 +2555,8 @@ class BucketTag(Tag):
                     value: us-east-1
     """
 
+    augment_keys = ()
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(self.manager.session_factory, resource_set, tags)
 
@@ -2532,6 +2582,8 @@ class MarkBucketForOp(TagDelayedAction):
                     days: 7
     """
 
+    augment_keys = ()
+
     schema = type_schema(
         'mark-for-op', rinherit=TagDelayedAction.schema)
 
@@ -2555,6 +2607,8 @@ class RemoveBucketTag(RemoveTag):
                     tags: ['BucketOwner']
     """
 
+    augment_keys = ()
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(
             self.manager.session_factory, resource_set, remove_tags=tags)
@@ -3164,6 +3218,8 @@ class BucketEncryption(KMSKeyResolverMixin, Filter):
                   - type: bucket-encryption
                     state: False
     """
+
+    augment_keys = ()
     schema = type_schema('bucket-encryption',
                          state={'type': 'boolean'},
                          crypto={'type': 'string', 'enum': ['AES256', 'aws:kms']},
@@ -3431,6 +3487,8 @@ class BucketOwnershipControls(BucketFilterBase, ValueFilter):
                   - type: ownership
                     value: empty
     """
+
+    augment_keys = ()
     schema = type_schema('ownership', rinherit=ValueFilter.schema, value={'oneOf': [
         {'type': 'string', 'enum': OWNERSHIP_CONTROLS + VALUE_FILTER_MAGIC_VALUES},
         {'type': 'array', 'items': {
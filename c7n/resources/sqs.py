@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 from botocore.exceptions import ClientError
 
+import functools
 import json
 import re
 
@@ -43,9 +44,11 @@ class DescribeQueue(DescribeSource):
                 raise
             return queue
 
-        with self.manager.executor_factory(max_workers=2) as w:
+        limiter = self.manager.get_augment_limiter(initial=2)
+        with self.manager.executor_factory(max_workers=limiter.maximum) as w:
             return universal_augment(
-                self.manager, list(filter(None, w.map(_augment, resources))))
+                self.manager, list(filter(None, w.map(
+                    functools.partial(limiter.call, _augment), resources))))
 
 
 class QueueConfigSource(ConfigSource):
@@ -1,7 +1,10 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import itertools
+import logging
 import operator
+import threading
+import time
 import zlib
 import jmespath
 import re
@@ -23,6 +26,8 @@ from c7n.resources.aws import shape_validate
 from c7n.resources.shield import IsEIPShieldProtected, SetEIPShieldProtection
 from c7n.filters.policystatement import HasStatementFilter
 
+log = logging.getLogger('custodian.vpc')
+
 
 @resources.register('vpc')
 class Vpc(query.QueryResourceManager):
@@ -724,6 +729,112 @@ class SecurityGroupPatch:
                        IpPermissions=[r for r in delta['added']])
 
 
+class SGUsageIndex:
+    """Index of the security groups referenced within an account and region.
+
+    Each of the usage filter's scanners is run once, concurrently with
+    the others, and its group ids are stored in the policy cache, so
+    later policies (and later runs within the cache period) only scan
+    for references the index doesn't have yet. Peering references are
+    likewise only looked up for groups not already checked.
+
+    Runs with caching disabled get a fresh index per filter evaluation.
+    The index only holds results, scans and lookups are made with the
+    calling filter's manager.
+    """
+
+    # (account id, region) -> (created, index)
+    indexes = {}
+    indexes_lock = threading.Lock()
+
+    def __init__(self, account_id, region):
+        self.account_id = account_id
+        self.region = region
+        self.lock = threading.Lock()
+        # scanner kind -> group ids
+        self.refs = {}
+        # group id -> whether its referenced from a peered vpc
+        self.peered = {}
+        # network interfaces from the last nics scan
+        self.nics = None
+
+    @classmethod
+    def get(cls, manager):
+        config = manager.config
+        key = (manager.account_id, config.region)
+        if not config.cache or not config.cache_period:
+            return cls(*key)
+        with cls.indexes_lock:
+            created, index = cls.indexes.get(key, (None, None))
+            if index is None or time.time() - created > config.cache_period * 60:
+                index = cls(*key)
+                cls.indexes[key] = (time.time(), index)
+            return index
+
+    def get_cache_key(self, kind, **kw):
+        key = {
+            'account': self.account_id,
+            'region': self.region,
+            'resource': 'sg-usage',
+            'kind': kind}
+        key.update(kw)
+        return key
+
+    def scan(self, manager, scanners):
+        """Return the group ids referenced by the given (kind, scanner) pairs."""
+        scanners = dict(scanners)
+        with self.lock:
+            pending = [k for k in scanners if k not in self.refs]
+            cache = manager._cache
+            with cache:
+                for kind, sg_ids in zip(
+                        pending, cache.get_many([self.get_cache_key(k) for k in pending])):
+                    if sg_ids is not None:
+                        self.refs[kind] = sg_ids
+                pending = [k for k in pending if k not in self.refs]
+                if pending:
+                    with manager.executor_factory(max_workers=len(pending)) as w:
+                        results = list(w.map(lambda k: scanners[k](), pending))
+                    self.refs.update(zip(pending, results))
+                    cache.save_many(
+                        [(self.get_cache_key(k), r) for k, r in zip(pending, results)])
+
+        used = set()
+        for kind in scanners:
+            sg_ids = self.refs[kind]
+            new_refs = sg_ids.difference(used)
+            used = used.union(sg_ids)
+            log.debug(
+                "%s using %d sgs, new refs %s total %s",
+                kind, len(sg_ids), len(new_refs), len(used))
+        return used
+
+    def get_peered(self, manager, group_ids):
+        """Return the subset of group ids referenced across vpc peering connections."""
+        with self.lock:
+            pending = [g for g in group_ids if g not in self.peered]
+            cache = manager._cache
+            with cache:
+                for gid, peered in zip(pending, cache.get_many(
+                        [self.get_cache_key('peered', id=g) for g in pending])):
+                    if peered is not None:
+                        self.peered[gid] = peered
+                pending = [g for g in pending if g not in self.peered]
+                if pending:
+                    client = local_session(manager.session_factory).client('ec2')
+                    with manager.executor_factory(max_workers=3) as w:
+                        results = w.map(
+                            lambda gids: client.describe_security_group_references(
+                                GroupId=gids)['SecurityGroupReferenceSet'],
+                            chunks(pending, 200))
+                        peered_ids = {ref['GroupId'] for refs in results for ref in refs}
+                    results = {g: g in peered_ids for g in pending}
+                    self.peered.update(results)
+                    cache.save_many(
+                        [(self.get_cache_key('peered', id=g), v) for g, v in results.items()])
+        return {g for g in group_ids if self.peered[g]}
+
+
 class SGUsage(Filter):
 
     def get_permissions(self):
@@ -733,17 +844,15 @@ class SGUsage(Filter):
              ['lambda', 'eni', 'launch-config', 'security-group', 'event-rule-target',
               'aws.batch-compute']]))
 
+    def get_index(self):
+        return SGUsageIndex.get(self.manager)
+
     def filter_peered_refs(self, resources):
         if not resources:
             return resources
         # Check that groups are not referenced across accounts
-        client = local_session(self.manager.session_factory).client('ec2')
-        peered_ids = set()
-        for resource_set in chunks(resources, 200):
-            for sg_ref in client.describe_security_group_references(
-                    GroupId=[r['GroupId'] for r in resource_set]
-            )['SecurityGroupReferenceSet']:
-                peered_ids.add(sg_ref['GroupId'])
+        peered_ids = self.get_index().get_peered(
+            self.manager, [r['GroupId'] for r in resources])
         self.log.debug(
             "%d of %d groups w/ peered refs", len(peered_ids), len(resources))
         return [r for r in resources if r['GroupId'] not in peered_ids]
@@ -760,15 +869,14 @@ class SGUsage(Filter):
         )
 
     def scan_groups(self):
-        used = set()
-        for kind, scanner in self.get_scanners():
-            sg_ids = scanner()
-            new_refs = sg_ids.difference(used)
-            used = used.union(sg_ids)
-            self.log.debug(
-                "%s using %d sgs, new refs %s total %s",
-                kind, len(sg_ids), len(new_refs), len(used))
-
+        index = self.get_index()
+        self.nics = None
+        used = index.scan(self.manager, self.get_scanners())
+        # keep the enis with the index, for used filters whose scan it serves.
+        if self.nics is None:
+            self.nics = index.nics
+        else:
+            index.nics = self.nics
         return used
 
     def get_launch_config_sgs(self):
@@ -925,7 +1033,11 @@ class UsedSecurityGroup(SGUsage):
 
     def _get_eni_attributes(self):
         enis = []
-        for nic in self.nics:
+        # nics aren't known when the index's references came from the cache
+        nics = getattr(self, 'nics', None)
+        if nics is None:
+            nics = self.manager.get_resource_manager('eni').resources()
+        for nic in nics:
             if nic['Status'] == 'in-use':
                 if nic.get('Attachment'):
                     instance_owner_id = nic['Attachment']['InstanceOwnerId']
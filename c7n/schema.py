@@ -15,12 +15,23 @@ All filters and actions are annotated with schema typically using
 the utils.type_schema function.
 """
 from collections import Counter
+import hashlib
 import json
 import inspect
 import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from importlib import metadata as pkgmd
+except ImportError:  # pragma: no cover
+    pkgmd = None
 
 from jsonschema import Draft7Validator as JsonSchemaValidator
-from jsonschema.exceptions import best_match
+from jsonschema.exceptions import ValidationError, best_match
 
 from c7n.policy import execution
 from c7n.provider import clouds
@@ -36,14 +47,21 @@ from c7n.filters.core import (
     VALUE_TYPES,
 )
 from c7n.structure import StructureParser # noqa
+from c7n.utils import dumps, loads
+from c7n.version import version as c7n_version
+
+log = logging.getLogger('custodian.schema')
+
+# Generated schemas are cached here keyed by the installed c7n and plugin
+# versions and sources, set C7N_SCHEMA_CACHE to an empty value to disable.
+SCHEMA_CACHE = '~/.cache/cloud-custodian-schema'
 
 
 def validate(data, schema=None, resource_types=()):
     if schema is None:
-        schema = generate(resource_types)
-        JsonSchemaValidator.check_schema(schema)
-
-    validator = JsonSchemaValidator(schema)
+        validator = get_validator(tuple(sorted(resource_types)))
+    else:
+        validator = PolicyValidator(schema)
     errors = list(validator.iter_errors(data))
     if not errors:
         return check_unique(data) or []
@@ -65,6 +83,320 @@ def validate(data, schema=None, resource_types=()):
     ]))
 
 
+class PolicyValidator:
+    """Validate policy files against a generated schema.
+
+    Equivalent to validating against the schema directly, but each policy
+    is checked against its own resource's definition rather than the
+    schema's anyOf over every resource type, and each filter and action
+    against the definitions matching its type before all of them. Errors
+    are still reported from a full validation of the failing policy.
+    """
+
+    block_ops = ('and', 'or', 'not')
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.validator = JsonSchemaValidator(schema)
+        items = schema['properties']['policies']['items']
+        self.policy_validator = self.validator.evolve(schema=items)
+        # resource name or alias -> (anyOf index, validator, element checks)
+        self.resource_validators = {}
+        for idx, ref in enumerate(items.get('anyOf', ())):
+            type_name = ref['$ref'].rsplit('/', 2)[1]
+            rvalidator = self.validator.evolve(schema=ref)
+            rdef = schema['definitions']['resources'][type_name]['policy']
+            checks = None
+            for name in rdef['allOf'][1]['properties']['resource']['enum']:
+                if name not in self.resource_validators:
+                    checks = checks or self.get_checks(rdef)
+                    self.resource_validators[name] = (idx, rvalidator, checks)
+
+    def resolve(self, ref):
+        current = self.schema
+        for part in ref.split('/')[1:]:
+            current = current[part]
+        return current
+
+    def get_checks(self, rdef):
+        """Validators for a resource's policies keyed on element type."""
+        props = rdef['allOf'][1]['properties']
+        base = self.validator.evolve(schema={'allOf': [
+            rdef['allOf'][0],
+            dict(rdef['allOf'][1], properties=dict(
+                props, filters={'type': 'array'}, actions={'type': 'array'}))]})
+        checks = {'policy': base}
+        for kind in ('filters', 'actions'):
+            by_type = checks[kind] = {}
+            for element in props[kind]['items']['anyOf']:
+                if 'enum' in element:
+                    key = str
+                elif 'properties' in element and set(element['properties']) & set(
+                        self.block_ops):
+                    continue
+                else:
+                    target = '$ref' in element and self.resolve(element['$ref']) or element
+                    key = target.get('properties', {}).get('type', {}).get('enum', [None])[0]
+                by_type.setdefault(key, []).append(self.validator.evolve(schema=element))
+            by_type['*'] = self.validator.evolve(schema=props[kind]['items'])
+        return checks
+
+    def is_valid_element(self, checks, element, blocks=False):
+        """Whether a filter or action is valid, blocks only apply to filters."""
+        if isinstance(element, str):
+            candidates = checks.get(str, ())
+        elif isinstance(element, dict):
+            if blocks and len(element) == 1 and next(iter(element)) in self.block_ops:
+                block = next(iter(element.values()))
+                if isinstance(block, list) and all(
+                        self.is_valid_element(checks, e, blocks) for e in block):
+                    return True
+                candidates = ()
+            else:
+                etype = element.get('type')
+                candidates = checks.get(
+                    isinstance(etype, str) and etype or None, []) + checks.get(None, [])
+        else:
+            candidates = ()
+        for v in candidates:
+            if v.is_valid(element):
+                return True
+        return checks['*'].is_valid(element)
+
+    def is_valid_policy(self, checks, policy):
+        if not checks['policy'].is_valid(policy):
+            return False
+        for kind in ('filters', 'actions'):
+            for element in policy.get(kind) or ():
+                if not self.is_valid_element(checks[kind], element, kind == 'filters'):
+                    return False
+        return True
+
+    def iter_errors(self, data):
+        policies = isinstance(data, dict) and data.get('policies')
+        if not isinstance(policies, list):
+            yield from self.validator.iter_errors(data)
+            return
+        yield from self.validator.iter_errors(dict(data, policies=[]))
+
+        items = self.schema['properties']['policies']['items']
+        for pidx, p in enumerate(policies):
+            resource = isinstance(p, dict) and p.get('resource')
+            if not isinstance(resource, str) or resource not in self.resource_validators:
+                for e in self.policy_validator.iter_errors(p):
+                    e.path.extendleft((pidx, 'policies'))
+                    e.schema_path.extendleft(('items', 'policies', 'properties'))
+                    yield e
+                continue
+            ridx, validator, checks = self.resource_validators[resource]
+            if self.is_valid_policy(checks, p):
+                continue
+            context = list(validator.iter_errors(p))
+            if not context:
+                continue
+            for e in context:
+                e.schema_path.appendleft(ridx)
+            # report in the same form as the schema's anyOf would
+            yield ValidationError(
+                "%r is not valid under any of the given schemas" % (p,),
+                validator='anyOf', validator_value=items['anyOf'],
+                instance=p, schema=items, path=('policies', pidx),
+                schema_path=('properties', 'policies', 'items', 'anyOf'),
+                context=context)
+
+_validators = {}
+_validators_lock = threading.Lock()
+
+
+def get_validator(resource_types=()):
+    """Return a policy validator for the given resource types.
+
+    Validators are reused within the process, and their schemas across
+    processes via an on disk cache keyed by the installed versions and
+    sources of the resources and elements they describe.
+    """
+    key = get_schema_cache_key(resource_types)
+    with _validators_lock:
+        validator = _validators.get(key)
+    if validator is not None:
+        return validator
+
+    cache_dir = get_cache_dir()
+    cache_path = cache_dir and os.path.join(cache_dir, '%s.json' % key)
+    schema = cache_path and _read_schema(cache_path)
+    if schema is None:
+        schema = generate(resource_types)
+        JsonSchemaValidator.check_schema(schema)
+        if cache_path:
+            _write_schema(cache_path, schema)
+
+    validator = PolicyValidator(schema)
+    with _validators_lock:
+        _validators[key] = validator
+    return validator
+
+
+def get_cache_dir():
+    cache_dir = os.environ.get('C7N_SCHEMA_CACHE', SCHEMA_CACHE)
+    return cache_dir and os.path.expanduser(cache_dir) or None
+
+
+def get_validated_path(data, resource_types=()):
+    """Path marking policy data as valid against the current schema.
+
+    Policy data which validated once is skipped on subsequent runs until
+    either it or the schema for its resource types changes.
+    """
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return None
+    key = hashlib.sha256(('%s:%r' % (
+        get_schema_cache_key(resource_types), data)).encode('utf8')).hexdigest()
+    return os.path.join(cache_dir, 'validated', key)
+
+
+def validate_cached(data, resource_types=()):
+    """Schema validate policy data, skipping data which validated before.
+
+    Used when loading policy files from the cli, a marker is written in
+    the schema cache directory for valid data so unchanged files skip
+    validation on subsequent runs.
+    """
+    validated = get_validated_path(data, tuple(sorted(resource_types)))
+    if validated and _is_validated(validated):
+        return []
+    errors = validate(data, resource_types=resource_types)
+    if not errors and validated:
+        _write_validated(validated)
+    return errors
+
+
+# Validation markers expire after this many seconds, and the oldest are
+# pruned past the maximum count.
+VALIDATED_TTL = 7 * 24 * 60 * 60
+VALIDATED_MAX = 10000
+
+_validated_pruned = set()
+
+
+def _is_validated(path):
+    try:
+        return time.time() - os.stat(path).st_mtime < VALIDATED_TTL
+    except OSError:
+        return False
+
+
+def _write_validated(path):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+    except OSError as e:
+        log.debug("unable to cache policy validation %s", e)
+        return
+    _prune_validated(os.path.dirname(path))
+
+
+def _prune_validated(validated_dir):
+    """Remove expired markers, and the oldest past the maximum, once per process."""
+    if validated_dir in _validated_pruned:
+        return
+    _validated_pruned.add(validated_dir)
+    try:
+        markers = []
+        for entry in os.scandir(validated_dir):
+            markers.append((entry.stat().st_mtime, entry.path))
+        markers.sort(reverse=True)
+        now = time.time()
+        for idx, (mtime, path) in enumerate(markers):
+            if idx >= VALIDATED_MAX or now - mtime >= VALIDATED_TTL:
+                os.unlink(path)
+    except OSError as e:
+        log.debug("unable to prune policy validation cache %s", e)
+
+
+_schema_keys = {}
+
+
+def get_schema_cache_key(resource_types=()):
+    """Fingerprint the inputs of schema generation for the given resource types.
+
+    Covers the resource classes, their filters and actions, and execution
+    modes by path, along with the versions of the packages providing them
+    and the modification times of their loaded sources, so development
+    changes invalidate the cache as well as upgrades.
+
+    Computed once per process for the set of loaded modules.
+    """
+    memo_key = (tuple(resource_types), len(sys.modules))
+    key = _schema_keys.get(memo_key)
+    if key is None:
+        key = _schema_keys[memo_key] = _get_schema_cache_key(resource_types)
+    return key
+
+
+def _get_schema_cache_key(resource_types):
+    paths = {'modes': execution.paths()}
+    elements = list(paths['modes'].values())
+    for type_name, resource_type in _schema_resources(resource_types):
+        rpaths = paths[type_name] = {
+            'resource': '%s.%s' % (resource_type.__module__, resource_type.__qualname__),
+            'aliases': resource_type.type_aliases,
+            'actions': resource_type.action_registry.paths(),
+            'filters': resource_type.filter_registry.paths()}
+        elements.append(rpaths['resource'])
+        elements.extend(rpaths['actions'].values())
+        elements.extend(rpaths['filters'].values())
+
+    modules = {m for m in sys.modules if m.split('.', 1)[0].startswith('c7n')}
+    modules.update(path.rsplit('.', 1)[0] for path in elements)
+    sources = {}
+    for m in sorted(modules):
+        source = getattr(sys.modules.get(m), '__file__', None)
+        if source:
+            try:
+                sources[m] = os.stat(source).st_mtime_ns
+            except OSError:
+                continue
+    versions = {p: _package_version(p) for p in {m.split('.', 1)[0] for m in modules}}
+    fingerprint = dumps([c7n_version, versions, sources, paths], indent=None)
+    return hashlib.sha256(fingerprint.encode('utf8')).hexdigest()
+
+
+_versions = {}
+
+
+def _package_version(package):
+    if package not in _versions:
+        version = None
+        if pkgmd is not None:
+            try:
+                version = pkgmd.version(package.replace('_', '-'))
+            except pkgmd.PackageNotFoundError:
+                pass
+        _versions[package] = version
+    return _versions[package]
+
+
+def _read_schema(path):
+    try:
+        with open(path, encoding='utf8') as fh:
+            return loads(fh.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_schema(path, schema):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf8') as fh:
+            fh.write(dumps(schema))
+        # atomic so concurrent processes never read a partial schema
+        os.replace(tmp_path, path)
+    except (OSError, TypeError) as e:
+        log.debug("unable to cache schema %s", e)
+
+
 def check_unique(data):
     counter = Counter([p['name'] for p in data.get('policies', [])])
     for k, v in list(counter.items()):
@@ -330,37 +662,28 @@ def generate(resource_types=()):
     }
 
     resource_refs = []
-    for cloud_name, cloud_type in sorted(clouds.items()):
-        for type_name, resource_type in sorted(cloud_type.resources.items()):
-            r_type_name = "%s.%s" % (cloud_name, type_name)
-            if resource_types and r_type_name not in resource_types:
-                if not resource_type.type_aliases:
-                    continue
-                elif not {"%s.%s" % (cloud_name, ralias) for ralias
-                        in resource_type.type_aliases}.intersection(
-                        resource_types):
-                    continue
-
-            aliases = []
-            if resource_type.type_aliases:
-                aliases.extend(["%s.%s" % (cloud_name, a) for a in resource_type.type_aliases])
-                # aws gets legacy aliases with no cloud prefix
-                if cloud_name == 'aws':
-                    aliases.extend(resource_type.type_aliases)
-
-            # aws gets additional alias for default name
+    for r_type_name, resource_type in _schema_resources(resource_types):
+        cloud_name, type_name = r_type_name.split('.', 1)
+        aliases = []
+        if resource_type.type_aliases:
+            aliases.extend(["%s.%s" % (cloud_name, a) for a in resource_type.type_aliases])
+            # aws gets legacy aliases with no cloud prefix
             if cloud_name == 'aws':
-                aliases.append(type_name)
-
-            resource_refs.append(
-                process_resource(
-                    r_type_name,
-                    resource_type,
-                    resource_defs,
-                    aliases,
-                    definitions,
-                    cloud_name
-                ))
+                aliases.extend(resource_type.type_aliases)
+
+        # aws gets additional alias for default name
+        if cloud_name == 'aws':
+            aliases.append(type_name)
+
+        resource_refs.append(
+            process_resource(
+                r_type_name,
+                resource_type,
+                resource_defs,
+                aliases,
+                definitions,
+                cloud_name
+            ))
 
     schema = {
         "$schema": "http://json-schema.org/draft-07/schema#",
@@ -385,6 +708,21 @@ def generate(resource_types=()):
     return schema
 
 
+def _schema_resources(resource_types=()):
+    """Resource types included in a schema, qualified name and class."""
+    for cloud_name, cloud_type in sorted(clouds.items()):
+        for type_name, resource_type in sorted(cloud_type.resources.items()):
+            r_type_name = "%s.%s" % (cloud_name, type_name)
+            if resource_types and r_type_name not in resource_types:
+                if not resource_type.type_aliases:
+                    continue
+                elif not {"%s.%s" % (cloud_name, ralias) for ralias
+                        in resource_type.type_aliases}.intersection(
+                        resource_types):
+                    continue
+            yield r_type_name, resource_type
+
+
 def process_resource(
         type_name, resource_type, resource_defs, aliases=None,
         definitions=None, provider_name=None):
@@ -72,6 +72,11 @@ def universal_augment(self, resources):
     if not resources:
         return resources
 
+    # Skip tags that a selectively augmented policy doesn't reference
+    augment_keys = self.get_augment_keys()
+    if augment_keys is not None and 'Tags' not in augment_keys:
+        return resources
+
     # For global resources, tags don't populate in the get_resources call
     # unless the call is being made to us-east-1
     region = getattr(self.resource_type, 'global_resource', None) and 'us-east-1' or self.region
@@ -262,6 +267,8 @@ class TagActionFilter(Filter):
             - type: stop
 
     """
+
+    augment_keys = ('Tags',)
     schema = utils.type_schema(
         'marked-for-op',
         tag={'type': 'string'},
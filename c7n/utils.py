@@ -1,5 +1,6 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+from contextlib import contextmanager
 import copy
 from datetime import datetime, timedelta
 from dateutil.tz import tzutc
@@ -34,6 +35,13 @@ else:
     except ImportError:  # pragma: no cover
         from yaml import SafeLoader, SafeDumper as BaseSafeDumper
 
+# Optional accelerated json backend, see dumps for how its output differs
+# from the stdlib encoder's.
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 class SafeDumper(BaseSafeDumper or object):
     def ignore_aliases(self, data):
@@ -86,16 +94,124 @@ def yaml_dump(value):
 
 
 def loads(body):
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # stdlib is more lenient, ie. NaN and integers beyond 64 bits
+            pass
     return json.loads(body)
 
 
+_INDENT = re.compile('\n +')
+_NON_ASCII = re.compile('[^\x00-\x7e]')
+
+
+def _escape_non_ascii(match):
+    # as the stdlib's ensure_ascii, astral characters as surrogate pairs
+    c = ord(match.group())
+    if c > 0xffff:
+        c -= 0x10000
+        return '\\u%04x\\u%04x' % (0xd800 | (c >> 10), 0xdc00 | (c & 0x3ff))
+    return '\\u%04x' % c
+
+
+def _dumps_fast(data, indent):
+    """Encode with orjson, matching the stdlib's output for indent 0 and 2.
+
+    With indent None output is compact. Returns None for values orjson
+    can't encode (ie. integers beyond 64 bits) so callers can fall back.
+    """
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if indent is not None:
+        option |= orjson.OPT_INDENT_2
+    try:
+        dumped = orjson.dumps(data, default=json_default, option=option).decode('utf8')
+    except TypeError:
+        return None
+    # encoded strings never contain a raw newline, so any newline
+    # followed by spaces is indentation.
+    if indent == 0:
+        dumped = _INDENT.sub('\n', dumped)
+    if not dumped.isascii():
+        dumped = _NON_ASCII.sub(_escape_non_ascii, dumped)
+    return dumped
+
+
+def _dumps_line(data):
+    dumped = orjson is not None and _dumps_fast(data, None) or None
+    if dumped is None:
+        dumped = json.dumps(data, cls=DateTimeEncoder, separators=(',', ':'))
+    return dumped
+
+
 def dumps(data, fh=None, indent=0):
+    """Serialize data to json, writing it to fh if given.
+
+    With orjson installed, indents of 0 and 2 are encoded with it. The
+    output then matches the stdlib encoder's, except for floats: NaN
+    and infinities are written as null rather than the non standard
+    NaN/Infinity tokens, and exponents are written without a plus sign
+    (1e16 rather than 1e+16).
+    """
+    if orjson is not None and indent in (0, 2):
+        dumped = _dumps_fast(data, indent)
+        if dumped is not None:
+            if not fh:
+                return dumped
+            fh.write(dumped)
+            return
     if fh:
         return json.dump(data, fh, cls=DateTimeEncoder, indent=indent)
     else:
         return json.dumps(data, cls=DateTimeEncoder, indent=indent)
 
 
+def write_records(fh, records, indent=2, lines=False):
+    """Serialize records to a file handle incrementally.
+
+    Writes a json array, or with lines one json document per line,
+    without building the entire document in memory.
+    """
+    if lines:
+        for r in records:
+            fh.write(_dumps_line(r))
+            fh.write('\n')
+        return
+    if orjson is None or indent != 2:
+        for chunk in DateTimeEncoder(indent=indent).iterencode(records):
+            fh.write(chunk)
+        return
+    # nest each record one level deeper by re-indenting its lines
+    sep = '[\n  '
+    for r in records:
+        fh.write(sep)
+        fh.write(dumps(r, indent=2).replace('\n', '\n  '))
+        sep = ',\n  '
+    fh.write(sep == '[\n  ' and '[]' or '\n]')
+
+
+def read_records(fh, lines=False):
+    """Deserialize records written by write_records."""
+    if not lines:
+        return loads(fh.read())
+    return [loads(line) for line in fh if line.strip()]
+
+
+def iter_records(fh, lines=False):
+    """Deserialize records written by write_records incrementally.
+
+    Only json lines records are parsed as they are read, a json
+    array is loaded whole.
+    """
+    if not lines:
+        yield from loads(fh.read())
+        return
+    for line in fh:
+        if line.strip():
+            yield loads(line)
+
+
 def format_event(evt):
     return json.dumps(evt, indent=2)
 
@@ -131,6 +247,11 @@ def parse_date(v, tz=None):
         return v
 
     if isinstance(v, str) and not v.isdigit():
+        # api timestamps are iso 8601, which the stdlib parses far faster
+        try:
+            return datetime.fromisoformat(v).astimezone(tz)
+        except ValueError:
+            pass
         try:
             return parse(v).astimezone(tz)
         except (AttributeError, TypeError, ValueError, OverflowError):
@@ -208,14 +329,19 @@ def type_schema(
     return s
 
 
+def json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, FormatDate):
+        return obj.datetime.isoformat()
+    raise TypeError(
+        f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+
 class DateTimeEncoder(json.JSONEncoder):
 
     def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, FormatDate):
-            return obj.datetime.isoformat()
-        return json.JSONEncoder.default(self, obj)
+        return json_default(obj)
 
 
 def group_by(resources, key):
@@ -420,6 +546,57 @@ def snapshot_identifier(prefix, db_identifier):
 
 retry_log = logging.getLogger('c7n.retry')
 
+RETRY_OBSERVER = threading.local()
+
+
+@contextmanager
+def observe_retries(callback):
+    """Invoke callback with the error code of each retry on the current thread.
+
+    Lets callers adjust their request rate to the throttling seen by
+    :func:`get_retry`, and by botocore's retries on sessions from a
+    :class:`c7n.credentials.SessionFactory`, without changing how api
+    calls are retried.
+    """
+    previous = getattr(RETRY_OBSERVER, 'callback', None)
+    RETRY_OBSERVER.callback = callback
+    try:
+        yield
+    finally:
+        RETRY_OBSERVER.callback = previous
+
+
+def observe_botocore_retry(response=None, **kwargs):
+    """needs-retry event handler, reporting botocore's own retries to observers.
+
+    Never affects whether botocore retries.
+    """
+    observer = getattr(RETRY_OBSERVER, 'callback', None)
+    if observer is None or not response:
+        return
+    code = response[1].get('Error', {}).get('Code')
+    if code:
+        observer(code)
+
+
+def emit_retry(func, code, delay):
+    """Emit a c7n-retry event on the client of a retried api call.
+
+    Lets session event subscribers (ie. api stats) account retries and
+    the backoff time slept per operation.
+    """
+    meta = getattr(getattr(func, '__self__', None), 'meta', None)
+    mapping = getattr(meta, 'method_to_api_mapping', None)
+    if not isinstance(mapping, dict) or func.__name__ not in mapping:
+        return
+    meta.events.emit(
+        'c7n-retry.%s.%s' % (
+            meta.service_model.service_id.hyphenize(), mapping[func.__name__]),
+        service=meta.service_model.endpoint_prefix,
+        operation=mapping[func.__name__],
+        code=code,
+        delay=delay)
+
 
 def get_retry(retry_codes=(), max_attempts=8, min_delay=1, log_retries=False):
     """Decorator for retry boto3 api call on transient errors.
@@ -453,6 +630,10 @@ def get_retry(retry_codes=(), max_attempts=8, min_delay=1, log_retries=False):
                     raise
                 elif idx == max_attempts - 1:
                     raise
+                observer = getattr(RETRY_OBSERVER, 'callback', None)
+                if observer is not None:
+                    observer(e.response['Error']['Code'])
+                emit_retry(func, e.response['Error']['Code'], delay)
                 if log_retries:
                     retry_log.log(
                         log_retries,
@@ -680,6 +861,67 @@ def get_proxy_url(url):
     return None
 
 
+class LooseVersion:
+    """Version numbers of arbitrary form, compared component wise.
+
+    Equivalent to the deprecated distutils LooseVersion, which is slow to
+    import and unavailable on newer pythons.
+    """
+
+    component_re = re.compile(r'(\d+ | [a-z]+ | \.)', re.VERBOSE)
+
+    def __init__(self, vstring=None):
+        if vstring:
+            self.parse(vstring)
+
+    def parse(self, vstring):
+        self.vstring = vstring
+        components = [x for x in self.component_re.split(vstring) if x and x != '.']
+        for i, obj in enumerate(components):
+            try:
+                components[i] = int(obj)
+            except ValueError:
+                pass
+        self.version = components
+
+    def __str__(self):
+        return self.vstring
+
+    def __repr__(self):
+        return "LooseVersion ('%s')" % str(self)
+
+    def _cmp(self, other):
+        if isinstance(other, str):
+            other = LooseVersion(other)
+        elif not isinstance(other, LooseVersion):
+            return NotImplemented
+        if self.version == other.version:
+            return 0
+        if self.version < other.version:
+            return -1
+        return 1
+
+    def __eq__(self, other):
+        c = self._cmp(other)
+        return c if c is NotImplemented else c == 0
+
+    def __lt__(self, other):
+        c = self._cmp(other)
+        return c if c is NotImplemented else c < 0
+
+    def __le__(self, other):
+        c = self._cmp(other)
+        return c if c is NotImplemented else c <= 0
+
+    def __gt__(self, other):
+        c = self._cmp(other)
+        return c if c is NotImplemented else c > 0
+
+    def __ge__(self, other):
+        c = self._cmp(other)
+        return c if c is NotImplemented else c >= 0
+
+
 class FormatDate:
     """a datetime wrapper with extended pyformat syntax"""
 
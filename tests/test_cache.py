@@ -6,6 +6,7 @@ import os
 import pickle
 import sqlite3
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
 import pytest
@@ -99,3 +100,200 @@ def test_sqlkv_convert(tmp_path):
     kv.close()
     with open(cache_path, 'rb') as fh:
         assert fh.read(15) == b"SQLite format 3"
+
+
+def test_shared_resource_cache(tmp_path):
+    kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
+    store = {}
+    shared = cache.SharedResourceCache(kv.config, kv, store)
+    k1 = {"account": "12345678901234", "region": "us-west-2", "resource": "ec2"}
+    v1 = [{'id': 'a'}, {'id': 'b'}]
+
+    with shared:
+        assert shared.get(k1) is None
+        shared.save(k1, v1)
+        assert len(store) == 1
+        # writes through to the configured cache
+        assert kv.get(k1) == v1
+        r1 = shared.get(k1)
+        assert r1 == v1
+        r1[0]['annotated'] = True
+        assert shared.get(k1) == v1
+    assert kv.conn is None
+
+
+def test_sqlkv_concurrent_init(tmp_path):
+    cache_path = tmp_path / "cache.db"
+    kv1 = cache.SqlKvCache(config.Bag(cache=cache_path, cache_period=60))
+    kv2 = cache.SqlKvCache(config.Bag(cache=cache_path, cache_period=60))
+    # a newly created database file is empty until its first write
+    open(cache_path, 'wb').close()
+    kv1.conn = sqlite3.connect(kv1.cache_path)
+    kv2.load()
+    kv1.conn.execute(kv1.create_table)
+    assert os.path.exists(cache_path)
+    kv2.save({'a': 'b'}, [1, 2])
+    assert kv1.get({'a': 'b'}) == [1, 2]
+    kv1.close()
+    kv2.close()
+
+
+def test_threaded_access(tmp_path):
+    cache_path = tmp_path / "cache.db"
+
+    def worker(idx):
+        with cache.SqlKvCache(config.Bag(cache=cache_path, cache_period=60)) as kv:
+            kv.save({'idx': idx}, [idx])
+            return kv.get({'idx': idx})
+
+    with ThreadPoolExecutor(max_workers=4) as w:
+        assert list(w.map(worker, range(8))) == [[i] for i in range(8)]
+
+    # a single cache instance uses a connection per thread
+    kv = cache.SqlKvCache(config.Bag(cache=cache_path, cache_period=60))
+
+    def reader(idx):
+        with kv:
+            return kv.get({'idx': idx})
+
+    with ThreadPoolExecutor(max_workers=4) as w:
+        assert list(w.map(reader, range(8))) == [[i] for i in range(8)]
+    assert kv.conns == []
+
+
+def test_sqlkv_close_all(tmp_path):
+    kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
+    kv.load()
+    with ThreadPoolExecutor(max_workers=2) as w:
+        w.submit(kv.load).result()
+        w.submit(kv.load).result()
+    conns = list(kv.conns)
+    assert len(conns) >= 2
+    kv.close()
+    assert kv.conns == [] and kv.conn is None
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('select 1')
+
+
+def test_sqlkv_many(tmp_path):
+    kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
+    kv.batch_size = 2
+    with kv:
+        keys = [{'rds-pg': 'pg-%d' % i} for i in range(5)]
+        kv.save_many([(k, [k['rds-pg']]) for k in keys[:3]])
+        kv.save(keys[3], [], datetime.utcnow() - timedelta(days=1))
+        assert kv.get_many(keys) == [['pg-0'], ['pg-1'], ['pg-2'], None, None]
+        kv.save(keys[4], [])
+        assert kv.get(keys[4]) == []
+        journal_mode, = kv.conn.execute('pragma journal_mode').fetchone()
+        assert journal_mode == 'wal'
+
+
+def test_sqlkv_bulk_expiry(tmp_path):
+    kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
+    kv.load()
+    kv.save({'a': 'b'}, 1, datetime.utcnow() - timedelta(days=1))
+    kv.close()
+
+    # expiry is done at most once per cache period within a process
+    kv.load()
+    assert kv.conn.execute('select count(*) from c7n_cache').fetchone() == (1,)
+    kv.expire(force=True)
+    assert kv.conn.execute('select count(*) from c7n_cache').fetchone() == (0,)
+    kv.close()
+
+
+def test_base_many():
+    mem_cache = cache.InMemoryCache({})
+    mem_cache.save_many([({'many': 1}, 'a'), ({'many': 2}, 'b')])
+    assert mem_cache.get_many([{'many': 2}, {'many': 3}]) == ['b', None]
+
+
+def test_sqlkv_compressed(tmp_path):
+    kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
+    with kv:
+        v1 = [{'InstanceId': 'i-%d' % i, 'State': 'running'} for i in range(100)]
+        kv.save({'k': 1}, v1)
+        value, = kv.conn.execute('select value from c7n_cache').fetchone()
+        assert len(value) < len(pickle.dumps(v1))
+        assert kv.get({'k': 1}) == v1
+
+        # entries from prior versions are uncompressed
+        with kv.conn as cursor:
+            cursor.execute(
+                'replace into c7n_cache (key, value, create_date) values (?, ?, ?)',
+                (cache.encode({'k': 2}), pickle.dumps(v1), datetime.utcnow()))
+        assert kv.get({'k': 2}) == v1
+
+
+class FakeRedis:
+    """Stand in for a redis client, supporting the commands the cache uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.closed = False
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakePipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+
+    def execute(self):
+        for key, value, ex in self.commands:
+            self.client.data[key] = value
+            self.client.ttls[key] = ex
+
+
+def test_redis_factory(monkeypatch):
+    test_config = config.Bag(cache='redis://localhost:6379/0', cache_period=15)
+    monkeypatch.setattr(cache, 'redis', None)
+    with pytest.raises(RuntimeError, match='c7n\\[redis\\]'):
+        cache.factory(test_config)
+    monkeypatch.setattr(cache, 'redis', object())
+    assert isinstance(cache.factory(test_config), cache.RedisCache)
+    assert cache.is_cache_url('rediss://cache.example.com:6380')
+    assert not cache.is_cache_url('~/.cache/cloud-custodian.cache')
+
+
+def test_redis_cache():
+    client = FakeRedis()
+    rcache = cache.RedisCache(
+        config.Bag(cache='redis://localhost:6379/0', cache_period=15), client)
+    with rcache:
+        rcache.save({'region': 'us-east-1'}, {'hello': 'world'})
+        rcache.save_many([({'many': i}, i) for i in range(3)])
+        assert rcache.get({'region': 'us-east-1'}) == {'hello': 'world'}
+        assert rcache.get_many([{'many': 0}, {'many': 2}, {'many': 3}]) == [0, 2, None]
+        assert set(client.ttls.values()) == {900}
+        assert all(k.startswith(b'c7n:') for k in client.data)
+    assert client.closed
+
+
+def test_redis_cache_unavailable():
+    class BrokenRedis(FakeRedis):
+        def mget(self, keys):
+            raise cache.RedisError('connection refused')
+
+        def pipeline(self, transaction=True):
+            raise cache.RedisError('connection refused')
+
+    rcache = cache.RedisCache(
+        config.Bag(cache='redis://localhost:6379/0', cache_period=15), BrokenRedis())
+    rcache.save({'a': 1}, 'b')
+    assert rcache.get_many([{'a': 1}, {'a': 2}]) == [None, None]
@@ -3,6 +3,7 @@
 import json
 import os
 import sys
+import time
 
 from argparse import ArgumentTypeError
 from datetime import datetime, timedelta
@@ -513,6 +514,90 @@ class RunTest(CliTest):
             ]
         )
 
+    def test_policy_concurrency(self):
+        from c7n.policy import Policy
+
+        def run_policy(p):
+            with p.ctx:
+                p.log.warning("policy:%s executing", p.name)
+                time.sleep(0.05)
+                # records of the policy's worker threads go to its log
+                with p.resource_manager.executor_factory(max_workers=1) as w:
+                    w.submit(p.log.warning, "policy:%s worker", p.name).result()
+                p.log.warning("policy:%s executed", p.name)
+
+        self.patch(Policy, "__call__", run_policy)
+
+        temp_dir = self.get_temp_dir()
+        names = ("ec2-running", "ec2-all", "ebs-all")
+        yaml_file = self.write_policy_file(
+            {
+                "policies": [
+                    {"name": "ec2-running", "resource": "ec2",
+                     "filters": [{"State.Name": "running"}]},
+                    {"name": "ec2-all", "resource": "ec2"},
+                    {"name": "ebs-all", "resource": "ebs"},
+                ]
+            }
+        )
+        self.run_and_expect_success(
+            [
+                "custodian",
+                "run",
+                "--cache",
+                temp_dir + "/cache",
+                "--policy-concurrency",
+                "2",
+                "-s",
+                temp_dir,
+                yaml_file,
+            ]
+        )
+        for name in names:
+            with open(os.path.join(temp_dir, name, "custodian-run.log")) as fh:
+                policy_log = fh.read()
+            self.assertIn("policy:%s executed" % name, policy_log)
+            self.assertIn("policy:%s worker" % name, policy_log)
+            for other in set(names).difference((name,)):
+                self.assertNotIn("policy:%s " % other, policy_log)
+
+    def test_region_concurrency_logs(self):
+        from c7n.policy import Policy
+
+        def run_policy(p):
+            with p.ctx:
+                tag = "%s/%s" % (p.options.region, p.name)
+                with p.resource_manager.executor_factory(max_workers=1) as w:
+                    w.submit(p.log.warning, "policy:%s worker", tag).result()
+                time.sleep(0.05)
+                p.log.warning("policy:%s executed", tag)
+
+        self.patch(Policy, "__call__", run_policy)
+
+        temp_dir = self.get_temp_dir()
+        yaml_file = self.write_policy_file(
+            {"policies": [{"name": "ec2-all", "resource": "ec2"},
+                          {"name": "ebs-all", "resource": "ebs"}]})
+        self.run_and_expect_success(
+            ["custodian", "run", "--cache", temp_dir + "/cache",
+             "--region-concurrency", "2", "-r", "us-east-1", "-r", "us-west-2",
+             "-s", temp_dir, yaml_file])
+        tags = {"%s/%s" % (r, n) for r in ("us-east-1", "us-west-2")
+                for n in ("ec2-all", "ebs-all")}
+        logs = {}
+        for root, dirs, files in os.walk(temp_dir):
+            if "custodian-run.log" in files:
+                with open(os.path.join(root, "custodian-run.log")) as fh:
+                    logs[root] = fh.read()
+        self.assertEqual(len(logs), 4)
+        for policy_log in logs.values():
+            found = {t for t in tags if "policy:%s executed" % t in policy_log}
+            self.assertEqual(len(found), 1)
+            tag = found.pop()
+            self.assertIn("policy:%s worker" % tag, policy_log)
+            for other in tags.difference((tag,)):
+                self.assertNotIn("policy:%s " % other, policy_log)
+
     def test_error(self):
         from c7n.policy import Policy
 
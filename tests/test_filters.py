@@ -19,6 +19,9 @@ from c7n.testing import mock_datetime_now
 from c7n.utils import annotation
 from .common import instance, event_data, Bag, BaseTest
 from c7n.filters.core import AnnotationSweeper, ValueRegex, parse_date as core_parse_date
+from c7n.filters.related import RelatedResourceBroker
+from c7n.cache import InMemoryCache, NullCache
+from c7n.config import Config
 
 
 class BaseFilterTest(unittest.TestCase):
@@ -304,6 +307,239 @@ class TestValueFilter(unittest.TestCase):
         self.assertEqual(res,False)
         
 
+class TestCompiledValueFilter(unittest.TestCase):
+
+    resources = [
+        {"Name": "Web-1", "Count": "5", "Size": 3, "Ips": ["10.0.0.1", "10.0.0.1"],
+         "Cidr": "10.0.0.0/16", "Created": "2020-01-01T00:00:00+00:00",
+         "Version": "1.10.2", "Nested": {"Port": 443},
+         "Tags": [{"Key": "Env", "Value": "prod"}]},
+        {"Name": "db", "Count": "x", "Size": None, "Ips": [], "Cidr": "10.1.0.0/24",
+         "Created": "2022-06-01T00:00:00+00:00", "Version": "1.9",
+         "Nested": {"Port": 22}, "Tags": []},
+        {"labels": {"env": "dev"}, "Nested": None},
+        {"tags": {"Env": "prod"}, "Cidr": "bad", "Ips": "10.0.0.1"},
+    ]
+
+    filters = [
+        {"Name": "absent"},
+        {"Name": "present"},
+        {"Size": "not-null"},
+        {"Ips": "empty"},
+        {"tag:Env": "prod"},
+        {"tag:env": "absent"},
+        {"type": "value", "key": "Name", "value": "web-1", "value_type": "normalize"},
+        {"type": "value", "key": "Name", "value": "^w", "op": "regex"},
+        {"type": "value", "key": "Name", "value": "^w", "op": "regex-case"},
+        {"type": "value", "key": "Name", "value": ["db", "web-1"], "op": "in",
+         "value_type": "normalize"},
+        {"type": "value", "key": "Name", "value": ["db"], "op": "not-in"},
+        {"type": "value", "key": "Count", "value": 4, "op": "gt", "value_type": "integer"},
+        {"type": "value", "key": "Ips", "value": 1, "value_type": "size"},
+        {"type": "value", "key": "Ips", "value": 1, "value_type": "unique_size"},
+        {"type": "value", "key": "Cidr", "value": 20, "op": "gte", "value_type": "cidr_size"},
+        {"type": "value", "key": "Cidr", "value": "10.0.0.0/8", "op": "in",
+         "value_type": "cidr"},
+        {"type": "value", "key": "Created", "value": "2021-01-01", "op": "lt",
+         "value_type": "date"},
+        {"type": "value", "key": "Version", "value": "1.10", "op": "gt",
+         "value_type": "version"},
+        {"type": "value", "key": "Nested.Port", "value": 443},
+        {"type": "value", "key": "Name", "value": "web", "op": "eq",
+         "value_regex": "^([a-z]+)-"},
+        {"type": "value", "key": "Name", "value": "Size", "value_type": "expr",
+         "op": "ne"},
+    ]
+
+    def outcome(self, func, resource):
+        try:
+            return func(resource)
+        except Exception as e:
+            return type(e)
+
+    def test_compiled_matches(self):
+        for data in self.filters:
+            vf = filters.factory(data)
+            for r in self.resources:
+                self.assertEqual(
+                    self.outcome(vf.match, r), self.outcome(vf._match, r),
+                    "%s %s" % (data, r))
+
+    def test_recompile_on_value_change(self):
+        vf = filters.factory({"Name": "db"})
+        self.assertTrue(vf.match(self.resources[1]))
+        vf.v = "Web-1"
+        self.assertTrue(vf.match(self.resources[0]))
+        self.assertFalse(vf.match(self.resources[1]))
+
+    def test_subclass_value_fallback(self):
+
+        class Upper(base_filters.ValueFilter):
+
+            def get_resource_value(self, k, i, regex=None):
+                return str(i.get(k)).upper()
+
+        vf = Upper({"type": "value", "key": "Name", "value": "WEB-1"})
+        self.assertTrue(vf.match(self.resources[0]))
+        self.assertFalse(vf.match(self.resources[1]))
+
+
+class FakeRelatedManager:
+
+    type = 'security-group'
+    source_type = 'describe'
+    account_id = '112233445566'
+
+    class resource_type:
+        id = 'GroupId'
+        filter_name = 'GroupIds'
+        filter_type = 'list'
+        detail_spec = None
+
+    def __init__(self, count, cache=None):
+        self.config = Config.empty(region='us-east-1')
+        self._cache = cache or NullCache(self.config)
+        self.population = [{'GroupId': 'sg-%d' % i} for i in range(count)]
+        self.calls = []
+
+    def get_model(self):
+        return self.resource_type
+
+    def get_cache_key(self, query):
+        return {'resource': self.type, 'q': query}
+
+    def get_resources(self, ids):
+        self.calls.append(('get', sorted(ids)))
+        return [r for r in self.population if r['GroupId'] in ids]
+
+    def resources(self):
+        self.calls.append(('all',))
+        return list(self.population)
+
+
+class TestRelatedResourceBroker(unittest.TestCase):
+
+    def setUp(self):
+        self.populations = RelatedResourceBroker.populations
+        self.brokers = RelatedResourceBroker.brokers
+        RelatedResourceBroker.populations = {}
+        RelatedResourceBroker.brokers = {}
+
+    def tearDown(self):
+        RelatedResourceBroker.populations = self.populations
+        RelatedResourceBroker.brokers = self.brokers
+        RelatedResourceBroker.populations_max = 10000
+
+    def test_point_lookups_dedupe(self):
+        broker, manager = RelatedResourceBroker(), FakeRelatedManager(50)
+        for i in range(2):
+            found = broker.get_resources(manager, ['sg-1', 'sg-2'], 10)
+            self.assertEqual(sorted(r['GroupId'] for r in found), ['sg-1', 'sg-2'])
+        found = broker.get_resources(manager, ['sg-2', 'sg-3', 'sg-missing'], 10)
+        self.assertEqual(sorted(r['GroupId'] for r in found), ['sg-2', 'sg-3'])
+        self.assertEqual(manager.calls, [
+            ('get', ['sg-1', 'sg-2']), ('get', ['sg-3', 'sg-missing'])])
+
+    def test_sweep_threshold(self):
+        broker, manager = RelatedResourceBroker(), FakeRelatedManager(50)
+        found = broker.get_resources(manager, ['sg-%d' % i for i in range(10)], 10)
+        self.assertEqual(len(found), 10)
+        # a sweep serves any later lookup and records the population
+        self.assertEqual(len(broker.get_resources(manager, ['sg-20', 'sg-99'], 10)), 1)
+        self.assertEqual(len(broker.get_all(manager)), 50)
+        self.assertEqual(manager.calls, [('all',)])
+        self.assertEqual(broker.get_population(manager), 50)
+
+    def test_cost_model(self):
+        broker = RelatedResourceBroker()
+        manager = FakeRelatedManager(1000)
+        RelatedResourceBroker.populations[
+            ('112233445566', 'us-east-1', 'security-group')] = 1000
+        # 1000 resources take ~10 pages to sweep vs a single batched lookup
+        self.assertFalse(broker.use_sweep(manager, 150, 10))
+        ids = ['sg-%d' % i for i in range(450)]
+        self.assertEqual(len(broker.get_resources(manager, ids, 10)), 450)
+        self.assertEqual([c[0] for c in manager.calls], ['get', 'get', 'get'])
+
+        # without batch lookups, a sweep is cheaper than many individual calls
+        manager.resource_type = type(
+            'resource_type', (FakeRelatedManager.resource_type,), {'filter_type': 'scalar'})
+        self.assertTrue(broker.use_sweep(manager, 150, 10))
+        self.assertFalse(broker.use_sweep(manager, 5, 10))
+
+    def test_cached_population(self):
+        config = Config.empty(region='us-east-1')
+        cache = InMemoryCache(config)
+        cache.data = {}
+        manager = FakeRelatedManager(5, cache=cache)
+        broker = RelatedResourceBroker()
+        self.assertEqual(broker.get_population(manager), None)
+        cache.save(manager.get_cache_key(None), {'ids': ['sg-1', 'sg-2']})
+        self.assertEqual(broker.get_population(manager), 2)
+        # a population served from the cache is cheaper to sweep than lookup
+        self.assertTrue(broker.use_sweep(manager, 2, 10))
+
+    def test_returns_copies(self):
+        broker, manager = RelatedResourceBroker(), FakeRelatedManager(5)
+        broker.get_resources(manager, ['sg-1'], 10)[0]['c7n:annotation'] = True
+        broker.get_all(manager)[1]['c7n:annotation'] = True
+        for r in broker.get_resources(manager, ['sg-1'], 10) + broker.get_all(manager):
+            self.assertNotIn('c7n:annotation', r)
+
+    def test_manager_cached(self):
+        broker = RelatedResourceBroker()
+
+        def get_manager(region, policy):
+            ctx = Bag(options=Config.empty(region=region), session_factory=None)
+            return Bag(ctx=ctx, config=ctx.options, policy=policy)
+
+        first = get_manager('us-east-1', 'a')
+        manager = broker.get_manager(first, 'c7n.resources.vpc.SecurityGroup')
+        self.assertEqual(manager.type, 'security-group')
+        self.assertIs(manager.ctx, first.ctx)
+        # policies with the same session settings share a manager
+        self.assertIs(
+            broker.get_manager(get_manager('us-east-1', 'b'), 'c7n.resources.vpc.SecurityGroup'),
+            manager)
+        self.assertIsNot(
+            broker.get_manager(get_manager('us-west-2', 'a'), 'c7n.resources.vpc.SecurityGroup'),
+            manager)
+
+    def test_shared_broker_eviction(self):
+        RelatedResourceBroker.populations_max = 2
+
+        def get_manager(account_id):
+            return Bag(account_id=account_id, config=Config.empty(
+                region='us-east-1', cache='memory', cache_period=1))
+
+        broker = RelatedResourceBroker.get(get_manager('1'))
+        RelatedResourceBroker.set_population(('1', 'us-east-1', 'vpc'), 5)
+        self.assertIs(RelatedResourceBroker.get(get_manager('1')), broker)
+
+        # expired brokers of any account are evicted, with their populations
+        RelatedResourceBroker.brokers[('1', 'us-east-1')] = (0, broker)
+        RelatedResourceBroker.get(get_manager('2'))
+        self.assertEqual(list(RelatedResourceBroker.brokers), [('2', 'us-east-1')])
+        self.assertEqual(RelatedResourceBroker.populations, {})
+
+        # populations are bounded, least recently swept first
+        for i in range(3):
+            RelatedResourceBroker.set_population(('2', 'us-east-1', str(i)), i)
+        self.assertEqual(
+            list(RelatedResourceBroker.populations),
+            [('2', 'us-east-1', '1'), ('2', 'us-east-1', '2')])
+
+    def test_broker_scope(self):
+        ctx = Bag(execution_id='a', related_broker=None)
+        manager = Bag(
+            ctx=ctx, account_id='112233445566',
+            config=Config.empty(region='us-east-1'))
+        broker = RelatedResourceBroker.get(manager)
+        self.assertIs(RelatedResourceBroker.get(manager), broker)
+        ctx.execution_id = 'b'
+        self.assertIsNot(RelatedResourceBroker.get(manager), broker)
+
+
 class TestAgeFilter(unittest.TestCase):
 
     def test_age_filter(self):
@@ -1158,6 +1394,79 @@ class TestMetricsFilter(BaseTest):
                 self.assertEqual(parse_date(expected_start), window.start)
                 self.assertEqual(parse_date(expected_end), window.end)
 
+    def test_metric_data_batching(self):
+        p = self.load_policy(
+            {"name": "ec2-cpu", "resource": "ec2",
+             "filters": [{"type": "metrics", "name": "CPUUtilization", "value": 1}]},
+            cache=True)
+        f = p.resource_manager.filters[0]
+        f.start, f.end = f.get_metric_window()
+        f.namespace, f.metric, f.statistics, f.period = (
+            'AWS/EC2', 'CPUUtilization', 'Average', 86400)
+
+        queries = []
+
+        class Paginator:
+            def paginate(self, **params):
+                queries.append(params['MetricDataQueries'])
+                return [{'MetricDataResults': [
+                    {'Id': q['Id'], 'Timestamps': [f.start, f.end],
+                     'Values': [idx, idx + 10]}
+                    for idx, q in enumerate(params['MetricDataQueries'])]}]
+
+        statistics = []
+
+        def get_metric_statistics(**params):
+            statistics.append(params)
+            return {'Datapoints': [{'Timestamp': f.end, 'Average': 10, 'Unit': 'Percent'}]}
+
+        client = Bag(
+            get_paginator=lambda op: Paginator(),
+            get_metric_statistics=get_metric_statistics)
+        f.unit = None
+        dims = [[{'Name': 'InstanceId', 'Value': 'i-%d' % i}] for i in (0, 1, 0)]
+        results = f.get_metric_data(client, dims)
+        # identical dimensions share a query, datapoints are most recent first
+        self.assertEqual(len(queries[0]), 2)
+        self.assertEqual(queries[0][1]['MetricStat']['Metric']['Dimensions'], dims[1])
+        self.assertEqual(results[0], [
+            {'Timestamp': f.end, 'Average': 10, 'Unit': 'Percent'},
+            {'Timestamp': f.start, 'Average': 0, 'Unit': 'Percent'}])
+        self.assertEqual(results[2], results[0])
+        self.assertEqual(results[1][0], {'Timestamp': f.end, 'Average': 11, 'Unit': 'Percent'})
+        # the unit is read once from the statistics of a single resource
+        self.assertEqual(len(statistics), 1)
+        self.assertEqual(statistics[0]['Statistics'], ['Average'])
+
+        # results are cached for later filters with the same period and days,
+        # even once the window has moved on.
+        f.start, f.end = f.start + timedelta(minutes=1), f.end + timedelta(minutes=1)
+        self.assertEqual(f.get_metric_data(client, dims[:2]), results[:2])
+        self.assertEqual(len(queries), 1)
+
+    def test_metric_data_unit(self):
+        p = self.load_policy(
+            {"name": "ec2-cpu", "resource": "ec2",
+             "filters": [{"type": "metrics", "name": "CPUUtilization", "value": 1,
+                          "unit": "Percent"}]})
+        f = p.resource_manager.filters[0]
+        f.start, f.end = f.get_metric_window()
+        f.namespace, f.metric, f.statistics, f.period, f.unit = (
+            'AWS/EC2', 'CPUUtilization', 'Average', 86400, 'Percent')
+
+        queries = []
+
+        class Paginator:
+            def paginate(self, **params):
+                queries.append(params['MetricDataQueries'])
+                return [{'MetricDataResults': [
+                    {'Id': 'm0', 'Timestamps': [f.end], 'Values': [5]}]}]
+
+        client = Bag(get_paginator=lambda op: Paginator())
+        results = f.get_metric_data(client, [[{'Name': 'InstanceId', 'Value': 'i-0'}]])
+        self.assertEqual(queries[0][0]['MetricStat']['Unit'], 'Percent')
+        self.assertEqual(results, [[{'Timestamp': f.end, 'Average': 5, 'Unit': 'Percent'}]])
+
     def test_metric_period_too_long(self):
         """The longest CloudWatch retention period is 455 days. If we specify a period like 900
         days, CloudWatch will happily show us 455 days of data with a start date 900 days ago.
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 import datetime
 import gzip
+import json
 import logging
 import mock
 import shutil
@@ -12,8 +13,9 @@ from dateutil.parser import parse as date_parse
 from c7n.ctx import ExecutionContext
 from c7n.config import Config
 from c7n.output import DirectoryOutput, BlobOutput, LogFile, metrics_outputs
-from c7n.resources.aws import S3Output, MetricsOutput, inspect_bucket_region
+from c7n.resources.aws import ApiStats, S3Output, MetricsOutput, inspect_bucket_region
 from c7n.testing import mock_datetime_now, TestUtils
+from c7n.utils import dumps, get_retry, read_records
 
 from .common import Bag, BaseTest
 
@@ -28,6 +30,82 @@ class MetricsTest(BaseTest):
             isinstance(metrics_outputs.select(True, {}), MetricsOutput))
 
 
+class ApiStatsTest(BaseTest):
+
+    def test_api_profile(self):
+        import boto3
+        from botocore.stub import Stubber
+
+        session = boto3.Session(region_name='us-east-1')
+        ctx = Bag(session_factory=lambda: session, metrics=mock.MagicMock())
+        stats = ApiStats(ctx)
+        stats.__enter__()
+        stats(session)
+        client = session.client('ec2')
+        stubber = Stubber(client)
+        stubber.add_client_error('describe_instances', 'RequestLimitExceeded')
+        stubber.add_response('describe_instances', {'Reservations': []})
+        stubber.add_response('describe_vpcs', {'Vpcs': []})
+
+        retry = get_retry(('RequestLimitExceeded',), min_delay=0.01)
+        with stubber:
+            retry(client.describe_instances)
+            client.describe_vpcs()
+
+        self.assertEqual(
+            stats.get_metadata(), {'ec2.DescribeInstances': 2, 'ec2.DescribeVpcs': 1})
+        profile = stats.get_profile()
+        self.assertEqual(
+            {k: (v['calls'], v['retries']) for k, v in profile.items()},
+            {'ec2.DescribeInstances': (2, 1), 'ec2.DescribeVpcs': (1, 0)})
+        self.assertTrue(0 < profile['ec2.DescribeInstances']['throttle-wait'] <= 0.01)
+        self.assertEqual(profile['ec2.DescribeVpcs']['histogram'], {'<=0.05': 1})
+
+        stats.__exit__()
+        self.assertEqual(
+            [c[0][0] for c in ctx.metrics.put_metric.call_args_list],
+            ['ApiCalls', 'ApiLatency', 'ApiBytesReceived', 'ApiRetries', 'ApiThrottleWait'])
+
+
+class ProfilerTest(BaseTest):
+
+    def run_profiled(self, profiler):
+        output_dir = self.get_temp_dir()
+        p = self.load_policy(
+            {"name": "data-profile",
+             "resource": "c7n.data",
+             "source": "static",
+             "filters": [{"name": "bob"}],
+             "query": [{"records": [{"name": "bob"}, {"name": "alice"}]}]},
+            config={"profiler": profiler}, output_dir=output_dir)
+        p.run()
+        return os.path.join(output_dir, p.name)
+
+    def test_timing_profile(self):
+        policy_dir = self.run_profiled("timing")
+        with open(os.path.join(policy_dir, "profile.json")) as fh:
+            profile = json.load(fh)
+        self.assertEqual(
+            [(s["name"], s["in"], s["out"]) for s in profile["sections"]],
+            [("resource-fetch", None, 2), ("filter:value", 2, 1)])
+        self.assertFalse(os.path.exists(os.path.join(policy_dir, "profile.txt")))
+
+    def test_cprofile(self):
+        policy_dir = self.run_profiled("cprofile")
+        self.assertTrue(os.path.exists(os.path.join(policy_dir, "profile.prof")))
+        with open(os.path.join(policy_dir, "profile.txt")) as fh:
+            self.assertIn("cumulative", fh.read())
+
+    def test_sampling_profile(self):
+        policy_dir = self.run_profiled("sample")
+        with open(os.path.join(policy_dir, "profile.collapsed")) as fh:
+            for line in fh:
+                stack, count = line.rsplit(" ", 1)
+                self.assertTrue(int(count) > 0)
+                self.assertNotIn("c7n-profile-sampler", stack)
+        self.assertTrue(os.path.exists(os.path.join(policy_dir, "profile.json")))
+
+
 class DirOutputTest(BaseTest):
 
     def get_dir_output(self, location):
@@ -45,6 +123,23 @@ class DirOutputTest(BaseTest):
         self.assertEqual(os.listdir(work_dir), ["myoutput"])
         self.assertTrue(os.path.isdir(os.path.join(work_dir, "myoutput")))
 
+    def test_write_resources(self):
+        resources = [{"Id": "a", "Date": datetime.datetime(2020, 1, 1)}, {"Id": "b"}]
+        work_dir, output = self.get_dir_output("file://myoutput")
+        output.write_resources(resources)
+        with open(os.path.join(output.root_dir, "resources.json")) as fh:
+            self.assertEqual(fh.read(), dumps(resources, indent=2))
+
+        output.ctx.options['output_format'] = 'jsonl'
+        output.ctx.options['output_compress'] = True
+        output.write_resources(resources)
+        with gzip.open(os.path.join(output.root_dir, "resources.jsonl.gz"), "rt") as fh:
+            self.assertEqual(len(fh.read().splitlines()), 2)
+            fh.seek(0)
+            self.assertEqual(
+                read_records(fh, lines=True),
+                [{"Id": "a", "Date": "2020-01-01T00:00:00"}, {"Id": "b"}])
+
 
 class S3OutputTest(TestUtils):
 
@@ -139,6 +234,14 @@ class S3OutputTest(TestUtils):
                 with gzip.open(os.path.join(root, f)) as fh:
                     self.assertEqual(fh.read(), b"abc")
 
+    def test_write_resources(self):
+        output = self.get_s3_output()
+        output.write_resources([{"Id": "a"}])
+        output.compress()
+        self.assertEqual(os.listdir(output.root_dir), ["resources.json.gz"])
+        with gzip.open(os.path.join(output.root_dir, "resources.json.gz"), "rt") as fh:
+            self.assertEqual(read_records(fh), [{"Id": "a"}])
+
     def test_upload(self):
 
         with mock_datetime_now(date_parse('2018/09/01 13:00'), datetime):
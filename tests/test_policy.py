@@ -8,19 +8,20 @@ import mock
 import os
 import shutil
 import tempfile
+import threading
 
-from c7n import policy, manager
+from c7n import cache, policy, manager
 from c7n.config import Config
 from c7n.provider import clouds
 from c7n.exceptions import ResourceLimitExceeded, PolicyValidationError
-from c7n.resources import aws, load_available
+from c7n.resources import aws, load_available, load_resources
 from c7n.resources.aws import AWS, Arn, fake_session
 from c7n.resources.ec2 import EC2
 from c7n.resources.kinesis import KinesisStream
 from c7n.policy import execution, ConfigPollRuleMode, Policy, PullMode
 from c7n.schema import generate, JsonSchemaValidator
 from c7n.utils import dumps
-from c7n.query import ConfigSource, TypeInfo
+from c7n.query import ConfigSource, DescribeSource, TypeInfo
 from c7n.version import version
 
 from .common import BaseTest, event_data, Bag, load_data
@@ -913,6 +914,7 @@ class PolicyMeta(BaseTest):
             {
                 "ec2:DescribeInstances",
                 "ec2:DescribeTags",
+                "cloudwatch:GetMetricData",
                 "cloudwatch:GetMetricStatistics",
             },
         )
@@ -1022,6 +1024,150 @@ class TestPolicyCollection(BaseTest):
         self.assertEqual(result.policies[0].name, 'bar')
 
 
+class ResourceFetchPlanTest(BaseTest):
+
+    def get_collection(self, data, **config):
+        load_resources(("aws.ec2", "aws.ebs"))
+        factory = self.replay_flight_data("test_ec2_state_transition_age_filter")
+        config = self._get_policy_config(cache=True, **config)
+        collection = policy.PolicyCollection.from_data(
+            data, config, session_factory=factory)
+        # isolate from the on disk cache, so we only observe the plan
+        for p in collection:
+            p.resource_manager._cache = cache.NullCache(config)
+        return collection
+
+    def test_shared_fetch(self):
+        fetches = []
+        original = DescribeSource.resources
+
+        def resources(source, query):
+            fetches.append(source.manager.ctx.policy.name)
+            return original(source, query)
+
+        self.patch(DescribeSource, "resources", resources)
+        collection = self.get_collection({"policies": [
+            {"name": "ec2-running", "resource": "ec2",
+             "filters": [{"State.Name": "running"}]},
+            {"name": "ebs", "resource": "ebs"},
+            {"name": "ec2-tagged", "resource": "ec2",
+             "filters": [{"tag:Name": "present"}]}]})
+
+        plan = policy.ResourceFetchPlan(collection)
+        self.assertEqual(len(plan), 1)
+        ec2_policies = [p for p in collection if p.resource_type == "ec2"]
+        for p in ec2_policies:
+            self.assertIsInstance(p.resource_manager._cache, cache.SharedResourceCache)
+
+        first = ec2_policies[0].resource_manager.resources()
+        first[0]['c7n:annotation'] = True
+        plan.release(ec2_policies[0])
+        second = ec2_policies[1].resource_manager.resources()
+        self.assertEqual(fetches, ["ec2-running"])
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 3)
+        # members of a group don't see each others annotations
+        self.assertNotIn('c7n:annotation', second[0])
+
+        plan.release(ec2_policies[1])
+        self.assertEqual(len(plan), 0)
+        self.assertEqual(plan.stores, {})
+
+    def test_shared_fetch_without_cache(self):
+        load_resources(("aws.ec2",))
+        factory = self.replay_flight_data("test_ec2_state_transition_age_filter")
+        config = self._get_policy_config(cache_period=0)
+        collection = policy.PolicyCollection.from_data({"policies": [
+            {"name": "ec2-a", "resource": "ec2"},
+            {"name": "ec2-b", "resource": "ec2", "filters": [{"State.Name": "running"}]}]},
+            config, session_factory=factory)
+        for p in collection:
+            self.assertIsInstance(p.resource_manager._cache, cache.NullCache)
+
+        fetches = []
+        original = DescribeSource.resources
+
+        def resources(source, query):
+            fetches.append(source.manager.ctx.policy.name)
+            return original(source, query)
+
+        self.patch(DescribeSource, "resources", resources)
+        plan = policy.ResourceFetchPlan(collection)
+        self.assertEqual(len(plan), 1)
+        policy.run_policies(collection, lambda p: p.resource_manager.resources(),
+                            fetch_plan=plan)
+        self.assertEqual(fetches, ["ec2-a"])
+        self.assertEqual(len(plan), 0)
+
+    def test_run_policies_concurrent(self):
+        collection = self.get_collection({"policies": [
+            {"name": "ec2-a", "resource": "ec2"},
+            {"name": "ebs", "resource": "ebs"},
+            {"name": "ec2-lambda", "resource": "ec2",
+             "mode": {"type": "periodic", "schedule": "rate(1 day)",
+                      "role": "arn:aws:iam::123456789012:role/custodian"}},
+            {"name": "ec2-b", "resource": "ec2"}]})
+        plan = policy.ResourceFetchPlan(collection)
+        self.assertEqual(
+            [[p.name for p in lane] for lane in plan.get_lanes(collection)],
+            [["ec2-a", "ec2-b"], ["ebs"], ["ec2-lambda"]])
+
+        executed = []
+
+        def execute(p):
+            executed.append((p.name, threading.get_ident()))
+
+        policy.run_policies(collection, execute, concurrency=2, fetch_plan=plan)
+        self.assertEqual(
+            sorted(name for name, _ in executed),
+            ["ebs", "ec2-a", "ec2-b", "ec2-lambda"])
+        threads = dict(executed)
+        # serverless policies are executed serially on the calling thread
+        self.assertEqual(executed[0], ("ec2-lambda", threading.get_ident()))
+        self.assertNotEqual(threads["ec2-a"], threading.get_ident())
+        # members of a fetch group execute in order within a lane
+        names = [name for name, _ in executed]
+        self.assertLess(names.index("ec2-a"), names.index("ec2-b"))
+        self.assertEqual(len(plan), 0)
+
+    def test_run_policies_regions(self):
+        collection = self.get_collection({"policies": [
+            {"name": "ec2-a", "resource": "ec2"},
+            {"name": "ebs", "resource": "ebs"},
+            {"name": "ec2-b", "resource": "ec2"}]})
+        policies = []
+        for region in ("us-east-1", "us-west-2"):
+            for p in collection:
+                policies.append(policy.Policy(
+                    p.data, p.options.copy(region=region), p.session_factory))
+
+        executed = []
+
+        def execute(p):
+            executed.append((p.options.region, p.name, threading.get_ident()))
+
+        policy.run_policies(policies, execute, region_concurrency=2)
+        # each region's policies execute in order on a single thread
+        for region in ("us-east-1", "us-west-2"):
+            region_executed = [e for e in executed if e[0] == region]
+            self.assertEqual([e[1] for e in region_executed], ["ec2-a", "ebs", "ec2-b"])
+            self.assertEqual(len({e[2] for e in region_executed}), 1)
+        self.assertNotIn(threading.get_ident(), {e[2] for e in executed})
+
+    def test_run_policies_error(self):
+        collection = self.get_collection({"policies": [
+            {"name": "ec2-a", "resource": "ec2"},
+            {"name": "ec2-b", "resource": "ec2"}]})
+        plan = policy.ResourceFetchPlan(collection)
+
+        def execute(p):
+            raise ValueError(p.name)
+
+        with self.assertRaises(ValueError):
+            policy.run_policies(collection, execute, concurrency=2, fetch_plan=plan)
+        self.assertEqual(len(plan), 1)
+
+
 class TestPolicy(BaseTest):
 
     def test_policy_variable_precedent(self):
@@ -1233,6 +1379,33 @@ class TestPolicy(BaseTest):
     def test_file_not_found(self):
         self.assertRaises(IOError, policy.load, Config.empty(), "/asdf12")
 
+    def test_load_files_pool(self):
+        paths = [
+            self.write_policy_file({'policies': [{'name': 'ec2', 'resource': 'aws.ec2'}]}),
+            self.write_policy_file({'policies': [
+                {'name': 'bad', 'resource': 'aws.ec2', 'actions': [{'type': 'xyz'}]}]}),
+            "/asdf12",
+            self.write_policy_file(
+                {'policies': [{'name': 'sqs', 'resource': 'aws.sqs'}]}, format="json")]
+        loaders = policy.load_files(Config.empty(load_workers=2), paths)
+        self.assertEqual(len(loaders), 4)
+        self.assertEqual([p.name for p in loaders[0]()], ['ec2'])
+        self.assertRaises(PolicyValidationError, loaders[1])
+        self.assertRaises(IOError, loaders[2])
+        collection = loaders[3]()
+        self.assertEqual([p.resource_type for p in collection], ['aws.sqs'])
+        self.assertEqual(policy.get_load_workers(Config.empty(), paths[:2]), 1)
+
+    def test_load_files_validated_cache(self):
+        cache_dir = self.get_temp_dir()
+        self.change_environment(C7N_SCHEMA_CACHE=cache_dir)
+        path = self.write_policy_file({'policies': [{'name': 'ec2', 'resource': 'aws.ec2'}]})
+        policy.load(Config.empty(), path)
+        self.assertFalse(os.path.exists(os.path.join(cache_dir, 'validated')))
+        loader, = policy.load_files(Config.empty(), [path])
+        self.assertEqual([p.name for p in loader()], ['ec2'])
+        self.assertEqual(len(os.listdir(os.path.join(cache_dir, 'validated'))), 1)
+
     def test_policy_resource_limits(self):
         session_factory = self.replay_flight_data(
             "test_policy_resource_limits")
@@ -1,6 +1,7 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
-
+import subprocess
+import sys
 
 from .common import BaseTest
 
@@ -33,3 +34,16 @@ class ProviderTest(BaseTest):
         load_resources(('aws.ec2',))
         ec2 = get_resource_class('aws.ec2')
         self.assertEqual(ec2.type, 'ec2')
+
+    def test_resource_import_time(self):
+        # generic elements and slow to import dependencies are only loaded on use
+        output = subprocess.run(
+            [sys.executable, '-c',
+             "import sys; from c7n.resources import load_resources; "
+             "load_resources(('aws.ecr',)); print('\\n'.join(sys.modules))"],
+            capture_output=True, text=True, check=True).stdout
+        modules = set(output.split())
+        self.assertIn('c7n.resources.ecr', modules)
+        self.assertFalse(modules.intersection((
+            'c7n.resources.securityhub', 'c7n.resources.sfn', 'c7n.resources.ssm',
+            'distutils', 'pkg_resources')))
@@ -3,10 +3,16 @@
 import json
 import logging
 import os
+import time
 
+import mock
 
-from c7n.query import ResourceQuery, RetryPageIterator, TypeInfo
+from c7n import cache, query, utils
+from c7n.exceptions import ClientError
+from c7n.query import (
+    AugmentLimiter, ResourceQuery, RetryPageIterator, THROTTLE_CODES, TypeInfo)
 from c7n.resources.vpc import InternetGateway
+from c7n.tags import universal_augment
 
 from botocore.config import Config
 from .common import BaseTest, placebo_dir
@@ -128,6 +134,56 @@ class ConfigSourceTest(BaseTest):
         p.data['query'] = [{'clause': "configuration.imageId = 'xyz'"}]
         self.assertIn("imageId = 'xyz'", source.get_query_params(None)['expr'])
 
+    def test_config_pushdown(self):
+        p = self.load_policy({
+            'name': 'igw', 'resource': 'aws.internet-gateway', 'source': 'config',
+            'filters': [
+                {'tag:Env': 'prod'},
+                {'type': 'value', 'key': 'tag:Owner', 'value': 'present'},
+                {'type': 'value', 'key': 'tag:App', 'op': 'in', 'value': ['a', 'b']},
+                {'type': 'value', 'key': 'State', 'value': 'available'},
+                {'type': 'value', 'key': 'OwnerId', 'op': 'in', 'value': ['x', 'y']},
+                # not pushed down
+                {'tag:Team': 'absent'},
+                {'type': 'value', 'key': 'VpcId', 'value': 'vpc', 'op': 'ne'},
+                {'type': 'value', 'key': 'CreateTime', 'value': 'x'},
+                {'type': 'value', 'key': 'Attachments[].VpcId', 'value': 'x'},
+                {'or': [{'tag:Env': 'dev'}]}]})
+        source = p.resource_manager.source
+        default_expr = (
+            "select resourceId, configuration, supplementaryConfiguration "
+            "where resourceType = 'AWS::EC2::InternetGateway'")
+        self.assertEqual(source.get_query_params(None), {
+            'default_expr': default_expr,
+            'expr': " AND ".join([
+                default_expr,
+                "tags.tag = 'Env=prod'",
+                "tags.key = 'Owner'",
+                "tags.tag IN ('App=a', 'App=b')",
+                "(configuration.State = 'available' OR configuration.state = 'available')",
+                "(configuration.OwnerId IN ('x', 'y') OR configuration.ownerId IN ('x', 'y'))"
+            ])})
+
+        selects = []
+
+        def select(client, expr, aggregator=None):
+            selects.append((expr, aggregator))
+            if expr.startswith('select COUNT(*)'):
+                return [{'COUNT(*)': 1}]
+            return []
+
+        self.patch(source, 'select', select)
+        self.patch(source, 'get_listed_resources', lambda client: self.fail('listed'))
+        self.assertEqual(source.resources(), [])
+        # no matches is checked against select support for the resource type
+        self.assertEqual(selects[1], (
+            "select COUNT(*) where resourceType = 'AWS::EC2::InternetGateway'", None))
+
+        p.data['query'] = [{'aggregator': 'org'}, {'aggregator': 'other'}]
+        selects.clear()
+        self.assertEqual(source.resources(), [])
+        self.assertEqual(sorted(a for _, a in selects), ['org', 'other'])
+
 
 class QueryResourceManagerTest(BaseTest):
 
@@ -164,3 +220,212 @@ class QueryResourceManagerTest(BaseTest):
         self.assertEqual(len(resources), 1)
         resources = p.resource_manager.get_resources(["igw-5bce113f"])
         self.assertEqual(resources, [])
+
+    def test_cached_resources_per_id(self):
+        session_factory = self.replay_flight_data("test_ec2_state_transition_age_filter")
+        p = self.load_policy(
+            {"name": "ec2-check", "resource": "ec2"},
+            session_factory=session_factory,
+            cache=True,
+        )
+        rm = p.resource_manager
+        resources = rm.resources()
+        self.assertEqual(len(resources), 3)
+        query_key = rm.get_cache_key({'Filters': []})
+
+        with rm._cache:
+            self.assertEqual(
+                rm._cache.get(query_key),
+                {"ids": ["i-b2d2a876", "i-13413bd7", "i-1aebf7c0"]})
+            self.assertEqual(
+                rm._cache.get(rm.get_resource_cache_key("i-13413bd7"))["InstanceId"],
+                "i-13413bd7")
+            # point lookups only load the requested resources
+            self.assertEqual(
+                [r["InstanceId"] for r in rm._load_cached_resources(
+                    query_key, ["i-1aebf7c0", "i-xyz", "i-b2d2a876"])],
+                ["i-b2d2a876", "i-1aebf7c0"])
+
+        self.assertEqual(rm.resources(), resources)
+
+        # a partially expired set of resources is a cache miss
+        with rm._cache:
+            with rm._cache.conn as cursor:
+                cursor.execute("delete from c7n_cache where key = ?", [
+                    cache.encode(rm.get_resource_cache_key("i-13413bd7"))])
+            self.assertIsNone(rm._load_cached_resources(query_key))
+            self.assertEqual(len(rm._load_cached_resources(query_key, ["i-b2d2a876"])), 1)
+
+    def test_cached_resources_without_ids(self):
+        p = self.load_policy(
+            {"name": "igw-check", "resource": "internet-gateway"},
+            cache=True,
+        )
+        rm = p.resource_manager
+        key = rm.get_cache_key(None)
+        resources = [{"InternetGatewayId": "igw-1"}, {"InternetGatewayId": "igw-1"}]
+        with rm._cache:
+            rm._save_cached_resources(key, resources)
+            self.assertEqual(rm._cache.get(key), resources)
+            self.assertEqual(rm._load_cached_resources(key, ["igw-1"]), resources)
+
+    def test_augment_limiter(self):
+        limiter = AugmentLimiter(3, 6)
+        # additive increase after a limit's worth of unthrottled calls
+        for i in range(3):
+            self.assertEqual(limiter.call(lambda: i), i)
+        self.assertEqual(limiter.limit, 4)
+
+        def throttled():
+            retry = utils.get_retry(THROTTLE_CODES, 2, min_delay=0)
+            attempts = []
+
+            def func():
+                attempts.append(1)
+                if len(attempts) < 2:
+                    raise ClientError({"Error": {"Code": "ThrottlingException"}}, "op")
+                return True
+            return retry(func)
+
+        # multiplicative decrease on throttling
+        self.assertTrue(limiter.call(throttled))
+        self.assertEqual(limiter.limit, 2)
+        self.assertTrue(limiter.call(throttled))
+        self.assertTrue(limiter.call(throttled))
+        self.assertEqual(limiter.limit, 1)
+        self.assertEqual(limiter.active, 0)
+
+    def test_augment_concurrency_override(self):
+        p = self.load_policy({"name": "sqs-check", "resource": "sqs"})
+        self.assertEqual(p.resource_manager.max_workers, 3)
+        limiter = p.resource_manager.get_augment_limiter(initial=2)
+        self.assertEqual((limiter.limit, limiter.maximum), (2, 10))
+
+        p = self.load_policy(
+            {"name": "sqs-check", "resource": "sqs"},
+            config={"augment_concurrency": [("aws.sqs", 20), ("aws.ec2", 4)]})
+        limiter = p.resource_manager.get_augment_limiter(initial=2)
+        self.assertEqual((limiter.limit, limiter.maximum), (2, 20))
+
+        p = self.load_policy(
+            {"name": "ec2-check", "resource": "ec2"},
+            config={"augment_concurrency": {"ec2": 1}})
+        limiter = p.resource_manager.get_augment_limiter()
+        self.assertEqual((limiter.limit, limiter.maximum), (1, 1))
+
+    def test_augment_keys(self):
+        def augment_keys(filters, config=None):
+            p = self.load_policy(
+                {"name": "ec2-keys", "resource": "ec2", "filters": filters},
+                config=config or {"selective_augment": True})
+            return p.resource_manager.get_augment_keys()
+
+        filters = [
+            {"InstanceType": "t2.micro"},
+            {"or": [{"tag:Env": "dev"}, {"type": "marked-for-op", "op": "stop"}]},
+            {"type": "value", "key": "length(SecurityGroups[?GroupName=='default'])",
+             "value": 1}]
+        self.assertEqual(
+            augment_keys(filters),
+            {"InstanceType", "Tags", "SecurityGroups", "GroupName"})
+        self.assertEqual(augment_keys(filters, {"selective_augment": False}), None)
+        self.assertEqual(augment_keys([]), None)
+        # filters without declared keys need every augment
+        self.assertEqual(
+            augment_keys([{"InstanceType": "t2.micro"}, {"type": "instance-age"}]), None)
+
+        p = self.load_policy(
+            {"name": "ec2-keys", "resource": "ec2", "filters": filters},
+            config={"selective_augment": True})
+        self.assertEqual(
+            p.resource_manager.get_cache_key(None)["augment"],
+            ["GroupName", "InstanceType", "SecurityGroups", "Tags"])
+
+    def test_selective_augment(self):
+        # with no session factory, any api call would fail
+        p = self.load_policy(
+            {"name": "sns-arn", "resource": "sns", "filters": [{"TopicArn": "present"}]},
+            config={"selective_augment": True})
+        resources = [{"TopicArn": "arn:aws:sns:us-east-1:644160558196:xyz"}]
+        self.assertEqual(p.resource_manager.source.augment(resources), resources)
+        self.assertEqual(
+            universal_augment(p.resource_manager, resources),
+            [{"TopicArn": "arn:aws:sns:us-east-1:644160558196:xyz"}])
+
+    def test_incremental_filtering(self):
+        p = self.load_policy(
+            {"name": "igw-state", "resource": "internet-gateway",
+             "filters": [{"State": "a"}]},
+            config={"incremental_period": 60}, cache=True)
+        rm = p.resource_manager
+        # fetch the population afresh on each run
+        rm._cache = cache.NullCache(rm.config)
+        population = [
+            {"InternetGatewayId": "igw-1", "State": "a"},
+            {"InternetGatewayId": "igw-2", "State": "b"}]
+        filtered = []
+
+        def filter_resources(resources, event=None):
+            filtered.append([r["InternetGatewayId"] for r in resources])
+            return [r for r in resources if r["State"] == "a"]
+
+        self.patch(rm.source, "resources", lambda query: [dict(r) for r in population])
+        self.patch(rm, "filter_resources", filter_resources)
+
+        self.assertEqual([r["InternetGatewayId"] for r in rm.resources()], ["igw-1"])
+        self.assertEqual([r["InternetGatewayId"] for r in rm.resources()], ["igw-1"])
+        self.assertEqual(filtered, [["igw-1", "igw-2"], []])
+
+        # only new or changed resources are filtered
+        population[1]["State"] = "a"
+        population.append({"InternetGatewayId": "igw-3", "State": "b"})
+        self.assertEqual(
+            [r["InternetGatewayId"] for r in rm.resources()], ["igw-1", "igw-2"])
+        self.assertEqual(filtered[-1], ["igw-2", "igw-3"])
+
+        # until the verdicts are older than the incremental period
+        now = time.time()
+        self.patch(query, "time", mock.Mock(time=lambda: now + 3601))
+        self.assertEqual(
+            [r["InternetGatewayId"] for r in rm.resources()], ["igw-1", "igw-2"])
+        self.assertEqual(filtered[-1], ["igw-1", "igw-2", "igw-3"])
+
+    def test_incremental_filter_copies(self):
+        p = self.load_policy(
+            {"name": "igw-state", "resource": "internet-gateway",
+             "filters": [{"State": "a"}]},
+            config={"incremental_period": 60}, cache=True)
+        rm = p.resource_manager
+        rm._cache = cache.NullCache(rm.config)
+        population = [
+            {"InternetGatewayId": "igw-1", "State": "a"},
+            {"InternetGatewayId": "igw-2", "State": "a"}]
+        copies = []
+        self.patch(rm.source, "resources", lambda query: [dict(r) for r in population])
+        self.patch(rm, "filter_resources", lambda resources, event=None: [
+            copies and dict(r) or r for r in resources
+            if copies or r["InternetGatewayId"] == "igw-1"])
+
+        self.assertEqual([r["InternetGatewayId"] for r in rm.resources()], ["igw-1"])
+        # once a filter returns copies, everything is filtered again
+        copies.append(True)
+        population[1]["State"] = "b"
+        self.assertEqual(
+            [r["InternetGatewayId"] for r in rm.resources()], ["igw-1", "igw-2"])
+
+    def test_incremental_offhours(self):
+        p = self.load_policy(
+            {"name": "ec2-offhours", "resource": "ec2",
+             "filters": [{"type": "offhour", "default_tz": "et", "offhour": 19}]},
+            config={"incremental_period": 60}, cache=True)
+        self.assertFalse(p.resource_manager.is_incremental())
+        p = self.load_policy(
+            {"name": "ec2-age", "resource": "ec2",
+             "filters": [{"type": "instance-age", "days": 1}]},
+            config={"incremental_period": 60}, cache=True)
+        self.assertTrue(p.resource_manager.is_incremental())
+        p = self.load_policy(
+            {"name": "ec2-reduce", "resource": "ec2",
+             "filters": [{"type": "reduce", "limit": 1}]},
+            config={"incremental_period": 60}, cache=True)
+        self.assertFalse(p.resource_manager.is_incremental())
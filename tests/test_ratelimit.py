@@ -0,0 +1,91 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+import boto3
+from botocore.stub import Stubber
+import pytest
+
+from c7n import ratelimit
+from c7n.config import Config
+from c7n.resources.aws import AWS
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = ratelimit.TokenBucket(2, clock=clock, sleep=clock.sleep)
+    # burst capacity is available immediately
+    assert [bucket.acquire(), bucket.acquire()] == [0, 0]
+    # later callers reserve tokens in order
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 1.0
+    assert clock.sleeps == [0.5, 1.0]
+    clock.now = 10
+    assert bucket.acquire() == 0
+
+
+def test_parse_budget():
+    assert ratelimit.parse_budget('ec2=20') == ('ec2', 20)
+    assert ratelimit.parse_budget('ec2.DescribeInstances=0.5') == (
+        'ec2.DescribeInstances', 0.5)
+    for value in ('ec2', 'ec2=', '=5', 'ec2=-1', 'ec2=x'):
+        with pytest.raises(ValueError):
+            ratelimit.parse_budget(value)
+
+
+def test_rate_limiter_budgets(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(
+        ratelimit.RateLimiter, 'bucket_factory',
+        lambda self, rate: ratelimit.TokenBucket(rate, clock=clock, sleep=clock.sleep))
+    limiter = ratelimit.RateLimiter(
+        {'ec2': 1, 'ec2.DescribeInstances': 2}, account_id='112233445566')
+    assert limiter.get_budget('ec2', 'DescribeImages') == 1
+    assert limiter.get_budget('ec2', 'DescribeInstances') == 2
+    assert limiter.get_budget('s3', 'ListBuckets') is None
+
+    assert limiter.acquire('us-east-1', 's3', 'ListBuckets') == 0
+    assert limiter.acquire('us-east-1', 'ec2', 'DescribeImages') == 0
+    assert limiter.acquire('us-east-1', 'ec2', 'DescribeImages') == 1
+    # buckets are per region and operation
+    assert limiter.acquire('us-west-2', 'ec2', 'DescribeImages') == 0
+    assert limiter.acquire('us-east-1', 'ec2', 'DescribeSnapshots') == 0
+    assert limiter.wait_times == {'ec2.DescribeImages': 1}
+    assert limiter.total_wait == 1
+
+
+def test_rate_limiter_session():
+    limiter = ratelimit.RateLimiter({'*': 1})
+    acquired = []
+    limiter.acquire = lambda *args: acquired.append(args)
+
+    session = boto3.Session(
+        region_name='us-west-2', aws_access_key_id='foo', aws_secret_access_key='bar')
+    limiter.register(session)
+    client = session.client('sqs')
+    with Stubber(client) as stubber:
+        stubber.add_response('list_queues', {'QueueUrls': []})
+        client.list_queues()
+    assert acquired == [('us-west-2', 'sqs', 'ListQueues')]
+
+
+def test_session_factory_rate_limit():
+    factory = AWS().get_session_factory(Config.empty())
+    assert factory.rate_limiter is None
+
+    options = Config.empty(account_id='112233445566', api_rate_limit=[('ec2', 10)])
+    factory = AWS().get_session_factory(options)
+    assert factory.rate_limiter.budgets == {'ec2': 10}
+    # limiters are shared within a process
+    assert AWS().get_session_factory(options).rate_limiter is factory.rate_limiter
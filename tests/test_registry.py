@@ -5,8 +5,32 @@ import unittest
 from c7n.registry import PluginRegistry
 
 
+class LazyPlugin:
+    pass
+
+
 class RegistryTest(unittest.TestCase):
 
+    def test_register_lazy(self):
+        registry = PluginRegistry('dummy')
+        registry.register_lazy('lazy', '%s.LazyPlugin' % __name__)
+        self.assertIn('lazy', registry)
+        self.assertEqual(len(registry), 1)
+        self.assertEqual(registry._factories, {})
+        self.assertEqual(registry.get('lazy'), LazyPlugin)
+        self.assertEqual(LazyPlugin.type, 'lazy')
+        self.assertEqual(registry._lazy, {})
+
+        # explicit registrations take precedence
+        registry.register('eager', LazyPlugin)
+        registry.register_lazy('eager', 'c7n.registry.PluginRegistry')
+        self.assertEqual(list(registry.items()), [('lazy', LazyPlugin), ('eager', LazyPlugin)])
+
+        # plugins registered both ways are counted once
+        registry.register_lazy('both', '%s.LazyPlugin' % __name__)
+        registry.register('both', LazyPlugin)
+        self.assertEqual(len(registry), 3)
+
     def test_unregister(self):
 
         registry = PluginRegistry('dummy')
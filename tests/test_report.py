@@ -1,7 +1,15 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
-from c7n.reports.csvout import Formatter, strip_output_path
-from .common import BaseTest, load_data
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+
+from c7n.reports.csvout import (
+    Formatter, JsonArrayWriter, fs_record_set, iter_record_set, strip_output_path)
+from c7n.utils import reset_session_cache, write_records
+from .common import BaseTest, Bag, load_data
 
 
 class TestEC2Report(BaseTest):
@@ -164,3 +172,53 @@ class TestMultiReport(BaseTest):
             strip_output_path(p, policy_name) == f"logs/{policy_name}"
             for p in output_paths
         ))
+
+    def test_fs_record_set_jsonl(self):
+        output_dir = self.get_temp_dir()
+        with gzip.open(os.path.join(output_dir, "resources.jsonl.gz"), "wt") as fh:
+            write_records(fh, [{"InstanceId": "i-1"}, {"InstanceId": "i-2"}], lines=True)
+        records = fs_record_set(output_dir, "my_c7n_policy")
+        self.assertEqual([r["InstanceId"] for r in records], ["i-1", "i-2"])
+        self.assertTrue(all("CustodianDate" in r for r in records))
+
+    def test_s3_record_set_stream(self):
+        objects = {}
+        for key, ids, lines in (
+                ("logs/p/2021/01/01/01/resources.json.gz", ["i-1", "i-2"], False),
+                ("logs/p/2021/01/03/01/resources.jsonl.gz", ["i-2"], True),
+                ("logs/p/2021/01/02/01/resources.json.gz", ["i-1", "i-3"], False)):
+            blob = io.BytesIO()
+            with gzip.open(blob, "wt") as fh:
+                write_records(fh, [{"InstanceId": i} for i in ids], lines=lines)
+            objects[key] = blob.getvalue()
+
+        class FakeS3:
+            def get_paginator(self, name):
+                return Bag(paginate=lambda **kw: [
+                    {"Contents": [{"Key": k} for k in sorted(objects)]}, {}])
+
+            def get_object(self, Bucket, Key):
+                return {"Body": io.BytesIO(objects[Key])}
+
+        reset_session_cache()
+        self.addCleanup(reset_session_cache)
+        records = list(iter_record_set(
+            lambda: Bag(client=lambda service: FakeS3()), "bucket", "logs/p",
+            datetime(2021, 1, 1), max_workers=2))
+        self.assertEqual(
+            [(r["InstanceId"], r["CustodianDate"].day) for r in records],
+            [("i-2", 3), ("i-1", 2), ("i-3", 2), ("i-1", 1), ("i-2", 1)])
+
+        p = self.load_policy({"name": "report-test-ec2", "resource": "ec2"})
+        formatter = Formatter(p.resource_manager.resource_type, fields={"Id": "InstanceId"},
+                              include_default_fields=False)
+        self.assertEqual(
+            list(formatter.iter_rows(iter(records))), [["i-2"], ["i-1"], ["i-3"]])
+
+        output = io.StringIO()
+        writer = JsonArrayWriter(output)
+        for r in writer.tee(iter(records[:2])):
+            pass
+        writer.close()
+        self.assertEqual(
+            [r["InstanceId"] for r in json.loads(output.getvalue())], ["i-2", "i-1"])
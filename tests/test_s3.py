@@ -89,6 +89,106 @@ class RestoreCompletionTest(TestCase):
         self.assertFalse(s3.restore_complete('ongoing-request="true"'))
 
 
+class BucketAssemblyTest(BaseTest):
+
+    def test_augment_keys(self):
+        def augment_keys(filters, actions=()):
+            p = self.load_policy({
+                "name": "s3-keys", "resource": "s3",
+                "filters": filters, "actions": list(actions)},
+                config={"selective_augment": True})
+            return p.resource_manager.get_augment_keys()
+
+        self.assertEqual(augment_keys([]), None)
+        self.assertEqual(
+            augment_keys([
+                {"tag:Owner": "absent"},
+                {"or": [
+                    {"Versioning.Status": "Enabled"},
+                    {"type": "global-grants"}]},
+                {"Name": "abc"}],
+                [{"type": "tag", "key": "Audit", "value": "true"}]),
+            {"Tags", "Versioning", "Acl"})
+        self.assertEqual(
+            augment_keys([{"Policy": "present"}, {"type": "is-log-target"}]), None)
+        self.assertEqual(augment_keys([{"type": "bucket-encryption", "state": True}]), set())
+        notify = {
+            "type": "notify", "to": ["ops@example.com"],
+            "transport": {"type": "sqs", "queue": "xyz"}}
+        self.assertEqual(augment_keys([{"Policy": "present"}], [notify]), None)
+
+        data = {"name": "s3-keys", "resource": "s3", "filters": [{"tag:Owner": "absent"}]}
+        p = self.load_policy(data, config={"selective_augment": True})
+        self.assertEqual(
+            p.resource_manager.get_cache_key(None)["augment"], ["Tags"])
+        # opt-in only
+        p = self.load_policy(data)
+        self.assertEqual(p.resource_manager.get_augment_keys(), None)
+        self.assertNotIn("augment", p.resource_manager.get_cache_key(None))
+
+    def test_assemble(self):
+        calls = []
+
+        def get_client(region=None):
+            return FakeBucketClient(region, calls)
+
+        assembly = s3.BucketAssembly(None, {"Tags", "Policy"})
+        assembly.get_client = get_client
+        self.assertEqual(
+            [m[0] for m in assembly.methods], ["get_bucket_tagging", "get_bucket_policy"])
+
+        buckets = [{"Name": "eu"}, {"Name": "standard"}, {"Name": "moved"}]
+        self.patch(s3.S3, "executor_factory", MainThreadExecutor)
+        p = self.load_policy({"name": "s3-assemble", "resource": "s3"})
+        source = p.resource_manager.source
+        self.patch(s3, "BucketAssembly", lambda *args: assembly)
+        buckets = source.augment(buckets)
+
+        self.assertEqual(buckets[0]["Location"], {"LocationConstraint": "eu-west-1"})
+        self.assertEqual(buckets[1]["Tags"], [])
+        self.assertEqual(buckets[2]["Policy"], "{}")
+        self.assertEqual(buckets[2]["c7n:DeniedMethods"], ["get_bucket_location"])
+        self.assertEqual(calls, [
+            (None, "get_bucket_location", "eu"),
+            (None, "get_bucket_location", "standard"),
+            (None, "get_bucket_location", "moved"),
+            ("eu-west-1", "get_bucket_tagging", "eu"),
+            ("eu-west-1", "get_bucket_policy", "eu"),
+            ("us-east-1", "get_bucket_tagging", "standard"),
+            ("us-east-1", "get_bucket_policy", "standard"),
+            (None, "get_bucket_tagging", "moved"),
+            ("us-west-2", "get_bucket_tagging", "moved"),
+            (None, "get_bucket_policy", "moved"),
+            ("us-west-2", "get_bucket_policy", "moved")])
+
+
+class FakeBucketClient:
+
+    def __init__(self, region, calls):
+        self.region = region
+        self.calls = calls
+
+    def __getattr__(self, name):
+        def invoke(Bucket):
+            self.calls.append((self.region, name, Bucket))
+            if Bucket == "moved" and name == "get_bucket_location":
+                raise ClientError(
+                    {"Error": {"Code": "AccessDenied", "Message": "denied"}}, name)
+            if Bucket == "moved" and self.region is None:
+                raise ClientError({
+                    "Error": {"Code": "PermanentRedirect", "Message": "moved"},
+                    "ResponseMetadata": {
+                        "HTTPHeaders": {"x-amz-bucket-region": "us-west-2"}}}, name)
+            if name == "get_bucket_tagging" and Bucket == "standard":
+                raise ClientError(
+                    {"Error": {"Code": "NoSuchTagSet", "Message": "none"}}, name)
+            return dict({
+                "get_bucket_location": {"LocationConstraint": Bucket == "eu" and "EU" or None},
+                "get_bucket_tagging": {"TagSet": []},
+                "get_bucket_policy": {"Policy": "{}"}}[name], ResponseMetadata={})
+        return invoke
+
+
 class BucketScanLogTests(TestCase):
 
     def setUp(self):
@@ -1,5 +1,7 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+import os
+
 import mock
 from jsonschema.exceptions import best_match
 
@@ -157,6 +159,95 @@ class SchemaTest(BaseTest):
         self.assertTrue(isinstance(result[0], ValueError))
         self.assertTrue("monday-morning" in str(result[0]))
 
+    def test_policy_validator_matches_schema(self):
+        data = {
+            'policies': [
+                {'name': 'valid', 'resource': 'aws.ec2',
+                 'filters': [
+                     'marked-for-op', {'tag:Owner': 'absent'},
+                     {'or': [{'type': 'instance-age', 'days': 30},
+                             {'not': [{'State.Name': 'running'}]}]}],
+                 'actions': ['stop', {'type': 'mark-for-op', 'op': 'stop'}]},
+                {'name': 'bad-action', 'resource': 'ec2',
+                 'actions': [{'type': 'terminate', 'force': 'asdf'}]},
+                {'name': 'bad-block', 'resource': 'aws.ec2',
+                 'filters': [{'or': [{'type': 'instance-age', 'days': 'x'}]}]},
+                {'name': 'bad-key', 'resource': 'aws.ec2', 'xyz': 1},
+                {'name': 'unknown', 'resource': 'aws.xyz'},
+                'not-a-policy']}
+        load_resources(('aws.ec2',))
+        policy_schema = generate(('aws.ec2',))
+        expected = list(JsonSchemaValidator(policy_schema).iter_errors(data))
+        errors = list(schema.PolicyValidator(policy_schema).iter_errors(data))
+        self.assertEqual(
+            [(list(e.path), list(e.schema_path)) for e in errors],
+            [(list(e.path), list(e.schema_path)) for e in expected])
+        self.assertEqual(
+            [str(specific_error(e)) for e in errors],
+            [str(specific_error(e)) for e in expected])
+
+    def test_policy_validator_action_block(self):
+        self.change_environment(C7N_SCHEMA_CACHE=self.get_temp_dir())
+        self.patch(schema, '_validators', {})
+        load_resources(('aws.ec2',))
+        data = {'policies': [
+            {'name': 'block', 'resource': 'aws.ec2', 'actions': [{'or': ['stop']}]}]}
+        expected = list(JsonSchemaValidator(generate(('aws.ec2',))).iter_errors(data))
+        self.assertTrue(expected)
+        self.assertEqual(len(validate(data, resource_types=('aws.ec2',))), 2)
+        self.assertEqual(
+            os.listdir(schema.get_cache_dir()), ['%s.json' % schema.get_schema_cache_key(
+                ('aws.ec2',))])
+
+    def test_validator_cache(self):
+        cache_dir = self.get_temp_dir()
+        self.change_environment(C7N_SCHEMA_CACHE=cache_dir)
+        self.patch(schema, '_validators', {})
+        load_resources(('aws.sqs',))
+        validator = schema.get_validator(('aws.sqs',))
+        self.assertIs(schema.get_validator(('aws.sqs',)), validator)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # a new process reads the generated schema back from disk
+        self.patch(schema, '_validators', {})
+        self.patch(schema, 'generate', mock.MagicMock(side_effect=AssertionError))
+        cached = schema.get_validator(('aws.sqs',))
+        self.assertIsNot(cached, validator)
+        self.assertEqual(
+            schema.dumps(cached.schema), schema.dumps(validator.schema))
+
+    def test_validated_cache(self):
+        cache_dir = self.get_temp_dir()
+        self.change_environment(C7N_SCHEMA_CACHE=cache_dir)
+        self.patch(schema, '_validators', {})
+        load_resources(('aws.sqs',))
+        data = {'policies': [{'name': 'sqs', 'resource': 'aws.sqs'}]}
+        invalid = {'policies': [{'name': 'sqs', 'resource': 'aws.sqs', 'xyz': 1}]}
+
+        # plain validation doesn't write markers
+        self.assertEqual(validate(data, resource_types=('aws.sqs',)), [])
+        self.assertFalse(os.path.exists(os.path.join(cache_dir, 'validated')))
+
+        self.assertEqual(schema.validate_cached(data, resource_types=('aws.sqs',)), [])
+        self.assertEqual(len(schema.validate_cached(invalid, resource_types=('aws.sqs',))), 2)
+
+        # valid data skips validation until it or the schema changes
+        self.patch(schema, 'get_validator', mock.MagicMock(side_effect=AssertionError))
+        self.assertEqual(schema.validate_cached(data, resource_types=('aws.sqs',)), [])
+        self.assertRaises(
+            AssertionError, schema.validate_cached, invalid, resource_types=('aws.sqs',))
+        self.assertRaises(
+            AssertionError, validate, data, resource_types=('aws.sqs',))
+
+        # markers expire, and are pruned when writing new ones
+        marker = schema.get_validated_path(data, ('aws.sqs',))
+        os.utime(marker, (0, 0))
+        self.assertRaises(
+            AssertionError, schema.validate_cached, data, resource_types=('aws.sqs',))
+        self.patch(schema, '_validated_pruned', set())
+        schema._write_validated(schema.get_validated_path(invalid, ('aws.sqs',)))
+        self.assertFalse(os.path.exists(marker))
+
     def test_py3_policy_error(self):
         data = {
             'policies': [{
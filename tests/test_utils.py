@@ -1,7 +1,9 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+import io
 import json
 import ipaddress
+import math
 import os
 import tempfile
 import time
@@ -12,6 +14,7 @@ import mock
 
 from c7n import utils
 from c7n.config import Config
+from c7n.credentials import SessionFactory
 from .common import BaseTest
 
 
@@ -51,6 +54,40 @@ class Backoff(BaseTest):
         else:
             self.fail("should have raised")
 
+    def test_retry_observer(self):
+        self.patch(time, "sleep", lambda x: x)
+        attempts = []
+        observed = []
+
+        def func():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ClientError({"Error": {"Code": "Throttling"}}, "something")
+            return 42
+
+        retry = utils.get_retry(("Throttling",), 5)
+        with utils.observe_retries(observed.append):
+            self.assertEqual(retry(func), 42)
+        self.assertEqual(observed, ["Throttling", "Throttling"])
+
+        # observers are scoped to the context
+        attempts.clear()
+        self.assertEqual(retry(func), 42)
+        self.assertEqual(len(observed), 2)
+
+    def test_botocore_retry_observer(self):
+        session = SessionFactory('us-east-1')()
+        observed = []
+        throttled = (None, {'Error': {'Code': 'Throttling'}})
+        session.events.emit(
+            'needs-retry.ec2.DescribeInstances', response=throttled, attempts=1)
+        with utils.observe_retries(observed.append):
+            session.events.emit(
+                'needs-retry.ec2.DescribeInstances', response=throttled, attempts=1)
+            session.events.emit(
+                'needs-retry.ec2.DescribeInstances', response=None, attempts=1)
+        self.assertEqual(observed, ['Throttling'])
+
     def test_delays(self):
         self.assertEqual(
             list(utils.backoff_delays(1, 256)),
@@ -441,6 +478,35 @@ class UtilTest(BaseTest):
         dtdec = utils.DateTimeEncoder()
         self.assertRaises(TypeError, dtdec.default, "test")
 
+    def test_json_backends(self):
+        d = parse_date("2018-02-02T12:00:00.000123+00:00")
+        data = [{"b": d, "a": [1, 2.5, {}], 3: utils.FormatDate(d), "n": None}, {},
+                {"s\u00e9": "\u2603\U0001f600\x7f\x01\n"}]
+
+        def encode():
+            records, lines = io.StringIO(), io.StringIO()
+            utils.write_records(records, data)
+            utils.write_records(lines, data, lines=True)
+            return [utils.dumps(data), utils.dumps(data, indent=2),
+                    records.getvalue(), lines.getvalue()]
+
+        fast = encode()
+        # values the fast backend rejects fall back to the stdlib
+        self.assertEqual(utils.loads(utils.dumps({"n": 2 ** 70})), {"n": 2 ** 70})
+        self.assertTrue(math.isnan(utils.loads('{"n": NaN}')["n"]))
+        self.assertRaises(TypeError, utils.dumps, {"a": object()})
+        if utils.orjson is not None:
+            # non finite floats are written as null
+            self.assertEqual(utils.loads(utils.dumps({"n": float("nan")})), {"n": None})
+
+        self.patch(utils, "orjson", None)
+        self.assertEqual(fast, encode())
+        self.assertEqual(
+            json.loads(fast[0])[0],
+            {"b": "2018-02-02T12:00:00.000123+00:00", "a": [1, 2.5, {}],
+             "3": "2018-02-02T12:00:00.000123+00:00", "n": None})
+        self.assertEqual(list(json.loads(fast[1])[0]), ["b", "a", "3", "n"])
+
     def test_set_annotation(self):
         self.assertRaises(
             ValueError, utils.set_annotation, "not a dictionary", "key", "value"
@@ -6,6 +6,7 @@ from unittest.mock import MagicMock
 
 from botocore.exceptions import ClientError as BotoClientError
 from c7n.exceptions import PolicyValidationError
+from c7n.resources import vpc
 from c7n.resources.aws import shape_validate
 from pytest_terraform import terraform
 
@@ -1443,6 +1444,45 @@ class SecurityGroupTest(BaseTest):
         resources = p.run()
         self.assertEqual(len(resources), 1)
 
+    def test_unused_shared_index(self):
+        self.patch(vpc.SGUsageIndex, 'indexes', {})
+        factory = self.replay_flight_data("test_security_group_unused")
+        p = self.load_policy(
+            {"name": "sg-unused", "resource": "security-group", "filters": ["unused"]},
+            session_factory=factory, cache=True)
+        self.assertEqual(len(p.run()), 1)
+        index = p.resource_manager.filters[0].get_index()
+        self.assertEqual(len(index.refs), 7)
+        self.assertEqual(len(index.peered), 1)
+
+        self.assertFalse(hasattr(index, 'manager'))
+        self.assertTrue(index.nics)
+
+        # later policies in the run reuse the scanned references and enis
+        p = self.load_policy(
+            {"name": "sg-used", "resource": "security-group", "filters": ["used"]},
+            session_factory=factory, cache=True)
+        used = p.resource_manager.filters[0]
+        self.assertIs(used.get_index(), index)
+        resources = p.resource_manager.resources()
+        self.patch(used, 'get_eni_sgs', None)
+        self.patch(used.manager, 'session_factory', None)
+        self.patch(used.manager, 'get_resource_manager', None)
+        self.assertEqual(len(used.process(resources)), len(resources))
+        self.assertIs(used.nics, index.nics)
+
+    def test_usage_index_uncached(self):
+        p = self.load_policy(
+            {"name": "sg-unused", "resource": "security-group", "filters": ["unused"]})
+        unused = p.resource_manager.filters[0]
+        self.assertIsNot(unused.get_index(), unused.get_index())
+        index = unused.get_index()
+        self.assertEqual(
+            index.scan(
+                unused.manager, (('a', lambda: {'sg-1'}), ('b', lambda: {'sg-1', 'sg-2'}))),
+            {'sg-1', 'sg-2'})
+        self.assertEqual(index.refs, {'a': {'sg-1'}, 'b': {'sg-1', 'sg-2'}})
+
     def test_match_resource_validator(self):
 
         try:
@@ -15,6 +15,8 @@ import placebo
 from botocore.response import StreamingBody
 from placebo import pill
 
+from c7n.executor import MainThreadExecutor
+from c7n.manager import ResourceManager
 from c7n.testing import CustodianTestCore
 
 # Custodian Test Account. This is used only for testing.
@@ -368,4 +370,6 @@ class PillTest(CustodianTestCore):
         pill.playback()
         self.addCleanup(pill.stop)
         self.addCleanup(self.cleanUp)
+        # recorded responses are replayed in order, so keep augment calls serial.
+        self.patch(ResourceManager, 'executor_factory', MainThreadExecutor)
         return lambda region=None, assume=None: session
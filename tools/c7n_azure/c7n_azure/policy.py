@@ -331,8 +331,7 @@ class AzureModeCommon:
                 buffer=False)
             ctx.metrics.put_metric(
                 "ResourceTime", rt, "Seconds", Scope="Policy")
-            ctx.output.write_file(
-                'resources.json', utils.dumps(resources, indent=2))
+            ctx.output.write_resources(resources)
 
             if not resources:
                 policy.log.info(
@@ -345,7 +344,8 @@ class AzureModeCommon:
                 policy.log.info(
                     "policy: %s invoking action: %s resources: %d",
                     policy.name, action.name, len(resources))
-                with ctx.tracer.subsegment('action:%s' % action.type):
+                with ctx.tracer.subsegment('action:%s' % action.type), \
+                        ctx.profiler.section('action:%s' % action.type, len(resources)):
                     if isinstance(action, EventAction):
                         results = action.process(resources, event)
                     else:
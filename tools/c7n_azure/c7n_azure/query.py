@@ -274,11 +274,16 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
                     len(resources)))
 
         if resources is None:
-            with self.ctx.tracer.subsegment('resource-fetch'):
+            with self.ctx.tracer.subsegment('resource-fetch'), \
+                    self.ctx.profiler.section('resource-fetch') as section:
                 resources = self.source.get_resources(query)
+                section['out'] = len(resources)
             if augment:
-                with self.ctx.tracer.subsegment('resource-augment'):
+                with self.ctx.tracer.subsegment('resource-augment'), \
+                        self.ctx.profiler.section(
+                            'resource-augment', len(resources)) as section:
                     resources = self.augment(resources)
+                    section['out'] = len(resources)
             self._cache.save(cache_key, resources)
 
         self._cache.close()
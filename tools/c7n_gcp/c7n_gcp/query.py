@@ -204,8 +204,10 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
                     len(resources)))
 
         if resources is None:
-            with self.ctx.tracer.subsegment('resource-fetch'):
+            with self.ctx.tracer.subsegment('resource-fetch'), \
+                    self.ctx.profiler.section('resource-fetch') as section:
                 resources = self._fetch_resources(q)
+                section['out'] = len(resources)
             self._cache.save(cache_key, resources)
 
         self._cache.close()
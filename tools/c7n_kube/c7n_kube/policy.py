@@ -182,7 +182,7 @@ class ValidatingControllerMode(K8sEventMode):
                     "Invoking actions %s", self.policy.resource_manager.actions
                 )
 
-            ctx.output.write_file('resources.json', dumps(resources, indent=2))
+            ctx.output.write_resources(resources)
             for action in self.policy.resource_manager.actions:
                 self.policy.log.info(
                     "policy:%s invoking action:%s resources:%d",
@@ -5,13 +5,11 @@ Azure Queue Message Processing
 ==============================
 
 """
-import base64
-import json
-import zlib
 
 from c7n_mailer.azure_mailer.sendgrid_delivery import SendGridDelivery
 from c7n_mailer.smtp_delivery import SmtpDelivery
 from c7n_mailer.target import MessageTargetMixin
+from c7n_mailer.utils import decode_message
 
 try:
     from c7n_azure.storage_utils import StorageUtilities
@@ -60,8 +58,7 @@ class MailerAzureQueueProcessor(MessageTargetMixin):
         self.logger.info('No messages left on the azure storage queue, exiting c7n_mailer.')
 
     def process_azure_queue_message(self, encoded_azure_queue_message, timestamp):
-        queue_message = json.loads(
-            zlib.decompress(base64.b64decode(encoded_azure_queue_message.content)))
+        queue_message = decode_message(encoded_azure_queue_message.content)
 
         self.logger.debug("Got account:%s message:%s %s:%d policy:%s recipients:%s" % (
             queue_message.get('account', 'na'),
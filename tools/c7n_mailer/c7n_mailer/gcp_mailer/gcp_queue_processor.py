@@ -5,11 +5,9 @@ Google Queue Message Processing
 ==============================
 
 """
-import base64
-import json
-import zlib
 
 from c7n_mailer.target import MessageTargetMixin
+from c7n_mailer.utils import decode_message
 
 try:
     from c7n_gcp.client import Session
@@ -77,4 +75,4 @@ class MailerGcpQueueProcessor(MessageTargetMixin):
     @staticmethod
     def unpack_to_dict(encoded_gcp_pubsub_message):
         """Returns a message as a dict that been base64 decoded"""
-        return json.loads(zlib.decompress(base64.b64decode(encoded_gcp_pubsub_message)))
+        return decode_message(encoded_gcp_pubsub_message)
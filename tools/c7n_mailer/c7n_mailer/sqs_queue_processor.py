@@ -5,12 +5,11 @@ SQS Message Processing
 ===============
 
 """
-import base64
 import json
 import logging
-import zlib
 
 from c7n_mailer.target import MessageTargetMixin
+from c7n_mailer.utils import decode_message
 
 DATA_MESSAGE = "maidmsg/1.0"
 
@@ -130,7 +129,7 @@ class MailerSqsQueueProcessor(MessageTargetMixin):
             body = json.dumps(json.loads(body)['Message'])
         except ValueError:
             pass
-        sqs_message = json.loads(zlib.decompress(base64.b64decode(body)))
+        sqs_message = decode_message(body)
 
         self.logger.debug("Got account:%s message:%s %s:%d policy:%s recipients:%s" % (
             sqs_message.get('account', 'na'),
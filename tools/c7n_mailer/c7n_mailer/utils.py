@@ -7,6 +7,7 @@ import json
 import os
 import time
 import yaml
+import zlib
 
 import jinja2
 import jmespath
@@ -18,6 +19,16 @@ try:
 except ImportError:  # pragma: no cover
     pass  # Azure provider
 
+try:
+    from c7n.utils import loads
+except ImportError:  # pragma: no cover
+    loads = json.loads  # the mailer's lambda archive doesn't include c7n
+
+
+def decode_message(body):
+    """Decode a compressed notify message payload."""
+    return loads(zlib.decompress(base64.b64decode(body)))
+
 
 class Providers:
     AWS = 0
@@ -23,11 +23,13 @@ from botocore.exceptions import ClientError
 import click
 import jsonschema
 
+from c7n import ratelimit
+from c7n.cache import is_cache_url
 from c7n.credentials import assumed_session, SessionFactory
 from c7n.executor import MainThreadExecutor
 from c7n.exceptions import InvalidOutputConfig
 from c7n.config import Config
-from c7n.policy import PolicyCollection
+from c7n.policy import PolicyCollection, ResourceFetchPlan, run_policies
 from c7n.provider import get_resource_class, clouds as cloud_providers
 from c7n.reports.csvout import Formatter, fs_record_set, record_set, strip_output_path
 from c7n.resources import load_available
@@ -572,6 +574,13 @@ def accounts_iterator(config):
         yield d
 
 
+def _parse_api_rate_limit(ctx, param, value):
+    try:
+        return tuple(ratelimit.parse_budget(v) for v in value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
 def _update(old, new):
     for k in new:
         old.setdefault(k, new[k])
@@ -579,7 +588,8 @@ def _update(old, new):
 
 
 def run_account(account, region, policies_config, output_path,
-                cache_period, cache_path, metrics, dryrun, debug):
+                cache_period, cache_path, metrics, dryrun, debug,
+                policy_concurrency=1, api_rate_limit=()):
     """Execute a set of policies on an account.
     """
     logging.getLogger('custodian.output').setLevel(logging.ERROR + 1)
@@ -589,13 +599,17 @@ def run_account(account, region, policies_config, output_path,
 
     output_path = join_output_path(output_path, account['name'], region)
 
-    cache_path = os.path.join(cache_path, "%s-%s.cache" % (account['account_id'], region))
+    # a network cache is shared by every account region, entries are
+    # already keyed by account and region.
+    if not is_cache_url(cache_path):
+        cache_path = os.path.join(cache_path, "%s-%s.cache" % (account['account_id'], region))
 
     config = Config.empty(
         region=region, cache=cache_path,
         cache_period=cache_period, dryrun=dryrun, output_dir=output_path,
         account_id=account['account_id'], metrics_enabled=metrics,
-        log_group=None, profile=None, external_id=None)
+        log_group=None, profile=None, external_id=None,
+        policy_concurrency=policy_concurrency, api_rate_limit=api_rate_limit)
 
     env_vars = account_tags(account)
 
@@ -613,8 +627,52 @@ def run_account(account, region, policies_config, output_path,
     policies = PolicyCollection.from_data(policies_config, config)
     policy_counts = {}
     success = True
+    denied = False
     st = time.time()
 
+    def execute(p):
+        nonlocal success, denied
+        # after an access denied, skip the account's remaining policies
+        if denied:
+            return
+        log.debug(
+            "Running policy:%s account:%s region:%s",
+            p.name, account['name'], region)
+        try:
+            resources = p.run()
+            policy_counts[p.name] = resources and len(resources) or 0
+            if not resources:
+                return
+            if not config.dryrun and p.execution_mode != 'pull':
+                log.info("Ran account:%s region:%s policy:%s provisioned time:%0.2f",
+                         account['name'], region, p.name, time.time() - st)
+                return
+            log.info(
+                "Ran account:%s region:%s policy:%s matched:%d time:%0.2f",
+                account['name'], region, p.name, len(resources),
+                time.time() - st)
+        except ClientError as e:
+            success = False
+            if e.response['Error']['Code'] == 'AccessDenied':
+                log.warning('Access denied api:%s policy:%s account:%s region:%s',
+                            e.operation_name, p.name, account['name'], region)
+                denied = True
+                return
+            log.error(
+                "Exception running policy:%s account:%s region:%s error:%s",
+                p.name, account['name'], region, e)
+        except Exception as e:
+            success = False
+            log.error(
+                "Exception running policy:%s account:%s region:%s error:%s",
+                p.name, account['name'], region, e)
+            if not debug:
+                return
+            import traceback, pdb, sys
+            traceback.print_exc()
+            pdb.post_mortem(sys.exc_info()[-1])
+            raise
+
     with environ(**env_vars):
         for p in policies:
             # Extend policy execution conditions with account information
@@ -622,43 +680,10 @@ def run_account(account, region, policies_config, output_path,
             # Variable expansion and non schema validation (not optional)
             p.expand_variables(p.get_variables(account.get('vars', {})))
             p.validate()
-            log.debug(
-                "Running policy:%s account:%s region:%s",
-                p.name, account['name'], region)
-            try:
-                resources = p.run()
-                policy_counts[p.name] = resources and len(resources) or 0
-                if not resources:
-                    continue
-                if not config.dryrun and p.execution_mode != 'pull':
-                    log.info("Ran account:%s region:%s policy:%s provisioned time:%0.2f",
-                             account['name'], region, p.name, time.time() - st)
-                    continue
-                log.info(
-                    "Ran account:%s region:%s policy:%s matched:%d time:%0.2f",
-                    account['name'], region, p.name, len(resources),
-                    time.time() - st)
-            except ClientError as e:
-                success = False
-                if e.response['Error']['Code'] == 'AccessDenied':
-                    log.warning('Access denied api:%s policy:%s account:%s region:%s',
-                                e.operation_name, p.name, account['name'], region)
-                    return policy_counts, success
-                log.error(
-                    "Exception running policy:%s account:%s region:%s error:%s",
-                    p.name, account['name'], region, e)
-                continue
-            except Exception as e:
-                success = False
-                log.error(
-                    "Exception running policy:%s account:%s region:%s error:%s",
-                    p.name, account['name'], region, e)
-                if not debug:
-                    continue
-                import traceback, pdb, sys
-                traceback.print_exc()
-                pdb.post_mortem(sys.exc_info()[-1])
-                raise
+        run_policies(
+            policies, execute,
+            concurrency=policy_concurrency,
+            fetch_plan=ResourceFetchPlan(policies))
 
     return policy_counts, success
 
@@ -694,20 +719,21 @@ def initialize_provider_output(policies_config, output_dir, regions):
 @click.option('-l', '--policytags', 'policy_tags',
               multiple=True, default=None, help="Policy tag filter")
 @click.option('--cache-period', default=15, type=int)
-@click.option('--cache-path', required=False,
-              type=click.Path(
-                  writable=True, readable=True, exists=True,
-                  resolve_path=True, allow_dash=False,
-                  file_okay=False, dir_okay=True),
-              default=None)
+@click.option('--cache-path', required=False, default=None,
+              help="Cache directory, or a shared cache url ie. redis://host:6379/0")
 @click.option("--metrics", default=False, is_flag=True)
 @click.option("--metrics-uri", default=None, help="Configure provider metrics target")
 @click.option("--dryrun", default=False, is_flag=True)
 @click.option('--debug', default=False, is_flag=True)
 @click.option('-v', '--verbose', default=False, help="Verbose", is_flag=True)
+@click.option('--policy-concurrency', default=1, type=int,
+              help="Number of pull mode policies to execute concurrently per account region")
+@click.option('--api-rate-limit', multiple=True, callback=_parse_api_rate_limit,
+              metavar="SERVICE[.OPERATION]=N",
+              help="Maximum api calls per second to a service or operation per worker")
 def run(config, use, output_dir, accounts, not_accounts, tags, region,
         policy, policy_tags, cache_period, cache_path, metrics,
-        dryrun, debug, verbose, metrics_uri):
+        dryrun, debug, verbose, metrics_uri, policy_concurrency, api_rate_limit):
     """run a custodian policy across accounts"""
     accounts_config, custodian_config, executor = init(
         config, use, debug, verbose, accounts, tags, policy, policy_tags=policy_tags,
@@ -722,6 +748,11 @@ def run(config, use, output_dir, accounts, not_accounts, tags, region,
         cache_path = os.path.expanduser("~/.cache/c7n-org")
         if not os.path.exists(cache_path):
             os.makedirs(cache_path)
+    elif not is_cache_url(cache_path):
+        cache_path = os.path.abspath(os.path.expanduser(cache_path))
+        if not os.path.isdir(cache_path):
+            raise click.BadParameter(
+                "Directory %s does not exist" % cache_path, param_hint='--cache-path')
 
     output_dir = initialize_provider_output(custodian_config, output_dir, region)
 
@@ -738,7 +769,9 @@ def run(config, use, output_dir, accounts, not_accounts, tags, region,
                     cache_path,
                     metrics,
                     dryrun,
-                    debug)] = (a, r)
+                    debug,
+                    policy_concurrency,
+                    api_rate_limit)] = (a, r)
 
         for f in as_completed(futures):
             a, r = futures[f]
@@ -0,0 +1,88 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Compare json serialization backends on a synthetic resource set.
+
+```
+python tools/dev/jsonbench.py --size 100
+```
+"""
+from datetime import datetime, timedelta
+import io
+import random
+import time
+
+import click
+from dateutil.tz import tzutc
+
+from c7n import utils
+
+
+def synthetic_resources(size_mb, seed=42):
+    rand = random.Random(seed)
+    epoch = datetime(2020, 1, 1, tzinfo=tzutc())
+    resources, size, idx = [], 0, 0
+    while size < size_mb * 1024 * 1024:
+        r = {
+            "InstanceId": "i-%012x" % idx,
+            "InstanceType": rand.choice(("m5.large", "t3.micro", "c5.xlarge")),
+            "LaunchTime": epoch + timedelta(seconds=rand.randint(0, 10 ** 8)),
+            "State": {"Code": 16, "Name": rand.choice(("running", "stopped"))},
+            "PrivateIpAddress": "10.%d.%d.%d" % (
+                rand.randint(0, 255), rand.randint(0, 255), rand.randint(1, 254)),
+            "BlockDeviceMappings": [
+                {"DeviceName": "/dev/xvd%s" % chr(97 + i),
+                 "Ebs": {"VolumeId": "vol-%012x" % (idx * 4 + i),
+                         "AttachTime": epoch, "DeleteOnTermination": True}}
+                for i in range(rand.randint(1, 4))],
+            "Tags": [{"Key": "tag-%d" % i, "Value": "value-%d" % rand.randint(0, 1000)}
+                     for i in range(rand.randint(2, 12))],
+            "c7n:MatchedFilters": ["State.Name", "tag:Owner"],
+        }
+        resources.append(r)
+        size += len(utils.dumps(r, indent=None))
+        idx += 1
+    return resources, size
+
+
+def timed(func):
+    t = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t, result
+
+
+def write(resources, lines):
+    fh = io.StringIO()
+    utils.write_records(fh, resources, lines=lines)
+    return fh.getvalue()
+
+
+@click.command()
+@click.option('--size', default=100, help="Approximate resource set size in megabytes")
+def main(size):
+    resources, nbytes = synthetic_resources(size)
+    click.echo("%d resources, %0.1f MB" % (len(resources), nbytes / 1024.0 / 1024))
+    if utils.orjson is None:
+        click.echo("orjson not installed, only the stdlib backend is available")
+        return
+
+    doc = utils.dumps(resources, indent=2)
+    cases = [
+        ("dumps", lambda: utils.dumps(resources)),
+        ("write_records", lambda: write(resources, False)),
+        ("write_records lines", lambda: write(resources, True)),
+        ("loads", lambda: utils.loads(doc)),
+    ]
+    fast_backend = utils.orjson
+    click.echo("%-20s %10s %10s %8s" % ("operation", "stdlib", "orjson", "speedup"))
+    for name, func in cases:
+        utils.orjson = None
+        try:
+            base, _ = timed(func)
+        finally:
+            utils.orjson = fast_backend
+        fast, _ = timed(func)
+        click.echo("%-20s %9.3fs %9.3fs %7.1fx" % (name, base, fast, base / fast))
+
+
+if __name__ == '__main__':
+    main()
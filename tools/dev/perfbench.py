@@ -0,0 +1,328 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Benchmark policy execution on synthetic placebo recordings.
+
+Scaled up api responses (ec2 instances, ebs snapshots, s3 buckets) are
+written in placebo's recording format and replayed through resource
+queries, common filter chains and the csv report. Each benchmark runs
+in its own process, recording the best cpu and wall time over its
+rounds, the peak memory allocated (via tracemalloc) and the peak rss.
+
+```
+python tools/dev/perfbench.py run --output head.json
+python tools/dev/perfbench.py compare base.json head.json --threshold 0.2
+```
+
+``--scale 1`` is 10k instances, 50k snapshots and 5k buckets. Compare
+exits non zero when a benchmark regressed by more than the threshold,
+so ci can run the suite on both sides of a change on the same host.
+Peak rss is only available on unix.
+"""
+import concurrent.futures
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import boto3
+import click
+import placebo
+from placebo import pill
+
+from c7n.config import Config
+from c7n.policy import Policy
+from c7n.reports.csvout import report
+from c7n.resources import load_resources
+
+
+ACCOUNT_ID = '123456789012'
+PAGE_SIZE = 1000
+
+# as in the test suite's placebo, for s3 location response parsing.
+pill.FakeHttpResponse.raw = None
+
+BENCHMARKS = {}
+
+
+def benchmark(name, recordings):
+    def register(func):
+        BENCHMARKS[name] = (recordings, func)
+        return func
+    return register
+
+
+def write_recording(data_path, service, operation, pages):
+    for idx, page in enumerate(pages, 1):
+        with open(os.path.join(data_path, '%s.%s_%d.json' % (
+                service, operation, idx)), 'w') as fh:
+            json.dump({'status_code': 200, 'data': page}, fh)
+
+
+def paginate(items, key, token='NextToken'):
+    pages = []
+    for idx in range(0, len(items), PAGE_SIZE):
+        pages.append({key: items[idx:idx + PAGE_SIZE], 'ResponseMetadata': {}})
+        if idx + PAGE_SIZE < len(items):
+            pages[-1][token] = str(idx + PAGE_SIZE)
+    return pages or [{key: [], 'ResponseMetadata': {}}]
+
+
+def synthetic_time(rand):
+    # placebo's serialized form of a datetime
+    t = datetime.datetime(2023, 1, 1) - datetime.timedelta(days=rand.randint(0, 720))
+    return {'__class__': 'datetime', 'year': t.year, 'month': t.month, 'day': t.day,
+            'hour': 0, 'minute': 0, 'second': 0, 'microsecond': 0}
+
+
+def synthetic_tags(rand, idx):
+    tags = [{'Key': 'Name', 'Value': 'resource-%d' % idx}]
+    if rand.random() > 0.5:
+        tags.append({'Key': 'Owner', 'Value': 'team-%d' % rand.randint(0, 9)})
+    if rand.random() > 0.3:
+        tags.append({'Key': 'Env', 'Value': rand.choice(('prod', 'stage', 'dev'))})
+    return tags
+
+
+def record_instances(data_path, scale, rand):
+    instances = []
+    for idx in range(int(10000 * scale)):
+        launched = synthetic_time(rand)
+        instances.append({
+            'InstanceId': 'i-%017x' % idx,
+            'ImageId': 'ami-%08x' % rand.randint(0, 50),
+            'InstanceType': rand.choice(('m5.large', 't3.micro', 'c5.xlarge', 'r5.2xlarge')),
+            'LaunchTime': launched,
+            'BlockDeviceMappings': [{'DeviceName': '/dev/xvda', 'Ebs': {
+                'AttachTime': launched, 'VolumeId': 'vol-%017x' % idx,
+                'Status': 'attached', 'DeleteOnTermination': True}}],
+            'State': {'Code': 16, 'Name': rand.choice(('running', 'stopped'))},
+            'PrivateIpAddress': '10.%d.%d.%d' % (
+                rand.randint(0, 255), rand.randint(0, 255), rand.randint(1, 254)),
+            'SubnetId': 'subnet-%08x' % rand.randint(0, 20),
+            'VpcId': 'vpc-%08x' % rand.randint(0, 4),
+            'SecurityGroups': [{'GroupId': 'sg-%08x' % rand.randint(0, 100),
+                                'GroupName': 'default'}],
+            'Tags': synthetic_tags(rand, idx)})
+    reservations = [{'ReservationId': 'r-%017x' % idx, 'OwnerId': ACCOUNT_ID,
+                     'Instances': [i]} for idx, i in enumerate(instances)]
+    write_recording(
+        data_path, 'ec2', 'DescribeInstances', paginate(reservations, 'Reservations'))
+
+
+def record_snapshots(data_path, scale, rand):
+    snapshots = [{
+        'SnapshotId': 'snap-%017x' % idx,
+        'VolumeId': 'vol-%017x' % rand.randint(0, 10000),
+        'VolumeSize': rand.choice((8, 30, 100, 500)),
+        'StartTime': synthetic_time(rand),
+        'State': 'completed',
+        'Encrypted': rand.random() > 0.5,
+        'OwnerId': ACCOUNT_ID,
+        'Description': 'Created by CreateImage(i-%017x)' % idx,
+        'Tags': synthetic_tags(rand, idx)} for idx in range(int(50000 * scale))]
+    write_recording(
+        data_path, 'ec2', 'DescribeSnapshots', paginate(snapshots, 'Snapshots'))
+
+
+def record_buckets(data_path, scale, rand):
+    write_recording(data_path, 's3', 'ListBuckets', [{
+        'Buckets': [{'Name': 'bucket-%d' % idx, 'CreationDate': synthetic_time(rand)}
+                    for idx in range(int(5000 * scale))],
+        'Owner': {'ID': 'owner'}, 'ResponseMetadata': {}}])
+    # placebo cycles back to the first response, so one serves every bucket.
+    for operation, response in (
+            ('GetBucketLocation', {'LocationConstraint': None}),
+            ('GetBucketTagging', {'TagSet': [{'Key': 'Owner', 'Value': 'team-0'}]}),
+            ('GetBucketPolicy', {'Policy': json.dumps({
+                'Version': '2012-10-17', 'Statement': [{
+                    'Effect': 'Deny', 'Principal': '*', 'Action': 's3:*',
+                    'Resource': 'arn:aws:s3:::bucket/*',
+                    'Condition': {'Bool': {'aws:SecureTransport': 'false'}}}]})}),
+            ('GetBucketAcl', {'Owner': {'ID': 'owner'}, 'Grants': [{
+                'Grantee': {'ID': 'owner', 'Type': 'CanonicalUser'},
+                'Permission': 'FULL_CONTROL'}]}),
+            ('GetBucketReplication', {'ReplicationConfiguration': {
+                'Role': 'arn:aws:iam::%s:role/replication' % ACCOUNT_ID, 'Rules': []}}),
+            ('GetBucketVersioning', {'Status': 'Enabled'}),
+            ('GetBucketWebsite', {}),
+            ('GetBucketLogging', {}),
+            ('GetBucketNotificationConfiguration', {}),
+            ('GetBucketLifecycleConfiguration', {'Rules': []})):
+        response['ResponseMetadata'] = {}
+        write_recording(data_path, 's3', operation, [response])
+
+
+class PlaybackFactory:
+    """Session factory replaying the placebo recordings in a directory."""
+
+    region = 'us-east-1'
+
+    def __init__(self, data_path):
+        self.data_path = data_path
+
+    def __call__(self, assume=True, region=None):
+        session = boto3.Session(
+            region_name=region or self.region,
+            aws_access_key_id='bench', aws_secret_access_key='bench')
+        pill = placebo.attach(session, self.data_path)
+        pill.playback()
+        return session
+
+
+def get_policy(data, data_path, output_dir='null://'):
+    load_resources((data['resource'],))
+    options = Config.empty(
+        account_id=ACCOUNT_ID, region=PlaybackFactory.region, output_dir=output_dir)
+    return Policy(data, options, session_factory=PlaybackFactory(data_path))
+
+
+@benchmark('ec2-resources', (record_instances,))
+def ec2_resources(data_path):
+    p = get_policy({'name': 'ec2', 'resource': 'aws.ec2'}, data_path)
+    return p.resource_manager.resources
+
+
+@benchmark('ec2-filters', (record_instances,))
+def ec2_filters(data_path):
+    p = get_policy({
+        'name': 'ec2-filters', 'resource': 'aws.ec2',
+        'filters': [
+            {'State.Name': 'running'},
+            {'tag:Owner': 'absent'},
+            {'or': [{'tag:Env': 'prod'},
+                    {'type': 'value', 'key': 'InstanceType', 'op': 'regex',
+                     'value': '^(m5|r5)'}]},
+            {'type': 'value', 'key': 'PrivateIpAddress', 'op': 'in',
+             'value_type': 'cidr', 'value': '10.0.0.0/10'},
+            {'type': 'instance-age', 'days': 30}]}, data_path)
+    return p.resource_manager.resources
+
+
+@benchmark('ebs-snapshot-filters', (record_snapshots,))
+def snapshot_filters(data_path):
+    p = get_policy({
+        'name': 'snapshot-filters', 'resource': 'aws.ebs-snapshot',
+        'filters': [
+            {'type': 'age', 'days': 90},
+            {'Encrypted': False},
+            {'type': 'value', 'key': 'VolumeSize', 'op': 'gte', 'value': 100}]},
+        data_path)
+    return p.resource_manager.resources
+
+
+@benchmark('s3-resources', (record_buckets,))
+def s3_resources(data_path):
+    p = get_policy({
+        'name': 's3', 'resource': 'aws.s3',
+        'filters': [{'tag:Owner': 'present'}]}, data_path)
+    return p.resource_manager.resources
+
+
+@benchmark('ec2-report', (record_instances,))
+def ec2_report(data_path):
+    output_dir = os.path.join(data_path, 'output')
+    p = get_policy({'name': 'ec2-report', 'resource': 'aws.ec2'}, data_path, output_dir)
+    p()
+    options = Config.empty(field=[], no_default_fields=False, format='csv', all_findings=False)
+
+    def run():
+        report([p], datetime.datetime.now() - datetime.timedelta(days=1),
+               options, io.StringIO())
+    return run
+
+
+def measure(name, data_path, rounds):
+    func = BENCHMARKS[name][1](data_path)
+    func()  # warm up imports and caches
+    cpu = wall = None
+    for _ in range(rounds):
+        c, w = time.process_time(), time.perf_counter()
+        func()
+        c, w = time.process_time() - c, time.perf_counter() - w
+        cpu, wall = min(c, cpu or c), min(w, wall or w)
+    tracemalloc.start()
+    func()
+    alloc_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() != 'Darwin':
+        rss_peak *= 1024
+    return {'cpu': cpu, 'wall': wall, 'alloc_peak': alloc_peak, 'rss_peak': rss_peak}
+
+
+@click.group()
+def cli():
+    """Policy execution benchmarks on synthetic placebo recordings."""
+
+
+@cli.command()
+@click.option('--scale', type=float, default=1.0,
+              help='Multiplier of the synthetic resource counts')
+@click.option('--rounds', type=int, default=3)
+@click.option('-b', '--benchmark', 'names', multiple=True,
+              type=click.Choice(sorted(BENCHMARKS)), help='Only run the named benchmarks')
+@click.option('--seed', type=int, default=42)
+@click.option('-o', '--output', type=click.Path(), help='Write results as json')
+def run(scale, rounds, names, seed, output):
+    """Run the benchmarks, each in a new process."""
+    results = {'python': platform.python_version(), 'scale': scale, 'benchmarks': {}}
+    data_root = tempfile.mkdtemp()
+    ctx = multiprocessing.get_context('spawn')
+    try:
+        for name in names or sorted(BENCHMARKS):
+            data_path = os.path.join(data_root, name)
+            os.makedirs(data_path)
+            for recorder in BENCHMARKS[name][0]:
+                recorder(data_path, scale, random.Random(seed))
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=ctx) as w:
+                result = w.submit(measure, name, data_path, rounds).result()
+            results['benchmarks'][name] = result
+            click.echo("%-24s cpu:%0.3fs wall:%0.3fs alloc:%0.1fMB rss:%0.1fMB" % (
+                name, result['cpu'], result['wall'],
+                result['alloc_peak'] / 2 ** 20, result['rss_peak'] / 2 ** 20))
+    finally:
+        shutil.rmtree(data_root)
+    if output:
+        with open(output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+
+@cli.command()
+@click.argument('baseline', type=click.File())
+@click.argument('current', type=click.File())
+@click.option('--threshold', type=float, default=0.2,
+              help='Allowed relative increase before a metric is a regression')
+@click.option('-m', '--metric', 'metrics', multiple=True,
+              default=('cpu', 'alloc_peak', 'rss_peak'),
+              type=click.Choice(('cpu', 'wall', 'alloc_peak', 'rss_peak')))
+def compare(baseline, current, threshold, metrics):
+    """Compare two runs, exiting non zero on regressions."""
+    baseline = json.load(baseline)['benchmarks']
+    current = json.load(current)['benchmarks']
+    regressions = 0
+    for name in sorted(set(baseline).intersection(current)):
+        for m in metrics:
+            before, after = baseline[name][m], current[name][m]
+            change = before and (after - before) / before or 0
+            regressed = change > threshold
+            regressions += regressed
+            # memory in megabytes, times in seconds
+            unit = m.endswith('_peak') and 2 ** 20 or 1
+            click.echo("%-24s %-10s %10.3f %10.3f %+7.1f%%%s" % (
+                name, m, before / unit, after / unit, change * 100,
+                regressed and ' REGRESSION' or ''))
+    if regressions:
+        raise click.ClickException('%d metrics regressed over %d%%' % (
+            regressions, threshold * 100))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,105 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Time schema validation of a large synthetic policy file.
+
+```
+python tools/dev/validatebench.py --count 2000
+```
+
+With ``--files``, the policies are split across that many files and
+loaded serially, in a process pool, and again once validated.
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import click
+
+from c7n import schema
+from c7n.config import Config
+from c7n.policy import load_files
+from c7n.resources import load_resources
+from c7n.structure import StructureParser
+from c7n.utils import yaml_dump
+
+
+RESOURCES = (
+    'aws.ec2', 'aws.s3', 'aws.rds', 'aws.lambda', 'aws.iam-role',
+    'aws.ebs', 'aws.elb', 'aws.asg', 'aws.security-group', 'aws.sqs')
+
+
+def synthetic_policies(count, seed=42):
+    rand = random.Random(seed)
+    for idx in range(count):
+        policy = {
+            'name': 'policy-%d' % idx,
+            'resource': rand.choice(RESOURCES),
+            'filters': [
+                {'tag:Owner': 'absent'},
+                {'type': 'value', 'key': 'CreateDate', 'value_type': 'age',
+                 'value': rand.randint(1, 90), 'op': 'gt'},
+                {'or': [{'tag:Env': 'prod'}, {'tag:Env': 'stage'}]}]}
+        if idx % 2:
+            policy['actions'] = [{
+                'type': 'notify', 'to': ['resource-owner'], 'template': 'default',
+                'transport': {'type': 'sqs', 'queue': 'https://sqs/queue'}}]
+        yield policy
+
+
+def timed(func):
+    t = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t, result
+
+
+def load_all(paths, **options):
+    options = Config.empty(**options)
+    return sum(len(load()) for load in load_files(options, paths))
+
+
+def time_files(data, files):
+    policies = data['policies']
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ['C7N_SCHEMA_CACHE'] = cache_dir
+        paths = []
+        for idx in range(files):
+            paths.append(os.path.join(cache_dir, 'policies-%d.yml' % idx))
+            with open(paths[-1], 'w') as fh:
+                fh.write(yaml_dump({'policies': policies[idx::files]}))
+        for name, workers in (('serially', 1), ('in a pool', None), ('validated', 1)):
+            if name != 'validated':
+                shutil.rmtree(os.path.join(cache_dir, 'validated'), ignore_errors=True)
+            elapsed, count = timed(lambda: load_all(paths, load_workers=workers))
+            click.echo("load %d policies from %d files %s %0.3fs" % (
+                count, files, name, elapsed))
+
+
+@click.command()
+@click.option('--count', default=2000, help="Number of policies in the file")
+@click.option('--files', default=0, help="Also time loading the policies from this many files")
+def main(count, files):
+    data = {'policies': list(synthetic_policies(count))}
+    rtypes = StructureParser().get_resource_types(data)
+    load_resources(rtypes)
+
+    elapsed, validator = timed(lambda: schema.get_validator(tuple(sorted(rtypes))))
+    click.echo("validator %0.3fs" % elapsed)
+    elapsed, errors = timed(lambda: list(validator.iter_errors(data)))
+    assert not errors, errors[0]
+    click.echo("validate %d policies %0.3fs" % (count, elapsed))
+
+    # the previous approach, validating against the resource anyOf
+    subset = {'policies': data['policies'][:max(1, count // 20)]}
+    elapsed, _ = timed(lambda: list(validator.validator.iter_errors(subset)))
+    click.echo("validate %d policies via anyOf %0.3fs (~%0.1fs for %d)" % (
+        len(subset['policies']), elapsed,
+        elapsed * count / len(subset['policies']), count))
+
+    if files:
+        time_files(data, files)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""Compare compiled value filter matching against the unspecialized path.
+
+```
+python tools/dev/valuefilterbench.py --count 100000
+```
+"""
+import random
+import time
+
+import click
+
+from c7n.filters.core import ValueFilter
+
+
+FILTERS = [
+    {"type": "value", "key": "State.Name", "value": "running"},
+    {"type": "value", "key": "tag:Owner", "value": "absent"},
+    {"type": "value", "key": "InstanceType", "value": "^m5", "op": "regex"},
+    {"type": "value", "key": "LaunchTime", "value": "2021-06-01T00:00:00+00:00",
+     "op": "less-than", "value_type": "date"},
+    {"type": "value", "key": "PrivateIpAddress", "value": "10.0.0.0/12",
+     "op": "in", "value_type": "cidr"},
+    {"type": "value", "key": "VolumeSize", "value": "100", "op": "gte",
+     "value_type": "integer"},
+]
+
+
+def synthetic_resources(count, seed=42):
+    rand = random.Random(seed)
+    for idx in range(count):
+        tags = [{"Key": "Name", "Value": "i-%d" % idx}]
+        if rand.random() > 0.5:
+            tags.append({"Key": "Owner", "Value": "team-%d" % rand.randint(0, 9)})
+        yield {
+            "InstanceId": "i-%012x" % idx,
+            "InstanceType": rand.choice(("m5.large", "t3.micro", "c5.xlarge")),
+            "State": {"Name": rand.choice(("running", "stopped"))},
+            "LaunchTime": "20%02d-%02d-01T00:00:00+00:00" % (
+                rand.randint(15, 23), rand.randint(1, 12)),
+            "PrivateIpAddress": "10.%d.%d.%d" % (
+                rand.randint(0, 31), rand.randint(0, 255), rand.randint(1, 254)),
+            "VolumeSize": str(rand.choice((8, 100, 500))),
+            "Tags": tags,
+        }
+
+
+def timed(func, resources):
+    t = time.perf_counter()
+    matched = sum(1 for r in resources if func(r))
+    return time.perf_counter() - t, matched
+
+
+@click.command()
+@click.option('--count', default=100000, help="Number of synthetic resources")
+def main(count):
+    resources = list(synthetic_resources(count))
+    click.echo("%-20s %10s %10s %8s" % ("filter", "baseline", "compiled", "speedup"))
+    for data in FILTERS:
+        vf = ValueFilter(data).validate()
+        # resolve the filter's key, value and matcher
+        vf.match(resources[0])
+        base, base_matched = timed(vf._match, resources)
+        compiled, matched = timed(vf.match, resources)
+        assert matched == base_matched, data
+        name = "%s/%s" % (data['key'], data.get('value_type', data.get('op', 'eq')))
+        click.echo("%-20s %9.3fs %9.3fs %7.1fx" % (
+            name[:20], base, compiled, base / compiled))
+
+
+if __name__ == '__main__':
+    main()